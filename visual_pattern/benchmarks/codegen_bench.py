@@ -0,0 +1,61 @@
+"""
+Code generation throughput for synthetic blueprints.
+
+Run from visual_pattern/:
+    python -m benchmarks.codegen_bench [--sizes 10 100 1000 10000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline.renderer import Renderer
+from pipeline.visual_rules import default_engine
+
+CONCEPTS = ["Title card", "Flowchart connecting ideas", "Complex mesh", "Plain explanation"]
+STYLE = {"primary_color": "BLUE", "shape_style": "geometric"}
+
+def synthetic_blueprint(n_scenes: int) -> dict:
+    engine = default_engine()
+    scenes = []
+    for i in range(n_scenes):
+        # Quotes, backslashes and newlines exercise literal escaping
+        text = f'Scene {i}: "quoted" \\ path\nsecond line'
+        scenes.append({
+            "id": i + 1,
+            "narration": text,
+            "duration": 2.0 + i % 5,
+            "visuals": engine.build_visuals(CONCEPTS[i % len(CONCEPTS)], text, STYLE),
+        })
+    return {"title": "Benchmark", "style_settings": STYLE, "scenes": scenes}
+
+def best_of(repeat: int, fn) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Manim code generation")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_scene.py")
+        renderer = Renderer(output_file=path)
+        print(f"{'scenes':>8} {'per_scene':>9} {'seconds':>9} {'scenes/s':>10} {'MB/s':>8}")
+        for n in args.sizes:
+            blueprint = synthetic_blueprint(n)
+            for per_scene in (False, True):
+                elapsed = best_of(args.repeat, lambda: renderer.write_manim_code(blueprint, per_scene=per_scene))
+                size_mb = os.path.getsize(path) / 1e6
+                print(f"{n:>8} {str(per_scene):>9} {elapsed:>9.4f} {n / elapsed:>10.0f} {size_mb / elapsed:>8.1f}")
+
+if __name__ == "__main__":
+    main()
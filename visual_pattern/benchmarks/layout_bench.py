@@ -0,0 +1,55 @@
+"""
+Graph layout time for synthetic diagrams of increasing size.
+
+Run from visual_pattern/:
+    python -m benchmarks.layout_bench [--sizes 10 100 500 1000] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline.layout import LAYOUTS, layout_graph
+
+def synthetic_graph(n_nodes: int, layout: str, seed: int = 0) -> dict:
+    """
+    A connected graph: a random tree plus n/2 extra edges, some of which
+    close cycles.
+    """
+    rng = random.Random(seed)
+    edges = [[rng.randrange(i), i] for i in range(1, n_nodes)]
+    edges += [[rng.randrange(n_nodes), rng.randrange(n_nodes)] for _ in range(n_nodes // 2)]
+    return {
+        "type": "graph",
+        "layout": layout,
+        "nodes": [{"id": i, "label": f"Step {i}"} for i in range(n_nodes)],
+        "edges": edges,
+    }
+
+def best_of(repeat: int, fn) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark diagram auto-layout")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=list(LAYOUTS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>7} {'layout':>8} {'ms':>9}")
+    for n in args.sizes:
+        for layout in args.layouts:
+            graph = synthetic_graph(n, layout)
+            elapsed = best_of(args.repeat, lambda: layout_graph(graph))
+            print(f"{n:>7} {layout:>8} {elapsed * 1000:>9.2f}")
+
+if __name__ == "__main__":
+    main()
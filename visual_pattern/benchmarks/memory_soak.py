@@ -0,0 +1,100 @@
+"""
+Memory soak test: renders a long synthetic blueprint in one process with
+the in-process renderer under a memory budget, and checks that resident
+memory stays flat from scene to scene. Needs manim; TTS is offline.
+
+Run from visual_pattern/:
+    python -m benchmarks.memory_soak [--scenes 500] [--budget-mb 1024] [--max-growth-mb 64]
+Exits non-zero when RSS grows by more than --max-growth-mb after warm-up.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.pipeline_bench import STYLE, build_script
+from pipeline import tts
+from pipeline.audio_cache import AudioCache
+from pipeline.blueprint_gen import BlueprintGenerator
+from pipeline.interpreter import InProcessRenderer
+from pipeline.memory import current_rss_mb
+from pipeline.text_cache import TextCache
+from pipeline.tracing import Tracer, set_tracer
+
+def growth_per_100(samples: list) -> float:
+    """
+    Least-squares slope of (scene, MB) samples, in MB per 100 scenes.
+    """
+    n = len(samples)
+    if n < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in samples) / n
+    mean_y = sum(y for _, y in samples) / n
+    var = sum((x - mean_x) ** 2 for x, _ in samples)
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in samples)
+    return round(100 * cov / var, 2) if var else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a long blueprint in one process and check memory stays flat")
+    parser.add_argument("--scenes", type=int, default=500)
+    parser.add_argument("--budget-mb", type=int, default=1024, help="Per-scene RSS budget before falling back to processes")
+    parser.add_argument("--warmup", type=int, default=20, help="Scenes excluded while caches and fonts load")
+    parser.add_argument("--max-growth-mb", type=float, default=64, help="Allowed RSS growth from the end of warm-up to the last scene")
+    parser.add_argument("--trace-python", action="store_true", help="Also record per-scene tracemalloc peaks (slower)")
+    args = parser.parse_args()
+
+    if importlib.util.find_spec("manim") is None:
+        print("manim is not installed; nothing to soak")
+        return 2
+
+    tracer = set_tracer(Tracer())
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # Renderer, TTS and the text cache write relative to the working directory
+        os.chdir(workdir)
+        try:
+            backend = tts.OfflineBackend()
+            tts.set_default_backend(backend)
+            tts.set_audio_cache(AudioCache(os.path.join(workdir, "audio")))
+            with contextlib.redirect_stdout(io.StringIO()):
+                blueprint = BlueprintGenerator(tts_backend=backend).create_blueprint(build_script(args.scenes), STYLE)
+            renderer = InProcessRenderer(output_file="soak.py", text_cache=TextCache(),
+                                         memory_budget_mb=args.budget_mb, trace_python=args.trace_python)
+            print(f"Rendering {len(blueprint['scenes'])} scenes in-process (RSS {current_rss_mb()} MB)...")
+            with contextlib.redirect_stdout(io.StringIO()):
+                output = renderer.render(blueprint)
+        finally:
+            os.chdir(cwd)
+
+    scenes = [span for span in tracer.spans if span["name"] == "render.memory"]
+    after = [(i, span["rss_after_mb"]) for i, span in enumerate(scenes) if span.get("rss_after_mb") is not None]
+    if len(after) <= args.warmup:
+        print(f"Only {len(scenes)} scene(s) rendered in-process; output: {output}")
+        return 1
+
+    print(f"\n{'scene':>6} {'peak_rss_mb':>12} {'rss_after_mb':>13} {'peak_python_mb':>15}")
+    step = max(1, len(scenes) // 10)
+    for i in list(range(0, len(scenes), step)) + [len(scenes) - 1]:
+        span = scenes[i]
+        print(f"{i + 1:>6} {span['peak_rss_mb']!s:>12} {span['rss_after_mb']!s:>13} {span['peak_python_mb']!s:>15}")
+
+    settled = after[args.warmup:]
+    growth = settled[-1][1] - settled[0][1]
+    print(f"\nScenes in-process: {len(scenes)} of {len(blueprint['scenes'])}"
+          f"{' (fell back to separate processes)' if renderer._isolate else ''}")
+    print(f"Peak RSS over any scene: {max(span['peak_rss_mb'] or 0 for span in scenes)} MB")
+    print(f"RSS after warm-up: {settled[0][1]} MB -> {settled[-1][1]} MB ({growth:+.1f} MB, "
+          f"trend {growth_per_100(settled):+.2f} MB per 100 scenes)")
+    if growth > args.max_growth_mb:
+        print(f"FAIL: RSS grew by more than {args.max_growth_mb} MB")
+        return 1
+    print("OK: memory stayed flat")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+Stage-by-stage benchmark of the topic-to-video pipeline on a fixed
+synthetic corpus. Every stage runs offline: TTS uses the silent
+OfflineBackend and all output goes to a throwaway directory.
+
+Run from visual_pattern/:
+    python -m benchmarks.pipeline_bench                      # writes benchmarks/results/<time>.json
+    python -m benchmarks.pipeline_bench --save-baseline      # also stores benchmarks/baseline.json
+    python -m benchmarks.pipeline_bench --compare            # fails on regressions vs the baseline
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from pipeline import tts
+from pipeline.audio_cache import AudioCache
+from pipeline.blueprint_gen import BlueprintGenerator
+from pipeline.renderer import Renderer
+from pipeline.script_gen import ScriptGenerator
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+# Scene counts for short, medium and very long videos
+CORPUS = {"small": 4, "medium": 100, "long": 2000}
+# Scenes rendered with manim per size; a full long render takes hours
+RENDER_SCENES = {"small": 4, "medium": 25, "long": 100}
+STYLE = {"primary_color": "BLUE", "shape_style": "geometric"}
+
+def build_script(n_scenes: int) -> dict:
+    """
+    A deterministic script of n_scenes, stitched from mock scripts on
+    numbered topics so narration lines are unique and TTS cannot dedupe.
+    """
+    gen = ScriptGenerator()
+    scenes = []
+    for k in range(math.ceil(n_scenes / 4)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            part = gen.generate_script(f"Topic {k}")
+        for scene in part["scenes"]:
+            scenes.append(dict(scene, id=len(scenes) + 1, text=f"{scene['text']} ({k})"))
+    return {"title": f"Benchmark {n_scenes}", "scenes": scenes[:n_scenes]}
+
+def measure(fn, repeat: int, setup=None) -> dict:
+    """
+    Runs fn() repeat times with stdout silenced; setup() runs untimed
+    before each call and its result is passed to fn.
+    """
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn(arg) if setup else fn()
+            times.append(time.perf_counter() - start)
+    return {"median_s": round(statistics.median(times), 6), "min_s": round(min(times), 6), "runs": repeat}
+
+def bench_size(name: str, n_scenes: int, args, workdir: str) -> dict:
+    backend = tts.OfflineBackend(latency=args.tts_latency)
+    tts.set_default_backend(backend)
+    results = {}
+
+    results["script"] = measure(lambda: build_script(n_scenes), args.repeat)
+    script = build_script(n_scenes)
+    texts = [scene["text"] for scene in script["scenes"]]
+
+    counter = [0]
+    def fresh_cache():
+        # Cold audio cache per run so every run synthesizes every line
+        counter[0] += 1
+        cache = AudioCache(os.path.join(workdir, f"audio_{name}_{counter[0]}"))
+        tts.set_audio_cache(cache)
+        return cache
+
+    blueprint_gen = BlueprintGenerator(tts_backend=backend)
+    results["blueprint"] = measure(lambda _: blueprint_gen.create_blueprint(script, STYLE), args.repeat, fresh_cache)
+
+    results["tts_cold"] = measure(lambda _: tts.prefetch_voices(texts, backend=backend), args.repeat, fresh_cache)
+    # The last cold run left a warm cache behind; these runs are pure index hits
+    results["tts_warm"] = measure(lambda: tts.prefetch_voices(texts, backend=backend), args.repeat)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        blueprint = blueprint_gen.create_blueprint(script, STYLE)
+    renderer = Renderer(output_file=os.path.join(workdir, f"bench_{name}.py"), quality="-ql",
+                        max_workers=args.render_workers)
+    results["codegen"] = measure(lambda: renderer.write_manim_code(blueprint, per_scene=True), args.repeat)
+
+    results["render"] = bench_render(name, blueprint, args, workdir)
+
+    for stage in results.values():
+        if "median_s" in stage and stage["median_s"] > 0:
+            # The render stage only covers its rendered subset
+            stage["scenes_per_s"] = round(stage.get("scenes_rendered", n_scenes) / stage["median_s"], 1)
+    return {"scenes": n_scenes, "stages": results}
+
+def bench_render(name: str, blueprint: dict, args, workdir: str) -> dict:
+    """
+    Renders the first RENDER_SCENES[name] scenes (or --render-scenes for
+    every size) at -ql without the render cache, so longer corpora render
+    proportionally more. Skipped when manim is not installed.
+    """
+    count = RENDER_SCENES[name] if args.render_scenes is None else args.render_scenes
+    if count == 0:
+        return {"skipped": "disabled with --render-scenes 0"}
+    if importlib.util.find_spec("manim") is None:
+        return {"skipped": "manim not installed"}
+
+    subset = dict(blueprint, scenes=blueprint["scenes"][:count])
+    renderer = Renderer(output_file=os.path.join(workdir, f"render_{name}.py"), quality="-ql",
+                        max_workers=args.render_workers)
+    outputs = []
+    result = measure(lambda: outputs.append(renderer.render_parallel(subset)), 1)
+    if not outputs[0]:
+        return {"skipped": "render failed"}
+    result["scenes_rendered"] = len(subset["scenes"])
+    return result
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta: float) -> list:
+    """
+    Prints each stage against the baseline and returns the regressions,
+    i.e. stages whose median time grew by more than threshold and by at
+    least min_delta seconds (sub-millisecond stages are mostly noise).
+    """
+    regressions = []
+    machine = [baseline.get("meta", {}).get(key) for key in ("platform", "cpus")]
+    if machine != [results["meta"][key] for key in ("platform", "cpus")]:
+        print(f"Warning: the baseline was recorded on another machine ({machine[0]}, {machine[1]} CPUs); "
+              "timings do not carry across hardware")
+    print(f"\n{'size':<8} {'stage':<10} {'baseline':>10} {'current':>10} {'change':>8}")
+    for size, entry in results["sizes"].items():
+        for stage, current in entry["stages"].items():
+            base = baseline.get("sizes", {}).get(size, {}).get("stages", {}).get(stage, {})
+            if "median_s" not in current:
+                continue
+            if "median_s" not in base or base["median_s"] == 0:
+                # e.g. render, when the baseline was recorded without manim
+                print(f"{size:<8} {stage:<10} {'-':>10} {current['median_s']:>10.4f} {'new':>8}")
+                continue
+            change = current["median_s"] / base["median_s"] - 1
+            regressed = change > threshold and current["median_s"] - base["median_s"] >= min_delta
+            flag = " !" if regressed else ""
+            print(f"{size:<8} {stage:<10} {base['median_s']:>10.4f} {current['median_s']:>10.4f} {change:>+7.1%}{flag}")
+            if regressed:
+                regressions.append(f"{size}/{stage}: {change:+.1%}")
+    return regressions
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError, OSError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each pipeline stage on a synthetic corpus")
+    parser.add_argument("--sizes", nargs="+", choices=sorted(CORPUS), default=list(CORPUS))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the median is reported")
+    parser.add_argument("--tts-latency", type=float, default=0.0, help="Simulated per-line TTS latency in seconds")
+    parser.add_argument("--render-scenes", type=int, default=None,
+                        help=f"Scenes rendered with manim for every size (default: {RENDER_SCENES}; 0 to skip)")
+    parser.add_argument("--render-workers", type=int, default=None)
+    parser.add_argument("--output", type=str, default=None, help="Result file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Also store the results as the baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, default=None, metavar="BASELINE",
+                        help="Compare against a baseline file (default: benchmarks/baseline.json)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown that counts as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="Ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "tts_latency": args.tts_latency,
+        },
+        "sizes": {},
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # Renderer and TTS write relative to the working directory
+        os.chdir(workdir)
+        try:
+            for size in args.sizes:
+                print(f"Benchmarking {size} ({CORPUS[size]} scenes)...")
+                results["sizes"][size] = bench_size(size, CORPUS[size], args, workdir)
+        finally:
+            os.chdir(cwd)
+
+    print(f"\n{'size':<8} {'stage':<10} {'median_s':>10} {'scenes/s':>10}")
+    for size, entry in results["sizes"].items():
+        for stage, r in entry["stages"].items():
+            if "skipped" in r:
+                print(f"{size:<8} {stage:<10} {'skipped: ' + r['skipped']:>21}")
+            else:
+                print(f"{size:<8} {stage:<10} {r['median_s']:>10.4f} {r.get('scenes_per_s', 0):>10.1f}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    paths = [output] + ([BASELINE_PATH] if args.save_baseline else [])
+    for path in paths:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {path}")
+
+    if args.compare:
+        if not os.path.exists(args.compare):
+            print(f"No baseline at {args.compare}; record one with --save-baseline")
+            sys.exit(2)
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_delta)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Script generation throughput against the local stand-in server.
+For each concurrency limit, a cold batch of topics is requested through
+HTTPBackend, then the same batch again from the warm response cache.
+
+Run from visual_pattern/:
+    python -m benchmarks.script_bench
+    python -m benchmarks.script_bench --topics 200 --latency 0.5 --concurrency 1 8 32
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from pipeline.script_cache import ScriptCache
+from pipeline.script_gen import HTTPBackend, ScriptGenerator
+from pipeline.script_server import serve
+
+def run_batch(gen: ScriptGenerator, topics: list) -> tuple[float, int]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        scripts = gen.generate_scripts(topics)
+        return time.perf_counter() - start, len(scripts)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched script generation")
+    parser.add_argument("--topics", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds the stand-in server takes per request")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    server = serve(latency=args.latency)
+    url = f"http://127.0.0.1:{server.server_port}/generate"
+    topics = [f"Benchmark topic {i}" for i in range(args.topics)]
+    print(f"{args.topics} topics, {args.latency}s per request "
+          f"(sequential bound {args.topics * args.latency:.1f}s)")
+    print(f"{'limit':>6} {'cold_s':>8} {'ideal_s':>8} {'peak':>5} {'warm_s':>8} {'requests':>9}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for limit in args.concurrency:
+            cache = ScriptCache(os.path.join(workdir, f"scripts_{limit}"))
+            gen = ScriptGenerator(HTTPBackend(url=url, max_concurrency=limit), cache=cache)
+            server.requests = server.peak_in_flight = 0
+
+            cold_s, done = run_batch(gen, topics)
+            cold_requests, peak = server.requests, server.peak_in_flight
+            warm_s, _ = run_batch(gen, topics)
+            ideal_s = -(-args.topics // limit) * args.latency
+            print(f"{limit:>6} {cold_s:>8.2f} {ideal_s:>8.2f} {peak:>5} {warm_s:>8.4f} "
+                  f"{cold_requests:>4}+{server.requests - cold_requests:<4}")
+            if done != args.topics:
+                print(f"  only {done}/{args.topics} scripts succeeded")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
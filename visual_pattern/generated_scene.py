@@ -5,6 +5,7 @@ import os
 # Ensure we can import from pipeline
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from pipeline.tts import generate_voice
+from pipeline.memory import release_memory
 
 class WebSocketScene(Scene):
     def construct(self):
@@ -35,6 +36,9 @@ class WebSocketScene(Scene):
             """Clears all mobjects from the scene seamlessly"""
             self.play(FadeOut(Group(*self.mobjects)), run_time=0.5)
             self.wait(0.2)
+            # Drop the finished section's mobjects and cached SVGs before the next one
+            self.clear()
+            release_memory()
 
         # -------------------------------------------------------------
         # SCENE START
@@ -1,49 +1,253 @@
 import argparse
 import json
 import os
-from pipeline.script_gen import ScriptGenerator
+import threading
+import time
+from pipeline.script_gen import HTTPBackend, MockBackend, ScriptGenerator
+from pipeline.script_cache import ScriptCache
 from pipeline.blueprint_gen import BlueprintGenerator
-from pipeline.renderer import Renderer
+from pipeline.blueprint_model import Blueprint
+from pipeline.renderer import QUALITY_DIRS, Renderer
+from pipeline.interpreter import InProcessRenderer
+from pipeline.worker import JobQueue, wait_for_job
+from pipeline.render_cache import RenderCache
+from pipeline.batch import BATCH_DIR, BatchRunner, read_topics
+from pipeline.streaming import StreamingPipeline
+from pipeline.hls import HLS_DIR, HLSPackager
+from pipeline.templates import TemplateLibrary
+from pipeline.text_cache import TEXTS_DIR, TextCache
+from pipeline.tracing import METRICS_DIR, Tracer, set_tracer
+from pipeline import tts
 
 def main():
     parser = argparse.ArgumentParser(description="Hybrid Video Generation System")
-    parser.add_argument("--topic", type=str, required=True, help="Topic for the video")
+    parser.add_argument("--topic", type=str, help="Topic for the video")
+    parser.add_argument("--batch", type=str, help="JSONL file of topics to render as a resumable batch")
+    parser.add_argument("--batch-dir", type=str, default=BATCH_DIR, help="Where batch jobs write their artifact directories")
+    parser.add_argument("--jobs", type=int, default=4, help="Concurrent batch jobs (also the script/blueprint stage limit)")
+    parser.add_argument("--tts-workers", type=int, default=4, help="Concurrent batch jobs in the TTS stage")
+    parser.add_argument("--render-workers", type=int, default=2, help="Concurrent batch jobs in the render stage")
     parser.add_argument("--style", type=str, default="default", help="Style config path (optional)")
+    parser.add_argument("--streaming", action="store_true", help="Stream scenes through script, TTS, blueprint and render stages concurrently")
+    parser.add_argument("--verbose", action="store_true", help="Print the full script and blueprint to stdout")
+    parser.add_argument("--save-blueprint", type=str, default=None, help="Also save the blueprint in compact binary form to this path")
+    parser.add_argument("--parallel", action="store_true", help="Render each scene in its own process and concatenate the segments")
+    parser.add_argument("--workers", type=int, default=None, help="Max concurrent scene renders (default: CPU count)")
+    parser.add_argument("--renderer", choices=["subprocess", "inprocess"], default="subprocess", help="Render via generated code in a manim subprocess, or build mobjects in this process")
+    parser.add_argument("--preview", action="store_true", help="Render one still per scene onto a contact sheet instead of the full video")
+    parser.add_argument("--export-code", action="store_true", help="With --renderer inprocess, also write the editable generated_scene.py")
+    parser.add_argument("--submit", action="store_true", help="Submit the blueprint to the render daemon (python -m pipeline.worker) instead of rendering here")
+    parser.add_argument("--wait", action="store_true", help="With --submit, block until the job finishes and print its artifact")
+    parser.add_argument("--quality", choices=sorted(QUALITY_DIRS), default=None, help="manim quality flag for the render (default: -ql, or -qh with --hls)")
+    parser.add_argument("--hls", nargs="?", const=HLS_DIR, default=None, metavar="DIR", help=f"Also package the render as an HLS bitrate ladder, published scene by scene (default dir: {HLS_DIR})")
+    parser.add_argument("--memory-budget-mb", type=int, default=None, help="RSS budget with per-scene peak tracking: in-process renders release memory between scenes and move to separate processes past it; manim subprocesses only run side by side while their peaks fit it and are stopped past it")
+    parser.add_argument("--no-elide-holds", action="store_true", help="Have manim encode every frame of narration holds (for ffmpeg older than 4.4)")
+    parser.add_argument("--templates", action="store_true", help="Build scenes from pre-rendered template clips plus ffmpeg text overlays (with --parallel, --streaming or --batch)")
+    parser.add_argument("--text-dir", type=str, default=TEXTS_DIR, help="Shared cache of rasterized manim texts, pre-warmed before each render")
+    parser.add_argument("--no-text-cache", action="store_true", help="Let each manim process rasterize texts itself")
+    parser.add_argument("--no-cache", action="store_true", help="Re-render every scene instead of reusing cached segments")
+    parser.add_argument("--cache-size-mb", type=int, default=2048, help="Size cap for the scene render cache")
+    parser.add_argument("--script-backend", choices=["mock", "http"], default="mock", help="Where scripts come from: the offline mock or an HTTP service")
+    parser.add_argument("--script-url", type=str, default=None, help="Endpoint for --script-backend http (default: $SCRIPT_BACKEND_URL or the local stand-in server)")
+    parser.add_argument("--script-model", type=str, default="default", help="Model name sent to the script service; part of the script cache key")
+    parser.add_argument("--script-concurrency", type=int, default=4, help="Max script requests in flight at once")
+    parser.add_argument("--no-script-cache", action="store_true", help="Request every script again instead of reusing cached responses")
+    parser.add_argument("--tts-backend", choices=sorted(tts.BACKENDS), default="gtts", help="Speech engine for narration")
+    parser.add_argument("--audio-cache-mb", type=int, default=None, help="Size budget for cached narration audio, enforced at the end of each run (default: unlimited)")
+    parser.add_argument("--metrics", type=str, default=None, help="Write per-stage timings here; .json, or .prom/.txt for OpenMetrics (default: media/metrics/run_<time>.json)")
+    parser.add_argument("--profile", action="store_true", help="Also profile the hot stages with cProfile (stats are saved next to the metrics file)")
     
     args = parser.parse_args()
-    
+    if not args.topic and not args.batch:
+        parser.error("one of --topic or --batch is required")
+    if args.submit and (args.templates or args.export_code):
+        # Daemon workers render in-process from the blueprint alone
+        parser.error("--templates and --export-code cannot be used with --submit")
+
+    metrics_path = args.metrics or os.path.join(METRICS_DIR, f"run_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    profile_dir = os.path.splitext(metrics_path)[0] + "_profile" if args.profile else None
+    tracer = set_tracer(Tracer(profile_dir=profile_dir))
+    tracer.attrs.update({"topic": args.topic, "batch": args.batch, "renderer": args.renderer,
+                         "script_backend": args.script_backend, "tts_backend": args.tts_backend, "parallel": args.parallel, "streaming": args.streaming})
+    try:
+        run(args, tracer)
+    finally:
+        if args.audio_cache_mb is not None:
+            # Between runs only; clips a render looked up are muxed much later
+            tts.get_audio_cache().evict()
+        # Failed runs are reported too; that is when the numbers matter most
+        tracer.write(metrics_path)
+
+def run(args, tracer: Tracer):
+    # Mocking the Manual Style Profile input
+    mock_style_profile = {
+        "primary_color": "BLUE",
+        "shape_style": "geometric"
+    }
+
+    tts.set_default_backend(tts.BACKENDS[args.tts_backend]())
+    if args.audio_cache_mb is not None:
+        tts.set_audio_cache(tts.AudioCache(tts.AUDIO_DIR, max_bytes=args.audio_cache_mb * 1024 * 1024))
+    cache = None if args.no_cache else RenderCache(max_bytes=args.cache_size_mb * 1024 * 1024)
+    elide_holds = not args.no_elide_holds
+    templates = TemplateLibrary() if args.templates else None
+    text_cache = None if args.no_text_cache else TextCache(args.text_dir)
+    # The ladder is encoded down from one high-quality render
+    quality = args.quality or ("-qh" if args.hls else "-ql")
+    if args.script_backend == "http":
+        script_backend = HTTPBackend(url=args.script_url, model=args.script_model, max_concurrency=args.script_concurrency)
+    else:
+        script_backend = MockBackend(max_concurrency=args.script_concurrency)
+    script_gen = ScriptGenerator(script_backend, cache=None if args.no_script_cache else ScriptCache())
+
+    if args.batch:
+        # Resumable batch mode: each topic gets its own checkpointed job directory
+        runner = BatchRunner(out_dir=args.batch_dir, style_profile=mock_style_profile, jobs=args.jobs,
+                             tts_workers=args.tts_workers, render_workers=args.render_workers,
+                             render_cache=cache, templates=templates, script_gen=script_gen,
+                             text_cache=text_cache, elide_holds=elide_holds, quality=quality,
+                             renderer=args.renderer, memory_budget_mb=args.memory_budget_mb)
+        with tracer.stage("batch"):
+            runner.run(read_topics(args.batch))
+        return
+
     print(f"Starting Video Generation for Topic: {args.topic}")
+
+    if args.streaming:
+        # Scenes flow through all stages at once; the first segment is ready early
+        if args.renderer == "inprocess":
+            renderer = InProcessRenderer(quality=quality, cache=cache, elide_holds=elide_holds, text_cache=text_cache,
+                                         memory_budget_mb=args.memory_budget_mb)
+            render_workers = 1
+        else:
+            renderer = Renderer(quality=quality, cache=cache, elide_holds=elide_holds, templates=templates,
+                                text_cache=text_cache, memory_budget_mb=args.memory_budget_mb)
+            render_workers = args.workers or os.cpu_count() or 1
+        packager = hls_packager(args.hls, renderer) if args.hls else None
+        pipeline = StreamingPipeline(renderer, script_gen=script_gen, render_workers=render_workers, packager=packager)
+        with tracer.stage("streaming"):
+            pipeline.run(args.topic, style_profile=mock_style_profile)
+        print("Pipeline Finished.")
+        return
     
     # 1. Generate Script
-    script_gen = ScriptGenerator()
-    script = script_gen.generate_script(args.topic)
-    print("Script Generated:")
-    print(json.dumps(script, indent=2))
+    with tracer.stage("script"):
+        script = script_gen.generate_script(args.topic)
+    print("Script Generated.")
+    if args.verbose:
+        print(json.dumps(script, indent=2))
     
     # save debug
     with open("debug_script.json", "w") as f:
         json.dump(script, f, indent=2)
 
     # 2. Generate Blueprint
-    # Mocking the Manual Style Profile input
-    mock_style_profile = {
-        "primary_color": "BLUE",
-        "shape_style": "geometric"
-    }
-    
+    # Scene timings come from cached narration or a fast estimate
     blueprint_gen = BlueprintGenerator()
-    blueprint = blueprint_gen.create_blueprint(script, style_profile=mock_style_profile)
-    print("\nBlueprint Generated:")
-    print(json.dumps(blueprint, indent=2))
+    # Validated once here; a malformed blueprint fails before any rendering.
+    # The typed model is passed on from here, so nothing re-validates it.
+    with tracer.stage("blueprint", scenes=len(script["scenes"])):
+        model = Blueprint.from_dict(blueprint_gen.create_blueprint(script, style_profile=mock_style_profile))
+    print(f"Blueprint Generated: {len(model.scenes)} scenes.")
+    if args.verbose:
+        print(model.to_json(indent=2))
 
     with open("debug_blueprint.json", "w") as f:
-        json.dump(blueprint, f, indent=2)
+        f.write(model.to_json(indent=2))
+
+    if args.preview:
+        # Layout review only: stills need no narration, so TTS is skipped
+        if args.renderer == "inprocess":
+            renderer = InProcessRenderer(text_cache=text_cache)
+        else:
+            renderer = Renderer(max_workers=args.workers, text_cache=text_cache)
+        with tracer.stage("preview", scenes=len(model.scenes)):
+            renderer.render_preview(model)
+        print("Pipeline Finished.")
+        return
 
-    # 3. Render
-    renderer = Renderer()
-    renderer.render(blueprint)
+    # 3. Prefetch narration audio concurrently so rendering never waits on TTS.
+    # In parallel mode rendering starts from the estimated timings meanwhile.
+    def prefetch_audio(texts):
+        with tracer.span("tts", lines=len(texts)):
+            tts.prefetch_voices(texts)
+
+    prefetch = threading.Thread(target=prefetch_audio, args=(tts.narration_texts(model.to_dict()),))
+    prefetch.start()
+    # The ladder is published as it renders, so it needs final timings up front
+    if not args.parallel or args.submit or args.hls:
+        prefetch.join()
+        with tracer.stage("reconcile"):
+            blueprint_gen.reconcile_durations(model)
+
+    if args.submit:
+        # Client mode: a warm worker renders the job
+        queue = JobQueue()
+        options = {
+            "quality": quality,
+            "elide_holds": elide_holds,
+            "cache": not args.no_cache,
+            # Workers may run from another directory
+            "hls": os.path.abspath(args.hls) if args.hls else None,
+            "memory_budget_mb": args.memory_budget_mb,
+        }
+        job_id = queue.submit(model.to_dict(), options)
+        print(f"Submitted render job {job_id}")
+        if args.wait:
+            status = wait_for_job(queue, job_id)
+            print(f"Job {job_id} {status['status']}: {status['output'] or status['error']}")
+        return
+
+    # 4. Render
+    if args.renderer == "inprocess":
+        renderer = InProcessRenderer(quality=quality, cache=cache, export_code=args.export_code,
+                                     elide_holds=elide_holds, text_cache=text_cache,
+                                     memory_budget_mb=args.memory_budget_mb)
+    else:
+        renderer = Renderer(quality=quality, max_workers=args.workers, cache=cache, elide_holds=elide_holds,
+                            templates=templates, text_cache=text_cache, memory_budget_mb=args.memory_budget_mb)
+    if args.hls:
+        # Per-scene rendering, so each scene is packaged as soon as it finishes
+        packager = hls_packager(args.hls, renderer)
+        for index, scene in enumerate(model.scenes):
+            packager.plan(index, scene.to_dict())
+        with tracer.stage("render", scenes=len(model.scenes)):
+            rendered = renderer.render_segments(model, on_segment=packager.add)
+        # Packaging still reads the segments, and assembly releases their cache pins
+        with tracer.stage("hls"):
+            packager.finish(len(model.scenes))
+        with tracer.stage("assemble", segments=len(rendered)):
+            renderer.assemble(model, rendered)
+    elif args.parallel or args.memory_budget_mb:
+        # A single manim process would hold every scene's state until the end.
+        # Segments only, so narration is read and muxed once, after reconcile.
+        with tracer.stage("render", scenes=len(model.scenes)):
+            rendered = renderer.render_segments(model)
+        prefetch.join()
+        # 5. Reconcile: only scenes whose real narration length drifted
+        # past the tolerance miss the render cache and re-render
+        with tracer.stage("reconcile"):
+            changed = blueprint_gen.reconcile_durations(model)
+        if changed:
+            # Segments of unchanged scenes are reused, with or without the render cache
+            reuse = {index: segment for index, segment in rendered.items() if index not in changed}
+            with tracer.stage("rerender", scenes=len(changed)):
+                rendered = renderer.render_segments(model, reuse=reuse)
+        with tracer.stage("assemble", segments=len(rendered)):
+            renderer.assemble(model, rendered)
+    else:
+        with tracer.stage("render", scenes=len(model.scenes)):
+            renderer.render(model)
+
+    with open("debug_blueprint.json", "w") as f:
+        f.write(model.to_json(indent=2))
+    if args.save_blueprint:
+        model.save(args.save_blueprint)
     
     print("Pipeline Finished.")
 
+def hls_packager(out_dir: str, renderer: Renderer) -> HLSPackager:
+    return HLSPackager(out_dir, source_height=renderer._frame_height(), fps=renderer._frame_rate())
+
 if __name__ == "__main__":
     main()
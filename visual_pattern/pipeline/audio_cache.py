@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class AudioCache:
+    """
+    SQLite index over synthesized narration clips.
+    Keys are full-width hashes of (text, backend, lang, voice) and every
+    row stores the clip's duration, so a hit is answered from the index
+    alone without opening the audio file. WAL mode plus a busy timeout let
+    several render workers share one cache safely. When max_bytes is set,
+    evict() trims the least recently accessed clips. Inserts never evict:
+    a render muxes the clips it looked up long after the lookup, so the
+    cache is only trimmed between runs.
+    """
+
+    def __init__(self, audio_dir="media/audio", max_bytes=None):
+        self.audio_dir = audio_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(audio_dir, "index.sqlite")
+        self._local = threading.local()
+        os.makedirs(audio_dir, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS clips ("
+                " key TEXT PRIMARY KEY,"
+                " path TEXT NOT NULL,"
+                " duration REAL NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS clips_accessed ON clips (accessed)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite connections must not cross threads or forked processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.index_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def key(text: str, backend: str, lang: str, voice: str) -> str:
+        payload = json.dumps([text, backend, lang, voice], separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def path_for(self, key: str, filename_prefix: str, extension: str) -> str:
+        return os.path.join(self.audio_dir, f"{filename_prefix}_{key}.{extension}")
+
+    def lookup(self, key: str) -> tuple[str, float]:
+        """
+        Returns (file_path, duration) for a cached clip, or None on a miss.
+        """
+        with self._conn() as conn:
+            row = conn.execute("SELECT path, duration FROM clips WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE clips SET accessed = ? WHERE key = ?", (time.time(), key))
+        return row[0], row[1]
+
+    def lookup_many(self, keys: list) -> dict:
+        """
+        Batch form of lookup(): one query for many keys.
+        Returns {key: (file_path, duration)} for the keys that hit.
+        """
+        hits = {}
+        unique = list(dict.fromkeys(keys))
+        with self._conn() as conn:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                for key, path, duration in conn.execute(
+                        f"SELECT key, path, duration FROM clips WHERE key IN ({marks})", chunk):
+                    hits[key] = (path, duration)
+            now = time.time()
+            conn.executemany("UPDATE clips SET accessed = ? WHERE key = ?", [(now, key) for key in hits])
+        return hits
+
+    def store(self, key: str, file_path: str, duration: float):
+        now = time.time()
+        size = os.path.getsize(file_path)
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO clips (key, path, duration, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, file_path, duration, size, now, now)
+            )
+
+    def evict(self, keep: str = None):
+        """
+        Deletes least recently accessed clips until the cache fits max_bytes.
+        The clip named by keep is never evicted. Call it only when no render
+        in this process still has to mux clips it looked up.
+        """
+        if self.max_bytes is None:
+            return
+        with self._conn() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM clips").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            rows = conn.execute(
+                "SELECT key, path, size FROM clips WHERE key IS NOT ? ORDER BY accessed", (keep,)
+            )
+            for key, path, size in rows:
+                if total <= self.max_bytes:
+                    break
+                victims.append((key, path))
+                total -= size
+            conn.executemany("DELETE FROM clips WHERE key = ?", [(key,) for key, _ in victims])
+
+        # Remove files only after the rows are gone so no reader is handed a missing path
+        for _, path in victims:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
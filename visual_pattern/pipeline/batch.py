@@ -0,0 +1,207 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import tts
+from pipeline.blueprint_gen import BlueprintGenerator
+from pipeline.blueprint_model import Blueprint
+from pipeline.interpreter import InProcessRenderer
+from pipeline.memory import MemoryBudget
+from pipeline.renderer import Renderer
+from pipeline.script_gen import ScriptGenerator
+from pipeline.tracing import get_tracer
+
+BATCH_DIR = "media/batch"
+STAGES = ("script", "blueprint", "tts", "render")
+
+def read_topics(path: str) -> list:
+    """
+    Reads a JSONL file of jobs. Each line is either {"topic": ..., "id": ...}
+    (id optional) or a bare JSON string topic.
+    """
+    jobs = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"topic": record}
+            jobs.append(record)
+    return jobs
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")[:40] or "job"
+
+def _write_json(path: str, data):
+    # Write-then-rename so a crash never leaves a half-written checkpoint
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _write_blueprint(path: str, blueprint: Blueprint):
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    blueprint.save(tmp_path)
+    os.replace(tmp_path, path)
+
+def _read_json(path: str):
+    with open(path) as f:
+        return json.load(f)
+
+class BatchRunner:
+    """
+    Runs many topics through script -> blueprint -> tts -> render.
+    Every job gets its own artifact directory with a state.json that
+    records completed stages, so a restarted batch resumes each job from
+    its last checkpoint instead of starting over. Each stage has its own
+    concurrency limit.
+    """
+
+    def __init__(self, out_dir=BATCH_DIR, style_profile=None, jobs=4,
+                 tts_workers=4, render_workers=2, render_cache=None, templates=None, script_gen=None,
+                 text_cache=None, elide_holds=True, quality="-ql", renderer="subprocess",
+                 memory_budget_mb=None):
+        self.out_dir = out_dir
+        self.style_profile = style_profile
+        self.jobs = jobs
+        self.render_cache = render_cache # None renders every scene (--no-cache)
+        self.templates = templates # Shared TemplateLibrary; recurring visuals skip manim
+        self.text_cache = text_cache # Shared TextCache; jobs never rasterize the same text twice
+        self.elide_holds = elide_holds # False for ffmpeg older than 4.4 (--no-elide-holds)
+        self.quality = quality
+        self.renderer = renderer # "subprocess" (manim CLI) or "inprocess" (InProcessRenderer)
+        self.memory_budget_mb = memory_budget_mb
+        # One budget shared by every job's manim processes, not one per job
+        self._memory = MemoryBudget(memory_budget_mb) if memory_budget_mb else None
+        self.script_gen = script_gen or ScriptGenerator()
+        self._prefetched = {}
+        self.blueprint_gen = BlueprintGenerator()
+        self.limits = {
+            "script": threading.BoundedSemaphore(jobs),
+            "blueprint": threading.BoundedSemaphore(jobs),
+            "tts": threading.BoundedSemaphore(tts_workers),
+            # manim's config is process-global, so in-process renders take turns
+            "render": threading.BoundedSemaphore(1 if renderer == "inprocess" else render_workers),
+        }
+
+    def job_dir(self, index: int, record: dict) -> str:
+        name = record.get("id") or f"{index:05d}_{slugify(record['topic'])}"
+        return os.path.join(self.out_dir, str(name))
+
+    def run(self, records: list) -> dict:
+        """
+        Runs all jobs and returns (and writes) a summary.
+        """
+        os.makedirs(self.out_dir, exist_ok=True)
+        start = time.time()
+        print(f"Running batch of {len(records)} topics with {self.jobs} concurrent jobs...")
+        self.prefetch_scripts(records)
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            results = list(pool.map(lambda item: self.run_job(*item), enumerate(records)))
+
+        summary = {
+            "total": len(results),
+            "done": sum(1 for r in results if r["status"] == "done"),
+            "failed": [r for r in results if r["status"] != "done"],
+            "resumed": sum(1 for r in results if r["resumed_from"]),
+            "elapsed_seconds": round(time.time() - start, 2),
+        }
+        _write_json(os.path.join(self.out_dir, "summary.json"), summary)
+        print(f"Batch finished: {summary['done']}/{summary['total']} done, "
+              f"{len(summary['failed'])} failed, {summary['resumed']} resumed, "
+              f"{summary['elapsed_seconds']}s")
+        return summary
+
+    def prefetch_scripts(self, records: list):
+        """
+        Requests every script the batch still needs in one concurrent batch,
+        ahead of the jobs. Each job's script stage then reads its script
+        back instead of waiting on its own round-trip. Topics that fail here
+        are retried, and reported, by their job.
+        """
+        topics = []
+        for index, record in enumerate(records):
+            state_path = os.path.join(self.job_dir(index, record), "state.json")
+            if not os.path.exists(state_path) or "script" not in _read_json(state_path)["completed"]:
+                topics.append(record["topic"])
+        if not topics:
+            return
+        with get_tracer().span("batch.script_prefetch", topics=len(topics)):
+            self._prefetched = self.script_gen.generate_scripts(topics)
+
+    def run_job(self, index: int, record: dict) -> dict:
+        job_dir = self.job_dir(index, record)
+        os.makedirs(job_dir, exist_ok=True)
+        state_path = os.path.join(job_dir, "state.json")
+        state = _read_json(state_path) if os.path.exists(state_path) else {"topic": record["topic"], "completed": []}
+        resumed_from = state["completed"][-1] if state["completed"] else None
+
+        for stage in STAGES:
+            if stage in state["completed"]:
+                continue
+            try:
+                with self.limits[stage], get_tracer().span(f"batch.{stage}", job=os.path.basename(job_dir)):
+                    getattr(self, f"_stage_{stage}")(record, job_dir)
+            except Exception as e:
+                state["error"] = f"{stage}: {e}"
+                _write_json(state_path, state)
+                print(f"[{os.path.basename(job_dir)}] {stage} failed: {e}")
+                return {"job": job_dir, "status": "failed", "stage": stage, "error": str(e), "resumed_from": resumed_from}
+            state["completed"].append(stage)
+            state.pop("error", None)
+            _write_json(state_path, state)
+
+        return {"job": job_dir, "status": "done", "resumed_from": resumed_from}
+
+    def _stage_script(self, record: dict, job_dir: str):
+        script = self._prefetched.get(record["topic"]) or self.script_gen.generate_script(record["topic"])
+        _write_json(os.path.join(job_dir, "script.json"), script)
+
+    def _stage_blueprint(self, record: dict, job_dir: str):
+        script = _read_json(os.path.join(job_dir, "script.json"))
+        blueprint = self.blueprint_gen.create_blueprint(script, style_profile=self.style_profile)
+        _write_blueprint(os.path.join(job_dir, "blueprint.bin"), Blueprint.from_dict(blueprint))
+
+    def _stage_tts(self, record: dict, job_dir: str):
+        blueprint_path = os.path.join(job_dir, "blueprint.bin")
+        blueprint = Blueprint.load(blueprint_path)
+        texts = tts.narration_texts(blueprint.to_dict())
+        clips = tts.prefetch_voices(texts)
+        if len(clips) < len(texts):
+            raise RuntimeError("some narration lines failed to synthesize")
+        # Updates the typed blueprint in place; it is written back without re-validating
+        self.blueprint_gen.reconcile_durations(blueprint)
+        _write_blueprint(blueprint_path, blueprint)
+        _write_json(os.path.join(job_dir, "tts.json"), {text: {"path": path, "duration": duration}
+                                                        for text, (path, duration) in clips.items()})
+
+    def _stage_render(self, record: dict, job_dir: str):
+        blueprint = Blueprint.load(os.path.join(job_dir, "blueprint.bin"))
+        renderer = self.renderer_for(job_dir)
+        video_path = os.path.join(job_dir, "video.mp4")
+        if renderer.render_parallel(blueprint, output_path=video_path) != video_path:
+            raise RuntimeError("render did not produce a narrated video")
+
+    def renderer_for(self, job_dir: str) -> Renderer:
+        """
+        Builds the renderer for one job with the batch's render settings.
+        """
+        # A per-job module name keeps concurrent renders out of each other's video dirs
+        output_file = os.path.join(job_dir, f"job_{os.path.basename(job_dir)}.py")
+        if self.renderer == "inprocess":
+            renderer = InProcessRenderer(output_file=output_file, quality=self.quality, cache=self.render_cache,
+                                         elide_holds=self.elide_holds, text_cache=self.text_cache,
+                                         memory_budget_mb=self.memory_budget_mb)
+        else:
+            renderer = Renderer(output_file=output_file, quality=self.quality, max_workers=1,
+                                cache=self.render_cache, elide_holds=self.elide_holds, templates=self.templates,
+                                text_cache=self.text_cache, memory_budget_mb=self.memory_budget_mb)
+        if self._memory:
+            renderer._memory = self._memory
+        return renderer
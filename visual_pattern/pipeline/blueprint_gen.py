@@ -1,8 +1,39 @@
 import json
+import operator
+
+from pipeline import tts
+from pipeline.blueprint_model import Blueprint
+from pipeline.layout import is_laid_out, layout_graph
+from pipeline.visual_rules import default_engine
+
+DEFAULT_SCENE_DURATION = 4.0 # Used when a scene has no narration
+MIN_SCENE_DURATION = 1.0
+NARRATION_PADDING = 0.5 # Breathing room after the last word
 
 class BlueprintGenerator:
-    def __init__(self):
-        pass
+    def __init__(self, tts_backend=None, lang="en", rules=None):
+        self.tts_backend = tts_backend
+        self.lang = lang
+        self.rules = rules or default_engine()
+
+    def narration_timing(self, text: str, cached=False) -> tuple[float, str]:
+        """
+        Returns (seconds, source) for a narration line. Uses the real clip
+        length when it is already in the TTS cache, otherwise a text-based
+        estimate so planning never waits on synthesis. Pass the result of a
+        batch lookup as cached to skip the per-line cache query.
+        """
+        if not text:
+            return DEFAULT_SCENE_DURATION, "default"
+        if cached is False:
+            cached = tts.lookup_voice(text, lang=self.lang, backend=self.tts_backend)
+        if cached is not None:
+            return cached[1], "audio"
+        return tts.estimate_duration(text), "estimate"
+
+    @staticmethod
+    def scene_duration(narration_seconds: float) -> float:
+        return round(max(narration_seconds + NARRATION_PADDING, MIN_SCENE_DURATION), 2)
 
     def create_blueprint(self, script: dict, style_profile: dict = None) -> dict:
         """
@@ -11,14 +42,7 @@ class BlueprintGenerator:
         """
         print("Generating animation blueprint...")
         
-        # Default style if none provided
-        style = {
-            "primary_color": "WHITE",
-            "background_color": "BLACK", 
-            "shape_style": "geometric" 
-        }
-        if style_profile:
-            style.update(style_profile)
+        style = self.resolve_style(style_profile)
 
         blueprint = {
             "title": script.get("title", "Untitled"),
@@ -26,63 +50,115 @@ class BlueprintGenerator:
             "scenes": []
         }
         
+        timings = self._lookup_timings([script])
         for scene in script["scenes"]:
-            bp_scene = {
-                "id": scene["id"],
-                "narration": scene["text"],
-                "duration": 4.0, # Default duration
-                "visuals": []
-            }
-            
-            concept = scene["visual_concept"].lower()
-            
-            # Simple keyword matching to determine visuals (Prototype Logic)
-            if "title" in concept:
-                bp_scene["visuals"].append({
-                    "type": "text",
-                    "content": scene["text"],
-                    "position": "center",
-                    "scale": 0.8
-                })
-            elif "flowchart" in concept or "connect" in concept:
-                bp_scene["visuals"].append({
-                    "type": "rectangle",
-                    "position": "left",
-                    "color": style["primary_color"] 
-                })
-                bp_scene["visuals"].append({
-                    "type": "rectangle",
-                    "position": "right",
-                    "color": "GREEN"
-                })
-                bp_scene["visuals"].append({
-                    "type": "arrow",
-                    "start": "left",
-                    "end": "right"
-                })
-            elif "mesh" in concept or "complex" in concept:
-                 bp_scene["visuals"].append({
-                    "type": "grid",
-                    "rows": 3,
-                    "cols": 3
-                })
-            else:
-                # Default fallback
-                bp_scene["visuals"].append({
-                    "type": "text",
-                    "content": scene["text"],
-                    "position": "bottom",
-                    "scale": 0.6
-                })
-                bp_scene["visuals"].append({
-                    "type": "circle",
-                    "color": "RED" if style["shape_style"] == "geometric" else "ORANGE" 
-                })
-
-            blueprint["scenes"].append(bp_scene)
+            blueprint["scenes"].append(self.create_scene(scene, style, timings.get(scene["text"])))
             
         return blueprint
 
+    def create_blueprints(self, scripts: list, style_profile: dict = None) -> list:
+        """
+        Batch form of create_blueprint(). Narration timings for every
+        scene are fetched from the TTS cache in one query.
+        """
+        print(f"Generating {len(scripts)} animation blueprints...")
+        style = self.resolve_style(style_profile)
+        timings = self._lookup_timings(scripts)
+        blueprints = []
+        for script in scripts:
+            blueprints.append({
+                "title": script.get("title", "Untitled"),
+                "style_settings": dict(style),
+                "scenes": [self.create_scene(scene, style, timings.get(scene["text"]))
+                           for scene in script["scenes"]]
+            })
+        return blueprints
+
+    def _lookup_timings(self, scripts: list) -> dict:
+        texts = [scene["text"] for script in scripts for scene in script["scenes"] if scene["text"]]
+        return tts.lookup_voices(texts, lang=self.lang, backend=self.tts_backend)
+
+    @staticmethod
+    def resolve_style(style_profile: dict = None) -> dict:
+        # Default style if none provided
+        style = {
+            "primary_color": "WHITE",
+            "background_color": "BLACK", 
+            "shape_style": "geometric" 
+        }
+        if style_profile:
+            style.update(style_profile)
+        return style
+
+    def create_scene(self, scene: dict, style: dict, cached=False) -> dict:
+        """
+        Converts a single script scene into a blueprint scene.
+        cached is an optional pre-fetched TTS cache entry (or None for a miss).
+        A scene with a "diagram" ({"nodes", "edges", "layout"}) is drawn as
+        that graph instead of the rule table's visuals.
+        """
+        seconds, source = self.narration_timing(scene["text"], cached)
+        if scene.get("diagram"):
+            visuals = [self.diagram_visual(scene["diagram"], style)]
+        else:
+            # Visuals come from the declarative rule table (see visual_rules.json)
+            visuals = self.rules.build_visuals(scene["visual_concept"], scene["text"], style)
+        bp_scene = {
+            "id": scene["id"],
+            "narration": scene["text"],
+            "duration": self.scene_duration(seconds) if source != "default" else seconds,
+            "duration_source": source,
+            # Graphs get absolute positions here, so renderers never lay anything out
+            "visuals": [layout_graph(v) if v["type"] == "graph" and not is_laid_out(v) else v
+                        for v in visuals]
+        }
+        return bp_scene
+
+    @staticmethod
+    def diagram_visual(diagram: dict, style: dict) -> dict:
+        return {
+            "type": "graph",
+            "layout": diagram.get("layout", "layered"),
+            "color": style.get("primary_color", "WHITE"),
+            "nodes": diagram["nodes"],
+            "edges": diagram.get("edges", []),
+        }
+
+    def reconcile_durations(self, blueprint, tolerance: float = 0.3) -> list:
+        """
+        Replaces estimated timings with real narration lengths once the audio
+        exists. A scene's duration only changes when the real length differs
+        from the estimate by more than tolerance seconds, so scenes already
+        rendered from a close estimate stay valid.
+        Takes a typed Blueprint or a blueprint dict and updates it in place.
+        Returns the indices of scenes whose duration changed.
+        """
+        # Typed scenes are updated through attributes, dicts through keys,
+        # so a validated Blueprint never has to be rebuilt
+        if isinstance(blueprint, Blueprint):
+            scenes, get, put = blueprint.scenes, getattr, setattr
+        else:
+            scenes, get, put = blueprint["scenes"], lambda s, k: s.get(k), operator.setitem
+
+        changed = []
+        pending = [get(scene, "narration") for scene in scenes if get(scene, "duration_source") == "estimate"]
+        clips = tts.lookup_voices(pending, lang=self.lang, backend=self.tts_backend)
+        for i, scene in enumerate(scenes):
+            if get(scene, "duration_source") != "estimate":
+                continue
+            cached = clips.get(get(scene, "narration"))
+            if cached is None:
+                continue
+            put(scene, "duration_source", "audio")
+            real = self.scene_duration(cached[1])
+            if abs(real - get(scene, "duration")) > tolerance:
+                put(scene, "duration", real)
+                changed.append(i)
+
+        if changed:
+            print(f"Reconciled timing: {len(changed)} scene(s) changed beyond {tolerance}s tolerance")
+        return changed
+
 if __name__ == "__main__":
     # Test
     script_mock = {
@@ -0,0 +1,215 @@
+import json
+import zlib
+from dataclasses import dataclass, field, fields
+
+try:
+    import msgpack
+except ImportError: # Optional: falls back to compressed compact JSON
+    msgpack = None
+
+# Binary format headers; the trailing byte is the format version
+MAGIC_MSGPACK = b"BPK\x01"
+MAGIC_JSON = b"BPJ\x01"
+
+VISUAL_TYPES = {"text", "rectangle", "circle", "arrow", "grid", "graph"}
+POSITIONS = {"center", "bottom", "left", "right"}
+
+class BlueprintError(ValueError):
+    """Raised when a blueprint does not match the schema."""
+
+@dataclass(slots=True)
+class Visual:
+    type: str
+    content: str = None
+    position: str = None
+    scale: float = None
+    color: str = None
+    start: str = None
+    end: str = None
+    rows: int = None
+    cols: int = None
+    layout: str = None
+    nodes: list = None
+    edges: list = None
+    node_width: float = None
+    node_height: float = None
+    font_size: int = None
+    extra: dict = field(default_factory=dict) # Keys this model does not know yet
+
+    @classmethod
+    def from_dict(cls, data: dict, path: str = "visual") -> "Visual":
+        if not isinstance(data, dict):
+            raise BlueprintError(f"{path}: expected an object")
+        v_type = data.get("type")
+        if v_type not in VISUAL_TYPES:
+            raise BlueprintError(f"{path}.type: unknown visual type {v_type!r}")
+        if v_type == "text" and not isinstance(data.get("content"), str):
+            raise BlueprintError(f"{path}.content: text visuals need string content")
+        if data.get("position") is not None and data["position"] not in POSITIONS:
+            raise BlueprintError(f"{path}.position: unknown position {data['position']!r}")
+        if v_type == "graph":
+            _check_graph(data, path)
+        for key in ("scale", "rows", "cols", "node_width", "node_height", "font_size"):
+            if data.get(key) is not None and not isinstance(data[key], (int, float)):
+                raise BlueprintError(f"{path}.{key}: expected a number")
+
+        known = {f.name for f in fields(cls)} - {"extra"}
+        return cls(
+            **{k: v for k, v in data.items() if k in known},
+            extra={k: v for k, v in data.items() if k not in known},
+        )
+
+    def to_dict(self) -> dict:
+        out = {"type": self.type}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if f.name not in ("type", "extra") and value is not None:
+                out[f.name] = value
+        out.update(self.extra)
+        return out
+
+def _check_graph(data: dict, path: str):
+    """
+    Graph visuals must arrive laid out (see pipeline.layout), so the
+    renderers only ever read positions.
+    """
+    nodes = data.get("nodes")
+    if not isinstance(nodes, list):
+        raise BlueprintError(f"{path}.nodes: expected a list")
+    ids = set()
+    for k, node in enumerate(nodes):
+        if not isinstance(node, dict) or "id" not in node:
+            raise BlueprintError(f"{path}.nodes[{k}]: expected an object with an id")
+        if node["id"] in ids:
+            raise BlueprintError(f"{path}.nodes[{k}].id: duplicate node id {node['id']!r}")
+        ids.add(node["id"])
+        if not all(isinstance(node.get(axis), (int, float)) for axis in ("x", "y")):
+            raise BlueprintError(f"{path}.nodes[{k}]: missing x/y; lay the graph out with pipeline.layout.layout_graph")
+    if "node_width" not in data or "node_height" not in data:
+        raise BlueprintError(f"{path}: missing node size; lay the graph out with pipeline.layout.layout_graph")
+    edges = data.get("edges", [])
+    if not isinstance(edges, list):
+        raise BlueprintError(f"{path}.edges: expected a list")
+    for k, edge in enumerate(edges):
+        if not isinstance(edge, dict) or edge.get("from") not in ids or edge.get("to") not in ids:
+            raise BlueprintError(f"{path}.edges[{k}]: expected from/to naming known nodes")
+        for end in ("start", "end"):
+            point = edge.get(end)
+            if not isinstance(point, list) or len(point) != 2:
+                raise BlueprintError(f"{path}.edges[{k}].{end}: expected an [x, y] point")
+
+@dataclass(slots=True)
+class SceneSpec:
+    id: object
+    narration: str
+    duration: float
+    visuals: list
+    duration_source: str = None
+
+    @classmethod
+    def from_dict(cls, data: dict, path: str = "scene") -> "SceneSpec":
+        if not isinstance(data, dict):
+            raise BlueprintError(f"{path}: expected an object")
+        if "id" not in data:
+            raise BlueprintError(f"{path}.id: missing")
+        if not isinstance(data.get("narration", ""), str):
+            raise BlueprintError(f"{path}.narration: expected a string")
+        duration = data.get("duration", 2)
+        if not isinstance(duration, (int, float)) or duration < 0:
+            raise BlueprintError(f"{path}.duration: expected a non-negative number")
+        visuals = data.get("visuals")
+        if not isinstance(visuals, list):
+            raise BlueprintError(f"{path}.visuals: expected a list")
+        return cls(
+            id=data["id"],
+            narration=data.get("narration", ""),
+            duration=float(duration),
+            visuals=[Visual.from_dict(v, f"{path}.visuals[{j}]") for j, v in enumerate(visuals)],
+            duration_source=data.get("duration_source"),
+        )
+
+    def to_dict(self) -> dict:
+        out = {"id": self.id, "narration": self.narration, "duration": self.duration}
+        if self.duration_source is not None:
+            out["duration_source"] = self.duration_source
+        out["visuals"] = [v.to_dict() for v in self.visuals]
+        return out
+
+@dataclass(slots=True)
+class Blueprint:
+    """
+    Typed blueprint. Construction through from_dict() validates the whole
+    tree once, so a malformed blueprint fails here with a path to the bad
+    field instead of deep inside a manim render.
+    """
+    title: str
+    style_settings: dict
+    scenes: list
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Blueprint":
+        if not isinstance(data, dict):
+            raise BlueprintError("blueprint: expected an object")
+        if not isinstance(data.get("style_settings", {}), dict):
+            raise BlueprintError("blueprint.style_settings: expected an object")
+        scenes = data.get("scenes")
+        if not isinstance(scenes, list):
+            raise BlueprintError("blueprint.scenes: expected a list")
+        return cls(
+            title=str(data.get("title", "Untitled")),
+            style_settings=dict(data.get("style_settings", {})),
+            scenes=[SceneSpec.from_dict(s, f"scenes[{i}]") for i, s in enumerate(scenes)],
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "title": self.title,
+            "style_settings": self.style_settings,
+            "scenes": [s.to_dict() for s in self.scenes],
+        }
+
+    def to_json(self, indent=None) -> str:
+        """Debug export."""
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_bytes(self) -> bytes:
+        """
+        Compact binary form: msgpack when installed, otherwise zlib
+        compressed JSON without whitespace.
+        """
+        data = self.to_dict()
+        if msgpack is not None:
+            return MAGIC_MSGPACK + msgpack.packb(data, use_bin_type=True)
+        return MAGIC_JSON + zlib.compress(json.dumps(data, separators=(",", ":")).encode())
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "Blueprint":
+        magic, body = payload[:4], payload[4:]
+        if magic == MAGIC_MSGPACK:
+            if msgpack is None:
+                raise BlueprintError("blueprint was written with msgpack, which is not installed")
+            data = msgpack.unpackb(body, raw=False)
+        elif magic == MAGIC_JSON:
+            data = json.loads(zlib.decompress(body))
+        else:
+            raise BlueprintError("not a binary blueprint")
+        return cls.from_dict(data)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "Blueprint":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+def as_blueprint_dict(blueprint) -> dict:
+    """
+    Accepts a Blueprint or a raw dict and returns a validated dict.
+    Entry points call this so bad input fails before any rendering.
+    """
+    if isinstance(blueprint, Blueprint):
+        return blueprint.to_dict()
+    Blueprint.from_dict(blueprint)
+    return blueprint
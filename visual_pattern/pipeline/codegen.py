@@ -0,0 +1,159 @@
+import io
+import re
+
+# Explicit fade length so scene timing is known without probing the video
+FADE_RUN_TIME = 1.0
+
+# Buffered writes keep codegen linear and avoid holding the whole file
+WRITE_BUFFER_SIZE = 1 << 16
+
+# manim font size of text visuals; the text cache pre-rasterizes at this size
+TEXT_FONT_SIZE = 24
+
+INDENT = "    "
+_CONSTANT_NAME = re.compile(r"^[A-Z][A-Z0-9_]*$")
+
+def color_literal(color: str) -> str:
+    """
+    Emits manim colour constants (BLUE, GREY_B) as names and anything else
+    (e.g. "#1e1e1e") as a quoted string literal.
+    """
+    return color if _CONSTANT_NAME.match(color) else repr(color)
+
+class CodeEmitter:
+    """
+    Streams manim source to a text file object line by line.
+    Every literal goes through repr(), so quotes, backslashes and newlines
+    in narration or text content can never break the generated file, and
+    identifiers depend only on scene/visual position, so output is stable.
+    """
+
+    def __init__(self, out):
+        self.out = out
+
+    def line(self, text: str = "", depth: int = 0):
+        self.out.write(INDENT * depth + text + "\n" if text else "\n")
+
+    def header(self):
+        self.line("from manim import *")
+        self.line()
+
+    def class_header(self, class_name: str):
+        self.line(f"class {class_name}(Scene):")
+        self.line("def construct(self):", 1)
+
+    def blueprint(self, blueprint: dict, per_scene: bool = False, class_name_for=None,
+                  preview: bool = False, elide_holds: bool = False):
+        """
+        Emits a whole blueprint: one GeneratedScene class, or one class per
+        scene named by class_name_for(index) when per_scene is set.
+        """
+        self.header()
+        if not per_scene:
+            self.class_header("GeneratedScene")
+        for i, scene in enumerate(blueprint["scenes"]):
+            if per_scene:
+                self.class_header(class_name_for(i))
+            self.scene(i, scene, preview, elide_holds)
+
+    def scene(self, i: int, scene: dict, preview: bool = False, elide_hold: bool = False):
+        """
+        Emits one scene. In preview mode the group is added without any
+        animation, so the last frame shows the scene as it looks once its
+        FadeIn has finished. With elide_hold the static wait is left out;
+        the renderer stretches the first FadeOut frame afterwards instead
+        of having manim encode every identical frame of the hold.
+        """
+        line = self.line
+        group = f"scene_group_{i}"
+        line(f"# Scene {i+1}", 2)
+
+        # Group for this scene to clean up later
+        line(f"{group} = VGroup()", 2)
+
+        for j, visual in enumerate(scene["visuals"]):
+            v_type = visual["type"]
+            # Names depend only on position so the output is stable across runs
+            name = f"elem_{i}_{j}_{v_type}"
+
+            if v_type == "text":
+                line(f"{name} = Text({visual['content']!r}, font_size={TEXT_FONT_SIZE})", 2)
+                if visual.get("position") == "center":
+                    line(f"{name}.move_to(ORIGIN)", 2)
+                elif visual.get("position") == "bottom":
+                    line(f"{name}.to_edge(DOWN)", 2)
+
+            elif v_type == "rectangle":
+                line(f"{name} = Rectangle(color={color_literal(visual.get('color', 'WHITE'))})", 2)
+                if visual.get("position") == "left":
+                    line(f"{name}.shift(LEFT * 2)", 2)
+                elif visual.get("position") == "right":
+                    line(f"{name}.shift(RIGHT * 2)", 2)
+
+            elif v_type == "circle":
+                line(f"{name} = Circle(color={color_literal(visual.get('color', 'WHITE'))})", 2)
+
+            elif v_type == "arrow":
+                line(f"{name} = Arrow(start=LEFT, end=RIGHT)", 2)
+
+            elif v_type == "grid":
+                line(f"{name} = NumberPlane()", 2)
+
+            elif v_type == "graph":
+                self.graph(name, visual)
+
+            else:
+                continue
+            line(f"{group}.add({name})", 2)
+
+        if preview:
+            line(f"self.add({group})", 2)
+            line()
+            return
+
+        # Animation. Audio is muxed after rendering; see Renderer.add_narration()
+        line(f"# Narration: {scene.get('narration')!r}", 2)
+        line(f"self.play(FadeIn({group}), run_time={FADE_RUN_TIME})", 2)
+        if elide_hold:
+            line(f"# Hold of {scene.get('duration', 2)!r}s is restored after rendering", 2)
+        else:
+            line(f"self.wait({scene.get('duration', 2)!r})", 2)
+        line(f"self.play(FadeOut({group}), run_time={FADE_RUN_TIME})", 2)
+        line()
+
+    def graph(self, name: str, visual: dict):
+        """
+        Emits a laid-out graph as a VGroup of node boxes, labels and arrows.
+        Every position was computed by pipeline.layout in the blueprint stage.
+        """
+        line = self.line
+        color = color_literal(visual.get("color", "WHITE"))
+        width, height = visual["node_width"], visual["node_height"]
+        line(f"{name} = VGroup()", 2)
+        for k, node in enumerate(visual["nodes"]):
+            box, label = f"{name}_n{k}", f"{name}_l{k}"
+            node_color = color_literal(node["color"]) if node.get("color") else color
+            line(f"{box} = Rectangle(width={width!r}, height={height!r}, color={node_color})"
+                 f".move_to([{node['x']!r}, {node['y']!r}, 0])", 2)
+            line(f"{name}.add({box})", 2)
+            if node.get("label"):
+                line(f"{label} = Text({node['label']!r}, font_size={visual.get('font_size', TEXT_FONT_SIZE)!r})", 2)
+                # Long labels shrink to fit inside their box
+                line(f"{label}.scale(min(1, {round(width * 0.9, 3)!r} / {label}.width)).move_to({box})", 2)
+                line(f"{name}.add({label})", 2)
+        for edge in visual.get("edges", []):
+            start, end = edge["start"], edge["end"]
+            line(f"{name}.add(Arrow(start=[{start[0]!r}, {start[1]!r}, 0], "
+                 f"end=[{end[0]!r}, {end[1]!r}, 0], buff=0))", 2)
+
+def write_code(path: str, emit):
+    """
+    Opens path with a large write buffer and calls emit(CodeEmitter).
+    """
+    with open(path, "w", buffering=WRITE_BUFFER_SIZE) as f:
+        emit(CodeEmitter(f))
+
+def code_to_string(emit) -> str:
+    buf = io.StringIO()
+    emit(CodeEmitter(buf))
+    return buf.getvalue()
@@ -0,0 +1,240 @@
+import math
+import os
+import subprocess
+import time
+
+from pipeline.tracing import get_tracer
+
+FFMPEG = "ffmpeg"
+FFPROBE = "ffprobe"
+
+# Narration track format; clips are resampled to this before joining
+AUDIO_RATE = 44100
+AUDIO_LAYOUT = "stereo"
+
+def run_ffmpeg(args: list):
+    """
+    Runs ffmpeg with the given arguments, overwriting outputs and only
+    reporting errors. Raises CalledProcessError on failure.
+    """
+    cmd = [FFMPEG, "-y", "-hide_banner", "-loglevel", "error"] + list(args)
+    start = time.perf_counter()
+    try:
+        subprocess.run(cmd, check=True)
+    finally:
+        get_tracer().count("ffmpeg_seconds", time.perf_counter() - start)
+
+def concat_segments(segments: list, output_path: str) -> str:
+    """
+    Joins MP4 segments with ffmpeg's concat demuxer using stream copy.
+    All segments must share codec parameters (true for manim renders at
+    the same quality), so no re-encode is needed.
+    """
+    list_path = write_concat_list(segments, output_path + ".concat.txt")
+    try:
+        run_ffmpeg(["-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", output_path])
+    finally:
+        os.remove(list_path)
+
+    return output_path
+
+def extend_holds(path: str, holds: list, output_path: str) -> str:
+    """
+    Re-times a video without re-encoding: for each (at, extra) hold, every
+    frame after `at` seconds is shifted later by `extra` seconds, so the
+    frame shown at `at` stays on screen that much longer. The result is a
+    variable-frame-rate video in which a long static hold is a single
+    frame. Needs ffmpeg 4.4+ for the setts bitstream filter.
+    """
+    # The whole filter is one -bsf list entry, so commas must be escaped
+    def shift(ts):
+        return "+".join(f"gte({ts}*TB\\,{at:.6f})*{extra:.6f}" for at, extra in holds)
+
+    setts = f"setts=pts=PTS+({shift('PTS')})/TB:dts=DTS+({shift('DTS')})/TB"
+    run_ffmpeg(["-i", path, "-map", "0", "-c", "copy", "-bsf:v", setts, output_path])
+    return output_path
+
+def compose_template(clip: str, overlays: list, fade: float, hold: float, fps: int, output_path: str) -> str:
+    """
+    Builds a scene segment from a pre-rendered template clip, which holds
+    the scene's static visuals fading in and straight back out. The fully
+    visible frame between the fades is cloned for the hold. Each overlay
+    (a dict of drawtext options) is drawn with an alpha ramp that follows
+    the fades. The output uses manim's own encoder settings (libx264,
+    yuv420p, crf 23), so it still joins with manim segments by stream copy.
+    """
+    split = fade + 0.5 / fps # Just past the fully visible frame
+    total = 2 * fade + hold
+    alpha = f"'if(lt(t,{fade}),t/{fade},if(lt(t,{fade + hold:.6f}),1,max(0,({total:.6f}-t)/{fade})))'"
+
+    chain = f"[in][out]concat=n=2:v=1:a=0,fps={fps}"
+    for overlay in overlays:
+        options = ":".join(f"{key}={value}" for key, value in overlay.items())
+        chain += f",drawtext={options}:alpha={alpha}"
+    graph = ";\n".join([
+        "[0:v]split=2[a][b]",
+        f"[a]trim=end={split:.6f},setpts=PTS-STARTPTS,tpad=stop_mode=clone:stop_duration={hold:.6f}[in]",
+        f"[b]trim=start={split:.6f},setpts=PTS-STARTPTS[out]",
+        chain + "[v]",
+    ])
+    graph_path = output_path + ".filter.txt"
+    with open(graph_path, "w") as f:
+        f.write(graph)
+
+    try:
+        run_ffmpeg([
+            "-i", clip, "-filter_complex_script", graph_path, "-map", "[v]",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", "23", "-r", str(fps),
+            output_path,
+        ])
+    finally:
+        os.remove(graph_path)
+
+    return output_path
+
+def encode_hls_scene(video: str, clip: str, length: float, fps: int, renditions: list,
+                     segment_time: float, offset: float, outputs: list) -> list:
+    """
+    Encodes one scene into MPEG-TS segments for every rendition in a
+    single ffmpeg pass: the source is decoded once and split into one
+    scaled encoder per rendition, which ffmpeg runs in parallel. The
+    scene is padded or cut to exactly length seconds, and its narration
+    clip (or silence) is laid under it the same way as in mux_narration.
+    Keyframes are forced every segment_time seconds from the scene start,
+    so every rendition cuts its segments at the same instants and a
+    scene boundary is always a segment boundary. Timestamps start at
+    offset, so scenes encoded separately play back as one stream.
+    renditions are (height, video_bits_per_second, level) and outputs are
+    (segment_pattern, list_path) pairs. Returns the list paths, each a
+    CSV of segment file, start and end time.
+    """
+    n = len(renditions)
+    fmt = f"aformat=sample_rates={AUDIO_RATE}:channel_layouts={AUDIO_LAYOUT}"
+    source = f"[1:a]{fmt}" if clip else f"anullsrc=r={AUDIO_RATE}:cl={AUDIO_LAYOUT}"
+    chains = [
+        # Held frames arrive as one long VFR frame; fps re-expands them for CFR output
+        f"[0:v]fps={fps},tpad=stop_mode=clone:stop_duration={length:.3f},"
+        f"trim=duration={length:.3f},setpts=PTS-STARTPTS,split={n}" + "".join(f"[v{i}]" for i in range(n)),
+        f"{source},apad=whole_dur={length:.3f},atrim=0:{length:.3f},asetpts=N/SR/TB,asplit={n}"
+        + "".join(f"[a{i}]" for i in range(n)),
+    ]
+    for i, (height, _, _) in enumerate(renditions):
+        # -2 keeps the width even for the encoder
+        chains.append(f"[v{i}]scale=-2:{height}[o{i}]")
+    graph_path = outputs[0][1] + ".filter.txt"
+    with open(graph_path, "w") as f:
+        f.write(";\n".join(chains))
+
+    args = ["-i", video] + (["-i", clip] if clip else []) + ["-filter_complex_script", graph_path]
+    for i, ((height, bitrate, level), (pattern, list_path)) in enumerate(zip(renditions, outputs)):
+        args += [
+            "-map", f"[o{i}]", "-map", f"[a{i}]",
+            "-c:v", "libx264", "-preset", "veryfast", "-profile:v", "main", "-level", level,
+            "-pix_fmt", "yuv420p", "-r", str(fps),
+            "-b:v", str(bitrate), "-maxrate", str(int(bitrate * 1.1)), "-bufsize", str(bitrate * 2),
+            "-force_key_frames", f"expr:gte(t,n_forced*{segment_time})", "-sc_threshold", "0",
+            "-c:a", "aac", "-b:a", "128k",
+            "-output_ts_offset", f"{offset:.6f}",
+            "-f", "segment", "-segment_time", str(segment_time), "-segment_format", "mpegts",
+            "-segment_list", list_path, "-segment_list_type", "csv",
+            pattern,
+        ]
+    try:
+        run_ffmpeg(args)
+    finally:
+        os.remove(graph_path)
+
+    return [list_path for _, list_path in outputs]
+
+def write_concat_list(paths: list, list_path: str) -> str:
+    """
+    Writes an input list for ffmpeg's concat demuxer and returns its path.
+    """
+    with open(list_path, "w") as f:
+        for item in paths:
+            # The concat demuxer uses single-quoted paths with '\'' escaping
+            path = os.path.abspath(item).replace("'", "'\\''")
+            f.write(f"file '{path}'\n")
+    return list_path
+
+def contact_sheet(images: list, output_path: str, columns: int = 4, thumb_width: int = 480, padding: int = 8) -> str:
+    """
+    Tiles still frames (all the same size, in order) into a single PNG
+    grid. Each still is read as one frame through the concat demuxer, so
+    the sheet is built in one ffmpeg pass however many scenes there are.
+    """
+    columns = max(1, min(columns, len(images)))
+    rows = math.ceil(len(images) / columns)
+    list_path = write_concat_list(images, output_path + ".concat.txt")
+    # -2 keeps the scaled height even, which some encoders require
+    tile = f"scale={thumb_width}:-2,tile={columns}x{rows}:padding={padding}:margin={padding}"
+    try:
+        run_ffmpeg(["-f", "concat", "-safe", "0", "-i", list_path, "-vf", tile, "-frames:v", "1", "-update", "1", output_path])
+    finally:
+        os.remove(list_path)
+
+    return output_path
+
+def probe_duration(path: str) -> float:
+    """
+    Returns the container duration of a media file in seconds.
+    """
+    cmd = [FFPROBE, "-v", "error", "-show_entries", "format=duration",
+           "-of", "default=noprint_wrappers=1:nokey=1", path]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip())
+
+def narration_filter_graph(slots: list) -> tuple[list, str]:
+    """
+    Builds the filter graph for a narration track from (clip_path, length)
+    slots, one per scene in order. Each clip is padded with silence (or a
+    silent slot is generated) to exactly its scene length, and the slots
+    are joined with the concat filter. ffmpeg streams this graph, so memory
+    stays flat however long the video is.
+    Returns (clip_paths, graph) where clip i is expected as input i + 1.
+    """
+    clips = []
+    chains = []
+    labels = []
+    fmt = f"aformat=sample_rates={AUDIO_RATE}:channel_layouts={AUDIO_LAYOUT}"
+    for i, (clip, length) in enumerate(slots):
+        label = f"s{i}"
+        if clip:
+            clips.append(clip)
+            source = f"[{len(clips)}:a]{fmt}"
+        else:
+            source = f"anullsrc=r={AUDIO_RATE}:cl={AUDIO_LAYOUT}"
+        chains.append(f"{source},apad=whole_dur={length:.3f},atrim=0:{length:.3f},asetpts=N/SR/TB[{label}]")
+        labels.append(f"[{label}]")
+
+    chains.append(f"{''.join(labels)}concat=n={len(labels)}:v=0:a=1[narration]")
+    return clips, ";\n".join(chains)
+
+def mux_narration(video_path: str, slots: list, output_path: str) -> str:
+    """
+    Builds the narration track from per-scene (clip_path, length) slots and
+    muxes it with a silent video in one ffmpeg pass. The video stream is
+    copied, so the audio can be rebuilt without re-rendering any frames.
+    """
+    clips, graph = narration_filter_graph(slots)
+    # Long videos produce long graphs; a script file avoids argv limits
+    graph_path = output_path + ".filter.txt"
+    with open(graph_path, "w") as f:
+        f.write(graph)
+
+    args = ["-i", video_path]
+    for clip in clips:
+        args += ["-i", clip]
+    args += [
+        "-filter_complex_script", graph_path,
+        "-map", "0:v", "-map", "[narration]",
+        "-c:v", "copy", "-c:a", "aac", "-b:a", "128k",
+        "-movflags", "+faststart",
+        output_path,
+    ]
+    try:
+        run_ffmpeg(args)
+    finally:
+        os.remove(graph_path)
+
+    return output_path
@@ -0,0 +1,211 @@
+import csv
+import math
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import tts
+from pipeline.ffmpeg import encode_hls_scene
+from pipeline.renderer import Renderer
+from pipeline.tracing import get_tracer
+
+HLS_DIR = "media/hls"
+MASTER_NAME = "master.m3u8"
+PLAYLIST_NAME = "index.m3u8"
+
+# Segments are cut every SEGMENT_TIME seconds and always at scene boundaries
+SEGMENT_TIME = 4
+AUDIO_BITRATE = 128000
+
+# (name, height, video bits per second), best first
+LADDER = [
+    ("1080p", 1080, 5000000),
+    ("720p", 720, 2800000),
+    ("480p", 480, 1400000),
+    ("360p", 360, 800000),
+]
+
+def ladder_for(source_height: int, ladder: list = LADDER) -> list:
+    """
+    The rungs of a ladder that do not upscale the source. The smallest
+    rung is always kept, so there is at least one rendition.
+    """
+    rungs = [rung for rung in ladder if rung[1] <= source_height]
+    return rungs or [min(ladder, key=lambda rung: rung[1])]
+
+def _level(height: int) -> str:
+    # H.264 Main level 4.0 covers 1080p, 3.1 everything up to 720p
+    return "4.0" if height > 720 else "3.1"
+
+class HLSPackager:
+    """
+    Packages rendered scene segments into an HLS bitrate ladder while the
+    rest of the video is still rendering. Each scene is encoded into every
+    rendition in one ffmpeg pass as soon as its segment is ready, with
+    keyframes forced so that segment boundaries fall on scene boundaries
+    in every rendition. Media playlists are EVENT playlists rewritten
+    atomically each time the next scene in order is packaged, so a player
+    pointed at master.m3u8 can start on scene 1 while later scenes render.
+    Scenes whose start time is known when they are added (every scene
+    planned up front, as in render_parallel) get continuous timestamps;
+    otherwise the scene starts from zero after an EXT-X-DISCONTINUITY.
+    """
+
+    def __init__(self, out_dir=HLS_DIR, source_height=1080, fps=60, ladder=None,
+                 segment_time=SEGMENT_TIME, workers=2):
+        self.out_dir = out_dir
+        self.fps = fps
+        self.segment_time = segment_time
+        self.renditions = ladder_for(source_height, ladder or LADDER)
+        self._scenes = {} # index -> planned blueprint scene
+        self._packaged = {} # index -> (continuous, {rendition: [(file, seconds)]}), or None if it failed
+        self._entries = {name: [] for name, _, _ in self.renditions}
+        self._next = 0 # First scene not yet in the playlists
+        self._gap = False # A discontinuity is due before the next published scene
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._futures = []
+
+        for name, _, _ in self.renditions:
+            os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+            self._write_playlist(name)
+        self._write_master()
+
+    @property
+    def master_path(self) -> str:
+        return os.path.join(self.out_dir, MASTER_NAME)
+
+    def plan(self, index: int, scene: dict):
+        """
+        Registers a blueprint scene before its segment exists, so later
+        scenes know their start time.
+        """
+        with self._lock:
+            self._scenes[index] = scene
+
+    def add(self, index: int, segment: str, scene: dict = None):
+        """
+        Queues a rendered segment for packaging. scene defaults to the one
+        registered with plan().
+        """
+        with self._lock:
+            if scene is not None:
+                self._scenes[index] = scene
+            scene = self._scenes[index]
+            known = all(i in self._scenes for i in range(index))
+            offset = sum(Renderer.scene_length(self._scenes[i]) for i in range(index)) if known else 0.0
+        self._futures.append(self._pool.submit(self._package, index, segment, scene, offset, known))
+
+    def _package(self, index: int, segment: str, scene: dict, offset: float, continuous: bool):
+        clip = None
+        if scene.get("narration"):
+            try:
+                clip, _ = tts.generate_voice(scene["narration"])
+            except Exception as e:
+                print(f"TTS Error: {e}")
+
+        stem = f"s{index + 1:04d}"
+        outputs = [(os.path.join(self.out_dir, name, f"{stem}_%03d.ts"), os.path.join(self.out_dir, name, f"{stem}.csv"))
+                   for name, _, _ in self.renditions]
+        renditions = [(height, bitrate, _level(height)) for _, height, bitrate in self.renditions]
+        tracer = get_tracer()
+        try:
+            with tracer.span("hls.scene", scene=index + 1, renditions=len(renditions)):
+                encode_hls_scene(segment, clip, Renderer.scene_length(scene), self.fps, renditions,
+                                 self.segment_time, offset, outputs)
+            entries = {name: self._read_list(list_path) for (name, _, _), (_, list_path) in zip(self.renditions, outputs)}
+        except (subprocess.CalledProcessError, FileNotFoundError, OSError) as e:
+            print(f"HLS packaging of scene {index + 1} failed (ffmpeg might not be installed): {e}")
+            entries = None
+
+        with self._lock:
+            self._packaged[index] = (continuous, entries) if entries else None
+            self._publish()
+
+    @staticmethod
+    def _read_list(list_path: str) -> list:
+        # segment muxer CSV rows: file name, start time, end time
+        with open(list_path, newline="") as f:
+            rows = [(row[0], float(row[2]) - float(row[1])) for row in csv.reader(f) if row]
+        os.remove(list_path)
+        return rows
+
+    def _publish(self):
+        # Scenes only reach the playlists in order; callers hold the lock
+        published = 0
+        while self._next in self._packaged:
+            packaged = self._packaged.pop(self._next)
+            self._next += 1
+            if packaged is None:
+                self._gap = True
+                continue
+            continuous, entries = packaged
+            for name, rows in entries.items():
+                if self._gap or not continuous:
+                    self._entries[name].append(("#EXT-X-DISCONTINUITY", None))
+                self._entries[name] += rows
+            self._gap = False
+            published += 1
+        if published:
+            for name, _, _ in self.renditions:
+                self._write_playlist(name)
+            print(f"HLS: published scenes 1-{self._next}")
+
+    def finish(self, scene_count: int = None) -> str:
+        """
+        Waits for packaging to finish and closes every playlist with
+        EXT-X-ENDLIST. Scenes below scene_count that never arrived are
+        skipped. Returns the master playlist path.
+        """
+        for future in self._futures:
+            future.result()
+        self._pool.shutdown()
+        with self._lock:
+            last = max([scene_count or 0] + [i + 1 for i in self._packaged])
+            for index in range(self._next, last):
+                self._packaged.setdefault(index, None)
+            self._publish()
+            for name, _, _ in self.renditions:
+                self._write_playlist(name, ended=True)
+        print(f"HLS ladder written to {self.master_path}")
+        return self.master_path
+
+    def _write_playlist(self, name: str, ended: bool = False):
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{math.ceil(self.segment_time)}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+        ]
+        for entry, seconds in self._entries[name]:
+            if seconds is None:
+                lines.append(entry)
+            else:
+                lines += [f"#EXTINF:{seconds:.3f},", entry]
+        if ended:
+            lines.append("#EXT-X-ENDLIST")
+        self._write(os.path.join(self.out_dir, name, PLAYLIST_NAME), lines)
+
+    def _write_master(self):
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-INDEPENDENT-SEGMENTS"]
+        for name, height, bitrate in self.renditions:
+            # Widths as scale=-2 produces them for manim's 16:9 frames
+            width = 2 * round(height * 8 / 9)
+            codec = f"avc1.4d40{int(float(_level(height)) * 10):02x},mp4a.40.2"
+            peak = int((bitrate * 1.1 + AUDIO_BITRATE) * 1.05)
+            lines += [
+                f"#EXT-X-STREAM-INF:BANDWIDTH={peak},AVERAGE-BANDWIDTH={bitrate + AUDIO_BITRATE},"
+                f"RESOLUTION={width}x{height},FRAME-RATE={self.fps:.3f},CODECS=\"{codec}\"",
+                f"{name}/{PLAYLIST_NAME}",
+            ]
+        self._write(self.master_path, lines)
+
+    @staticmethod
+    def _write(path: str, lines: list):
+        # Players poll playlists, so they must never see a partial file
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
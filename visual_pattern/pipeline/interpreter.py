@@ -0,0 +1,290 @@
+import os
+
+from pipeline.blueprint_model import as_blueprint_dict
+from pipeline.codegen import FADE_RUN_TIME, TEXT_FONT_SIZE
+from pipeline.memory import MemoryMonitor, current_rss_mb, release_memory
+from pipeline.renderer import Renderer
+from pipeline.tracing import get_tracer
+
+# manim config names for the CLI quality flags used by Renderer
+QUALITY_NAMES = {
+    "-ql": "low_quality",
+    "-qm": "medium_quality",
+    "-qh": "high_quality",
+    "-qp": "production_quality",
+    "-qk": "fourk_quality",
+}
+
+_manim = None
+
+def load_manim():
+    """
+    Imports manim once per process. The first call pays the Cairo/Pango
+    import cost; later renders in the same process reuse the module.
+    """
+    global _manim
+    if _manim is None:
+        import manim
+        _manim = manim
+    return _manim
+
+def _color(m, name: str):
+    # Blueprints name manim colour constants ("BLUE"); hex strings pass through
+    return getattr(m, name, name)
+
+def build_visual(visual: dict):
+    """
+    Builds the mobject for one blueprint visual. Mirrors the code emitted
+    by pipeline.codegen.CodeEmitter so both backends render the same frames.
+    """
+    m = load_manim()
+    v_type = visual["type"]
+
+    if v_type == "text":
+        mob = m.Text(visual["content"], font_size=TEXT_FONT_SIZE)
+        if visual.get("position") == "center":
+            mob.move_to(m.ORIGIN)
+        elif visual.get("position") == "bottom":
+            mob.to_edge(m.DOWN)
+        return mob
+
+    elif v_type == "rectangle":
+        mob = m.Rectangle(color=_color(m, visual.get("color", "WHITE")))
+        if visual.get("position") == "left":
+            mob.shift(m.LEFT * 2)
+        elif visual.get("position") == "right":
+            mob.shift(m.RIGHT * 2)
+        return mob
+
+    elif v_type == "circle":
+        return m.Circle(color=_color(m, visual.get("color", "WHITE")))
+
+    elif v_type == "arrow":
+        return m.Arrow(start=m.LEFT, end=m.RIGHT)
+
+    elif v_type == "grid":
+        return m.NumberPlane()
+
+    elif v_type == "graph":
+        return build_graph(m, visual)
+
+    return None
+
+def build_graph(m, visual: dict):
+    # Same mobjects as CodeEmitter.graph(), from the positions in the blueprint
+    color = _color(m, visual.get("color", "WHITE"))
+    width, height = visual["node_width"], visual["node_height"]
+    group = m.VGroup()
+    for node in visual["nodes"]:
+        box = m.Rectangle(width=width, height=height, color=_color(m, node["color"]) if node.get("color") else color)
+        box.move_to([node["x"], node["y"], 0])
+        group.add(box)
+        if node.get("label"):
+            label = m.Text(node["label"], font_size=visual.get("font_size", TEXT_FONT_SIZE))
+            label.scale(min(1, round(width * 0.9, 3) / label.width)).move_to(box)
+            group.add(label)
+    for edge in visual.get("edges", []):
+        start, end = edge["start"], edge["end"]
+        group.add(m.Arrow(start=[start[0], start[1], 0], end=[end[0], end[1], 0], buff=0))
+    return group
+
+def build_scene_class(preview: bool = False, elide_hold: bool = False):
+    """
+    Returns a manim Scene subclass that animates one blueprint scene dict.
+    With preview set, the scene only adds its visuals, so the last frame
+    matches the end of the FadeIn. With elide_hold the static wait is
+    skipped and restored afterwards by Renderer._restore_holds().
+    """
+    m = load_manim()
+
+    class BlueprintScene(m.Scene):
+        def __init__(self, scene: dict, **kwargs):
+            self.scene_data = scene
+            super().__init__(**kwargs)
+
+        def construct(self):
+            group = m.VGroup()
+            for visual in self.scene_data["visuals"]:
+                mob = build_visual(visual)
+                if mob is not None:
+                    group.add(mob)
+
+            if preview:
+                self.add(group)
+                return
+            self.play(m.FadeIn(group), run_time=FADE_RUN_TIME)
+            if not elide_hold:
+                self.wait(self.scene_data.get("duration", 2))
+            self.play(m.FadeOut(group), run_time=FADE_RUN_TIME)
+
+    return BlueprintScene
+
+class InProcessRenderer(Renderer):
+    """
+    Renders blueprints by building mobjects directly in the current
+    process, with no generated file, subprocess or per-job manim import.
+    Segments share the scene render cache with the subprocess backend.
+    Code generation stays available as an optional export so the
+    human-in-the-loop editing workflow keeps working.
+    With memory_budget_mb set, every scene's peak memory is tracked and
+    its state released before the next scene. Once a scene peaks above
+    the budget, or the process stays above it after releasing, the
+    remaining scenes render in their own manim processes instead.
+    """
+
+    def __init__(self, output_file="generated_scene.py", quality="-ql", cache=None, export_code=False,
+                 elide_holds=True, text_cache=None, memory_budget_mb=None, trace_python=False):
+        super().__init__(output_file=output_file, quality=quality, cache=cache, elide_holds=elide_holds,
+                         text_cache=text_cache, memory_budget_mb=memory_budget_mb)
+        self.export_code = export_code
+        self.trace_python = trace_python # Also track Python allocations with tracemalloc
+        self._isolate = False
+        self._scene_class = None
+        self._preview_class = None
+
+    def render(self, blueprint: dict, output_path: str = None, on_segment=None, reuse: dict = None) -> str:
+        """
+        Renders every scene in-process, then joins the segments and muxes
+        the narration. See render_segments() for the arguments.
+        Returns the final video path, or None on failure.
+        """
+        blueprint = as_blueprint_dict(blueprint)
+        segments = self.render_segments(blueprint, on_segment, reuse)
+        return self.assemble(blueprint, segments, output_path)
+
+    def render_segments(self, blueprint: dict, on_segment=None, reuse: dict = None) -> dict:
+        """
+        Renders every scene's segment in-process, one at a time. Segments
+        in reuse ({scene_index: segment}) are used as-is. on_segment(index,
+        path) is called as each segment is ready.
+        Returns {scene_index: segment_path} for the scenes that rendered.
+        """
+        blueprint = as_blueprint_dict(blueprint)
+        if self.export_code:
+            self.write_manim_code(blueprint, per_scene=True)
+            print(f"Manim code exported to {self.output_file}")
+
+        class_names = [self._scene_class_name(i) for i in range(len(blueprint["scenes"]))]
+        segments, cache_keys = self._lookup_cached_segments(blueprint, class_names, reuse)
+        self.warm_texts([scene for name, scene in zip(class_names, blueprint["scenes"]) if name not in segments])
+
+        for index, (name, scene) in enumerate(zip(class_names, blueprint["scenes"])):
+            if name in segments:
+                if on_segment:
+                    on_segment(index, segments[name])
+                continue
+            try:
+                segment = self._render_single_scene(index, scene)
+            except Exception as e:
+                print(f"Rendering {name} failed: {e}")
+                continue
+            if name in cache_keys:
+                segment = self._cache_put(cache_keys[name], segment)
+            segments[name] = segment
+            print(f"Rendered {name}")
+            if on_segment:
+                on_segment(index, segment)
+
+        return {index: segments[name] for index, name in enumerate(class_names) if name in segments}
+
+    # The in-process backend is always per-scene; keep one entry point
+    render_parallel = render
+
+    def render_preview(self, blueprint: dict, output_path: str = None, columns: int = 4) -> str:
+        """
+        Renders one still per scene in this process (end of the FadeIn,
+        no video frames) and tiles them into a contact sheet.
+        """
+        blueprint = as_blueprint_dict(blueprint)
+        try:
+            m = load_manim()
+        except ImportError as e:
+            print(f"Preview failed (Manim might not be installed): {e}")
+            return None
+        if self._preview_class is None:
+            self._preview_class = build_scene_class(preview=True)
+
+        stem, ext = os.path.splitext(self.output_file)
+        module_file = f"{stem}_preview{ext}"
+        class_names = [self._scene_class_name(i) for i in range(len(blueprint["scenes"]))]
+        self.warm_texts(blueprint["scenes"])
+        stills = {}
+        for name, scene in zip(class_names, blueprint["scenes"]):
+            options = {
+                "quality": QUALITY_NAMES.get(self.quality, "low_quality"),
+                "images_dir": os.path.abspath(self._image_dir(module_file)),
+                "output_file": name,
+                "save_last_frame": True,
+                "write_to_movie": False,
+                **self._text_options(),
+            }
+            try:
+                with get_tracer().span("preview.stills", scenes=1, inprocess=True), m.tempconfig(options):
+                    rendered = self._preview_class(scene)
+                    rendered.render()
+                    stills[name] = str(rendered.renderer.file_writer.image_file_path)
+            except Exception as e:
+                print(f"Preview of {name} failed: {e}")
+
+        return self._contact_sheet(class_names, stills, module_file, output_path, columns)
+
+    def _text_options(self) -> dict:
+        # Same SVG directory as manim subprocesses and other workers
+        return {"text_dir": self.text_cache.text_dir} if self.text_cache is not None else {}
+
+    def _render_single_scene(self, index: int, scene: dict) -> str:
+        if self.memory_budget_mb is None:
+            return self._render_in_process(index, scene)
+        if self._isolate:
+            # Same generated module and manim CLI as the subprocess backend
+            return Renderer._render_single_scene(self, index, scene)
+
+        name = self._scene_class_name(index)
+        segment = None
+        with get_tracer().span("render.memory", scene=name) as span:
+            try:
+                with MemoryMonitor(self.trace_python) as monitor:
+                    segment = self._render_in_process(index, scene)
+            except MemoryError:
+                print(f"{name} ran out of memory in-process")
+            finally:
+                release_memory()
+            span["peak_rss_mb"] = monitor.peak_rss_mb
+            span["peak_python_mb"] = monitor.peak_python_mb
+            span["rss_after_mb"] = current_rss_mb()
+
+        over = [value for value in (span["peak_rss_mb"], span["rss_after_mb"])
+                if value is not None and value > self.memory_budget_mb]
+        if segment is None or over:
+            print(f"{name} peaked at {span['peak_rss_mb']} MB (budget {self.memory_budget_mb} MB); "
+                  "rendering the remaining scenes in separate processes")
+            self._isolate = True
+        return segment or Renderer._render_single_scene(self, index, scene)
+
+    def _render_in_process(self, index: int, scene: dict) -> str:
+        """
+        Renders one blueprint scene to an MP4 segment and returns its path.
+        manim's config is process-global, so scenes render one at a time.
+        """
+        name = self._scene_class_name(index)
+        m = load_manim()
+        if self._scene_class is None:
+            self._scene_class = build_scene_class(elide_hold=self.elide_holds)
+
+        options = {
+            "quality": QUALITY_NAMES.get(self.quality, "low_quality"),
+            "video_dir": os.path.abspath(self._video_dir()),
+            "output_file": name,
+            "write_to_movie": True,
+            "format": "mp4",
+            **self._text_options(),
+        }
+        tracer = get_tracer()
+        with tracer.span("render.scene", scene=name, inprocess=True) as span, m.tempconfig(options):
+            rendered = self._scene_class(scene)
+            rendered.render()
+            path = str(rendered.renderer.file_writer.movie_file_path)
+        if self.elide_holds:
+            self._restore_holds(path, [scene])
+        tracer.wrote(path, span)
+        return path
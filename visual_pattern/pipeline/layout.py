@@ -0,0 +1,268 @@
+import numpy as np
+
+# Drawing area for diagrams in manim units. The frame is about 14.2 x 8;
+# the bottom strip is left free for a caption.
+AREA_WIDTH = 12.0
+AREA_HEIGHT = 6.0
+AREA_CENTER = (0.0, 0.5)
+
+# Node box before the diagram is scaled to fit, and the gaps around it
+NODE_WIDTH = 2.0
+NODE_HEIGHT = 1.0
+LAYER_GAP = 1.0
+NODE_GAP = 0.5
+LABEL_FONT_SIZE = 24
+
+LAYOUTS = ("layered", "force")
+SWEEPS = 8
+FORCE_ITERATIONS = 50
+# Above this many nodes "force" falls back to "layered", which stays in
+# the millisecond range; force layouts cost about 0.3 ms per node
+FORCE_MAX_NODES = 300
+REPULSION_RADIUS = 2.0 # In ideal edge lengths; farther nodes do not repel
+OVERLAP_ITERATIONS = 50
+OVERLAP_PUSH = 0.75
+SEED = 0 # Fixed, so the same graph always gets the same positions (and render cache key)
+
+def layout_graph(visual: dict) -> dict:
+    """
+    Lays out a graph visual and returns a copy with absolute coordinates.
+    Input nodes are {"id", "label"} (label defaults to id) or bare ids, and edges are
+    [from, to] pairs or {"from", "to"} objects. The output nodes gain "x"
+    and "y", edges become {"from", "to", "start", "end"} with endpoints
+    clipped to the node boxes, and node_width, node_height and font_size
+    are set. The whole diagram is scaled to fit the drawing area.
+    "force" graphs above FORCE_MAX_NODES are laid out in layers instead.
+    """
+    layout = visual.get("layout", "layered")
+    if layout not in LAYOUTS:
+        raise ValueError(f"unknown graph layout {layout!r}")
+    nodes = [node if isinstance(node, dict) else {"id": node} for node in visual["nodes"]]
+    nodes = [dict(node, label=str(node.get("label", node["id"]))) for node in nodes]
+    index = {node["id"]: i for i, node in enumerate(nodes)}
+    pairs = [(e["from"], e["to"]) if isinstance(e, dict) else tuple(e) for e in visual.get("edges", [])]
+    unknown = {node_id for pair in pairs for node_id in pair} - index.keys()
+    if unknown:
+        raise ValueError(f"graph edges reference unknown nodes: {sorted(map(str, unknown))}")
+    # A self-loop has no drawable straight arrow
+    pairs = [(a, b) for a, b in pairs if a != b]
+    src = np.array([index[a] for a, _ in pairs], dtype=np.int64)
+    dst = np.array([index[b] for _, b in pairs], dtype=np.int64)
+
+    n = len(nodes)
+    if layout == "force" and n > FORCE_MAX_NODES:
+        print(f"Force layout is limited to {FORCE_MAX_NODES} nodes; laying out {n} nodes in layers")
+        layout = "layered"
+    if n == 0:
+        xy = np.zeros((0, 2))
+    elif layout == "layered":
+        xy = layered_positions(n, src, dst)
+    else:
+        xy = remove_overlaps(force_positions(n, src, dst))
+
+    xy, width, height, scale = fit_to_area(xy)
+    starts, ends = clip_edges(xy, src, dst, width, height)
+
+    for node, (x, y) in zip(nodes, xy.round(3).tolist()):
+        node["x"], node["y"] = x, y
+    edges = [{"from": a, "to": b, "start": s, "end": e}
+             for (a, b), s, e in zip(pairs, starts.round(3).tolist(), ends.round(3).tolist())]
+    return dict(visual, layout=layout, nodes=nodes, edges=edges,
+                node_width=round(width, 3), node_height=round(height, 3),
+                font_size=max(round(LABEL_FONT_SIZE * scale), 6))
+
+def is_laid_out(visual: dict) -> bool:
+    return "node_width" in visual and all(isinstance(node, dict) and "x" in node and "y" in node
+                                          for node in visual["nodes"])
+
+def layered_positions(n: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Sugiyama-style layout flowing left to right: break cycles, assign
+    longest-path layers, then order nodes within layers by barycenter
+    sweeps. Each step works on whole edge arrays at once.
+    """
+    src, dst = _acyclic(n, src, dst)
+
+    # Longest-path layering; each pass relaxes every edge at once
+    layer = np.zeros(n, dtype=np.int64)
+    for _ in range(n):
+        relaxed = layer.copy()
+        np.maximum.at(relaxed, dst, layer[src] + 1)
+        if np.array_equal(relaxed, layer):
+            break
+        layer = relaxed
+
+    # Crossing reduction: sweep down using predecessors, up using successors
+    sizes = np.bincount(layer)
+    # Slot of each node, centred on its layer so layers of different sizes line up
+    slot = _rank_within_layers(layer, np.arange(n, dtype=float)) - (sizes[layer] - 1) / 2
+    for sweep in range(SWEEPS):
+        a, b = (src, dst) if sweep % 2 == 0 else (dst, src)
+        sums = np.bincount(b, weights=slot[a], minlength=n)
+        counts = np.bincount(b, minlength=n)
+        # Nodes without neighbours on that side keep their place
+        bary = np.where(counts > 0, sums / np.maximum(counts, 1), slot)
+        slot = _rank_within_layers(layer, bary) - (sizes[layer] - 1) / 2
+
+    x = layer * (NODE_WIDTH + LAYER_GAP)
+    y = -slot * (NODE_HEIGHT + NODE_GAP)
+    return np.column_stack([x, y]).astype(float)
+
+def _acyclic(n: int, src: np.ndarray, dst: np.ndarray) -> tuple:
+    """
+    Reverses back edges found by an iterative depth-first search, so the
+    layering sees a DAG. Drawn arrows keep their original direction.
+    """
+    adjacency = [[] for _ in range(n)]
+    for a, b in zip(src.tolist(), dst.tolist()):
+        adjacency[a].append(b)
+    finish = np.zeros(n, dtype=np.int64)
+    state = np.zeros(n, dtype=np.int8) # 0 new, 1 on stack, 2 done
+    clock = 0
+    for root in range(n):
+        if state[root]:
+            continue
+        stack = [(root, iter(adjacency[root]))]
+        state[root] = 1
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                state[node] = 2
+                finish[node] = clock
+                clock += 1
+            elif state[child] == 0:
+                state[child] = 1
+                stack.append((child, iter(adjacency[child])))
+    # In a DAG every edge goes from a later to an earlier finish time
+    back = finish[src] < finish[dst]
+    return np.where(back, dst, src), np.where(back, src, dst)
+
+def _rank_within_layers(layer: np.ndarray, key: np.ndarray) -> np.ndarray:
+    # Position of each node inside its layer when sorted by key
+    idx = np.lexsort((key, layer))
+    starts = np.searchsorted(layer[idx], layer[idx])
+    rank = np.empty(len(layer), dtype=float)
+    rank[idx] = np.arange(len(layer)) - starts
+    return rank
+
+def force_positions(n: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Fruchterman-Reingold with the grid variant of its repulsion: nodes
+    only repel nodes within REPULSION_RADIUS ideal edge lengths, found
+    through a uniform grid, so each iteration costs about O(n) instead of
+    O(n^2). Edges attract, and the step size cools linearly.
+    """
+    rng = np.random.default_rng(SEED)
+    k = NODE_WIDTH + LAYER_GAP # Ideal edge length
+    radius = REPULSION_RADIUS * k
+    pos = rng.uniform(-1, 1, size=(n, 2)) * k * np.sqrt(n)
+    start_temperature = temperature = k * np.sqrt(n) / 2
+    for step in range(FORCE_ITERATIONS):
+        i, j = _near_pairs(pos, radius)
+        delta = pos[i] - pos[j]
+        distance2 = np.einsum("ij,ij->i", delta, delta)
+        near = distance2 < radius * radius
+        i, j, delta = i[near], j[near], delta[near]
+        push = delta * (k * k / np.maximum(distance2[near], 1e-6))[:, None]
+        pull = pos[src] - pos[dst]
+        pull *= (np.sqrt(np.einsum("ij,ij->i", pull, pull)) / k)[:, None]
+        force = np.empty((n, 2))
+        for axis in (0, 1):
+            force[:, axis] = (np.bincount(i, push[:, axis], n) - np.bincount(j, push[:, axis], n)
+                              + np.bincount(dst, pull[:, axis], n) - np.bincount(src, pull[:, axis], n))
+
+        size = np.maximum(np.sqrt((force * force).sum(axis=1)), 1e-9)
+        pos += force * (np.minimum(size, temperature) / size)[:, None]
+        temperature = start_temperature * (1 - (step + 1) / FORCE_ITERATIONS)
+    return pos - pos.mean(axis=0)
+
+def remove_overlaps(pos: np.ndarray, width=NODE_WIDTH + NODE_GAP, height=NODE_HEIGHT + NODE_GAP) -> np.ndarray:
+    """
+    Pushes overlapping node boxes apart along the axis where they overlap
+    least, for every overlapping pair at once, until no boxes overlap.
+    Candidate pairs come from a grid of box-sized cells.
+    """
+    # Spread the layout until its bounding box has twice the boxes' total
+    # area; far fewer pairs then overlap and the pushes converge quickly
+    span = np.maximum(pos.max(axis=0) - pos.min(axis=0), 1e-6)
+    pos = pos * max(1.0, np.sqrt(2 * len(pos) * width * height / (span[0] * span[1])))
+    for _ in range(OVERLAP_ITERATIONS):
+        # Overlapping boxes are less than a box apart on both axes
+        i, j = _near_pairs(pos / [width, height], 1.0)
+        delta = pos[i] - pos[j]
+        overlap = np.array([width, height]) - np.abs(delta)
+        overlapping = (overlap > 0).all(axis=1)
+        if not overlapping.any():
+            break
+        delta, overlap = delta[overlapping], overlap[overlapping]
+        # Coincident nodes have no direction; split them by index
+        sign = np.sign(delta) + (delta == 0)
+        along_x = overlap[:, 0] < overlap[:, 1]
+        # Each box moves 3/4 of the overlap; exact halves oscillate in clusters
+        push = np.zeros_like(delta)
+        push[along_x, 0] = overlap[along_x, 0] * OVERLAP_PUSH * sign[along_x, 0]
+        push[~along_x, 1] = overlap[~along_x, 1] * OVERLAP_PUSH * sign[~along_x, 1]
+        for axis in (0, 1):
+            pos[:, axis] += (np.bincount(i[overlapping], push[:, axis], len(pos))
+                             - np.bincount(j[overlapping], push[:, axis], len(pos)))
+    return pos
+
+def _near_pairs(pos: np.ndarray, cell: float) -> tuple:
+    """
+    Every unordered pair (i, j) of points in the same or adjacent square
+    grid cells of the given size, which includes every pair closer than
+    cell. Returns index arrays with i < j.
+    """
+    cells = np.floor(pos / cell).astype(np.int64)
+    cells -= cells.min(axis=0) - 1 # Neighbour offsets below stay non-negative
+    rows = cells[:, 1].max() + 2
+    key = cells[:, 0] * rows + cells[:, 1]
+    order = np.argsort(key, kind="stable")
+    occupied, starts, counts = np.unique(key[order], return_index=True, return_counts=True)
+
+    pairs_i, pairs_j = [], []
+    # The cell itself plus half its neighbours, so each pair of cells is visited once
+    for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+        target = key + dx * rows + dy
+        found = np.minimum(np.searchsorted(occupied, target), len(occupied) - 1)
+        has = occupied[found] == target
+        node = np.flatnonzero(has)
+        count = counts[found[node]]
+        first = np.repeat(starts[found[node]] - np.cumsum(count) + count, count)
+        i = np.repeat(node, count)
+        j = order[first + np.arange(len(i))]
+        if (dx, dy) == (0, 0):
+            keep = i < j
+            i, j = i[keep], j[keep]
+        pairs_i.append(i)
+        pairs_j.append(j)
+    i, j = np.concatenate(pairs_i), np.concatenate(pairs_j)
+    return np.minimum(i, j), np.maximum(i, j)
+
+def fit_to_area(xy: np.ndarray) -> tuple:
+    """
+    Centres the layout in the drawing area and scales positions and boxes
+    together, so a layout without overlaps stays without overlaps.
+    Returns (positions, node width, node height, scale).
+    """
+    if len(xy) == 0:
+        return xy, NODE_WIDTH, NODE_HEIGHT, 1.0
+    low, high = xy.min(axis=0), xy.max(axis=0)
+    span = high - low + [NODE_WIDTH, NODE_HEIGHT]
+    scale = min(1.0, AREA_WIDTH / span[0], AREA_HEIGHT / span[1])
+    xy = (xy - (low + high) / 2) * scale + AREA_CENTER
+    return xy, NODE_WIDTH * scale, NODE_HEIGHT * scale, scale
+
+def clip_edges(xy: np.ndarray, src: np.ndarray, dst: np.ndarray, width: float, height: float) -> tuple:
+    """
+    Edge endpoints on the borders of the node boxes instead of their centres.
+    """
+    a, b = xy[src], xy[dst]
+    delta = b - a
+    # Fraction of delta from a centre to the border of its box
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.minimum(width / 2 / np.abs(delta[:, 0]), height / 2 / np.abs(delta[:, 1]))
+    t = np.nan_to_num(np.minimum(t, 0.5), nan=0.0, posinf=0.0)[:, None]
+    return a + delta * t, b - delta * t
@@ -0,0 +1,182 @@
+import gc
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+from pipeline.tracing import peak_rss_mb
+
+SAMPLE_INTERVAL = 0.05 # Seconds between RSS samples while a scene renders
+
+def current_rss_mb(pid: int = None) -> float:
+    """
+    Current resident set size of this process, or of pid, in MB. For this
+    process it falls back to the peak where the current value cannot be
+    read; for another process it is None then.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, IndexError):
+        return None if pid else peak_rss_mb()
+
+def release_memory():
+    """
+    Drops what a finished scene leaves behind: unreachable mobject cycles,
+    manim's per-process caches of parsed SVGs, and free heap pages glibc
+    would otherwise keep for reuse.
+    """
+    gc.collect()
+    manim_svg = sys.modules.get("manim.mobject.svg.svg_mobject")
+    # Grows with every distinct Text manim has rasterized in this process
+    cache = getattr(manim_svg, "SVG_HASH_TO_MOB_MAP", None)
+    if isinstance(cache, dict):
+        cache.clear()
+    if sys.platform.startswith("linux"):
+        try:
+            import ctypes
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        except (OSError, AttributeError): # musl and other libcs
+            pass
+
+def run_with_peak_rss(cmd: list, limit_mb: float = None,
+                      interval: float = SAMPLE_INTERVAL) -> tuple[int, str, float, bool]:
+    """
+    Runs a command to completion, like subprocess.run with captured
+    output, and also measures the child's own peak RSS in MB (None where
+    os.wait4 is unavailable). Output goes to temp files rather than pipes,
+    so the child can be reaped with wait4 instead of by Popen.
+    With limit_mb, the child's RSS is sampled while it runs and the child
+    is killed once it goes over the limit. Sampling reads /proc, so the
+    limit is only enforced on Linux.
+    Returns (returncode, stderr, peak_rss_mb, killed).
+    """
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(cmd, stdout=out, stderr=err)
+        killed = threading.Event()
+        exited = threading.Event()
+
+        def watch():
+            while not exited.wait(interval):
+                rss = current_rss_mb(proc.pid)
+                if rss is not None and rss > limit_mb:
+                    killed.set()
+                    try:
+                        # Not proc.kill(): Popen polls first and could reap the child
+                        os.kill(proc.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                    return
+
+        watcher = None
+        if limit_mb is not None:
+            watcher = threading.Thread(target=watch, daemon=True)
+            watcher.start()
+        peak = None
+        if hasattr(os, "wait4"):
+            if watcher is not None and hasattr(os, "waitid"):
+                # Wait without reaping, so the watcher never samples or
+                # kills a recycled pid
+                os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+                exited.set()
+                watcher.join()
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+            scale = 1 if sys.platform == "darwin" else 1024
+            peak = round(usage.ru_maxrss * scale / (1024 * 1024), 1)
+        else:
+            proc.wait()
+        exited.set()
+        err.seek(0)
+        return proc.returncode, err.read().decode(errors="replace"), peak, killed.is_set()
+
+class MemoryBudget:
+    """
+    Admits child render processes side by side only while their expected
+    peaks fit budget_mb. Each process is expected to need as much as the
+    largest peak recorded so far, so until one has finished they run one
+    at a time. One process is always admitted; one that goes over the
+    budget on its own is stopped by run_with_peak_rss(limit_mb=budget_mb).
+    """
+
+    def __init__(self, budget_mb: float):
+        self.budget_mb = budget_mb
+        self.estimate_mb = None
+        self._running = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def admit(self):
+        with self._cond:
+            while self._running and (self.estimate_mb is None
+                                     or (self._running + 1) * self.estimate_mb > self.budget_mb):
+                self._cond.wait()
+            self._running += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+
+    def record(self, peak_mb: float) -> bool:
+        """
+        Records a finished process's peak. Returns False if it was over budget.
+        """
+        with self._cond:
+            if peak_mb is not None:
+                self.estimate_mb = max(self.estimate_mb or 0, peak_mb)
+            self._cond.notify_all()
+        return peak_mb is None or peak_mb <= self.budget_mb
+
+class MemoryMonitor:
+    """
+    Tracks peak memory over a block: RSS sampled from a background thread
+    and, with trace_python, the peak of Python allocations from
+    tracemalloc. tracemalloc slows allocation-heavy code, so it is off by
+    default. Peaks are in MB and readable after the block.
+    """
+
+    def __init__(self, trace_python: bool = False, interval: float = SAMPLE_INTERVAL):
+        self.trace_python = trace_python
+        self.interval = interval
+        self.peak_rss_mb = None
+        self.peak_python_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_tracing = False
+
+    def __enter__(self) -> "MemoryMonitor":
+        if self.trace_python:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+        self.peak_rss_mb = current_rss_mb()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self._record(current_rss_mb())
+        if self.trace_python:
+            self.peak_python_mb = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+            if self._started_tracing:
+                tracemalloc.stop()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._record(current_rss_mb())
+
+    def _record(self, rss: float):
+        if rss is not None and (self.peak_rss_mb is None or rss > self.peak_rss_mb):
+            self.peak_rss_mb = rss
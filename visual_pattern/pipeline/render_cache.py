@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import Counter
+
+CACHE_DIR = "media/cache/scenes"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3 # 2 GB
+EVICT_TO = 0.9 # Fraction of max_bytes an eviction trims the cache down to
+
+class RenderCache:
+    """
+    Content-addressed store of rendered scene segments.
+    Entries are keyed by everything that affects a scene's pixels, so an
+    unchanged scene is reused across runs. File mtimes double as LRU
+    timestamps. A running size total is kept per instance, and once an
+    insert takes it past max_bytes the directory is rescanned (picking up
+    other processes' inserts) and trimmed to EVICT_TO of the cap, so a
+    render of N scenes does not rescan N times. Pinned keys are never
+    evicted; renders pin the segments they will still read.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pinned = Counter() # key -> number of renders still reading it
+        self._size = None # Running total of entry sizes; None until first scanned
+
+    @staticmethod
+    def key(scene: dict, style_settings: dict, quality: str, version: str) -> str:
+        payload = json.dumps(
+            {"scene": scene, "style": style_settings, "quality": quality, "version": version},
+            sort_keys=True, separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp4")
+
+    def get(self, key: str) -> str:
+        """
+        Returns the cached segment path for key, or None on a miss.
+        A hit refreshes the entry's position in the LRU order.
+        """
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, segment_path: str) -> str:
+        """
+        Copies a freshly rendered segment into the cache and returns the
+        cached path. The copy is atomic so concurrent readers never see a
+        partial file.
+        """
+        path = self._path(key)
+        # Streaming renders put from several threads of one process
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(segment_path, tmp_path)
+        size = os.path.getsize(tmp_path)
+        with self._lock:
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            if self._size is not None:
+                self._size += size - replaced
+        if self._size is None or self._size > self.max_bytes:
+            self.evict()
+        return path
+
+    def pin(self, keys: list):
+        """
+        Keeps keys from being evicted until they are unpinned. Pins count,
+        so renders sharing a segment each pin and unpin it.
+        """
+        with self._lock:
+            self._pinned.update(keys)
+
+    def unpin(self, keys: list):
+        with self._lock:
+            self._pinned.subtract(keys)
+            self._pinned = +self._pinned # Drops keys no render holds any more
+
+    def evict(self):
+        """
+        Deletes least recently used, unpinned segments until the cache
+        fits EVICT_TO of max_bytes, and resets the running size total
+        from a scan of the directory.
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".mp4"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+                total += stat.st_size
+
+            if total > self.max_bytes:
+                entries.sort()
+                for _, size, name in entries:
+                    if total <= self.max_bytes * EVICT_TO:
+                        break
+                    if self._pinned[name[:-len(".mp4")]]:
+                        continue
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+            self._size = total
@@ -1,90 +1,547 @@
+import glob
 import os
 import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+
+from pipeline import tts
+from pipeline.blueprint_model import as_blueprint_dict
+from pipeline.codegen import FADE_RUN_TIME, code_to_string, write_code
+from pipeline.ffmpeg import concat_segments, contact_sheet, extend_holds, mux_narration, probe_duration
+from pipeline.memory import MemoryBudget, run_with_peak_rss
+from pipeline.text_cache import text_specs
+from pipeline.tracing import get_tracer
+
+# Bump whenever code generation changes what a scene looks like, so cached
+# segments from older renderers are not reused.
+RENDERER_VERSION = "6"
+
+# Fields that never change a scene's pixels (audio is muxed separately;
+# ids renumber when a scene is inserted or removed)
+CACHE_IGNORED_KEYS = ("duration_source", "narration", "id")
+
+# Folder manim writes videos into for each quality flag
+QUALITY_DIRS = {
+    "-ql": "480p15",
+    "-qm": "720p30",
+    "-qh": "1080p60",
+    "-qp": "1440p60",
+    "-qk": "2160p60",
+}
 
 class Renderer:
-    def __init__(self, output_file="generated_scene.py"):
+    def __init__(self, output_file="generated_scene.py", quality="-ql", max_workers=None, cache=None,
+                 elide_holds=True, templates=None, text_cache=None, memory_budget_mb=None):
         self.output_file = output_file
+        self.quality = quality
+        self.max_workers = max_workers
+        self.cache = cache # Optional RenderCache for scene segments
+        # Skip encoding static narration holds frame by frame; see _restore_holds()
+        self.elide_holds = elide_holds
+        self.templates = templates # Optional TemplateLibrary; see _render_segment()
+        self.text_cache = text_cache # Optional shared TextCache; see warm_texts()
+        # Optional RSS budget for the manim processes running at once; see _render_scene_class()
+        self.memory_budget_mb = memory_budget_mb
+        self._memory = MemoryBudget(memory_budget_mb) if memory_budget_mb else None
+        self._held = [] # Cache keys pinned until the next assembly reads their segments
 
     def render(self, blueprint: dict):
         """
         Generates Manim code from blueprint and executes it.
+        Manim renders silent video; narration is muxed in afterwards.
         """
+        blueprint = as_blueprint_dict(blueprint)
         print("Translating blueprint to Manim code...")
-        
-        manim_code = self._generate_manim_code(blueprint)
-        
-        with open(self.output_file, "w") as f:
-            f.write(manim_code)
-            
+
+        self.write_manim_code(blueprint)
+        module_file = self._render_module()
+        if module_file != self.output_file:
+            self.write_manim_code(blueprint, module_file, elide_holds=True)
+
         print(f"Manim code written to {self.output_file}. Starting render...")
-        
+        self.warm_texts(blueprint["scenes"])
+
         # Command to run manim
         # -ql = Low quality for speed in prototype
         # Use python -m manim to ensure we use the installed module
-        import sys
-        cmd = f"{sys.executable} -m manim -ql {self.output_file} GeneratedScene"
+        cmd = self._manim_cmd(module_file, ["GeneratedScene"], "-o", "GeneratedScene_silent")
+        tracer = get_tracer()
         try:
-            subprocess.run(cmd, shell=True, check=True)
+            with tracer.span("manim", scene="GeneratedScene"):
+                start = time.perf_counter()
+                try:
+                    subprocess.run(cmd, check=True)
+                finally:
+                    tracer.count("manim_subprocess_seconds", time.perf_counter() - start)
             print("Rendering complete!")
         except (subprocess.CalledProcessError, FileNotFoundError, OSError) as e:
             print(f"Rendering failed (Manim might not be installed): {e}")
             print("Skipping video generation step. Python scene file is saved.")
+            return
+
+        silent_path = os.path.join(self._video_dir(module_file), "GeneratedScene_silent.mp4")
+        if self.elide_holds:
+            try:
+                self._restore_holds(silent_path, blueprint["scenes"])
+            except (subprocess.CalledProcessError, FileNotFoundError, OSError) as e:
+                print(f"Restoring narration holds failed (ffmpeg 4.4+ is needed, or pass --no-elide-holds): {e}")
+                return
+        tracer.wrote(silent_path)
+        os.makedirs(self._video_dir(), exist_ok=True)
+        self.add_narration(blueprint["scenes"], silent_path, os.path.join(self._video_dir(), "GeneratedScene.mp4"))
+
+    def render_parallel(self, blueprint: dict, output_path: str = None, on_segment=None, reuse: dict = None) -> str:
+        """
+        Renders each blueprint scene as its own Scene class in a bounded pool
+        of manim processes, then joins the segments with ffmpeg stream copy
+        and muxes the narration. See render_segments() for the arguments.
+        Returns the path of the joined video, or None if nothing rendered.
+        """
+        blueprint = as_blueprint_dict(blueprint)
+        segments = self.render_segments(blueprint, on_segment, reuse)
+        return self.assemble(blueprint, segments, output_path)
+
+    def render_segments(self, blueprint: dict, on_segment=None, reuse: dict = None) -> dict:
+        """
+        Renders every scene's segment without joining them or touching
+        the narration, so timings can still be reconciled before
+        assemble(). A failing scene is reported and left out; the others
+        still render. With a cache configured, unchanged scenes are reused
+        and only changed scenes are sent to manim. reuse maps scene indices
+        to segments already rendered (e.g. by a previous pass), which are
+        used as-is. on_segment(index, path) is called for each cached or
+        reused segment and then as each render finishes.
+        Returns {scene_index: segment_path} for the scenes that rendered.
+        """
+        blueprint = as_blueprint_dict(blueprint)
+        print("Translating blueprint to per-scene Manim code...")
+
+        self.write_manim_code(blueprint, per_scene=True)
+        module_file = self._render_module()
+        if module_file != self.output_file:
+            self.write_manim_code(blueprint, module_file, per_scene=True, elide_holds=True)
+
+        class_names = [self._scene_class_name(i) for i in range(len(blueprint["scenes"]))]
+        scenes_by_name = dict(zip(class_names, blueprint["scenes"]))
+        segments, cache_keys = self._lookup_cached_segments(blueprint, class_names, reuse)
+        if on_segment:
+            for index, name in enumerate(class_names):
+                if name in segments:
+                    on_segment(index, segments[name])
+
+        pending = [name for name in class_names if name not in segments]
+        # Every worker then reads finished SVGs instead of rasterizing its own
+        self.warm_texts([scenes_by_name[name] for name in pending])
+        workers = self.max_workers or os.cpu_count() or 1
+        print(f"Manim code written to {self.output_file}. Rendering {len(pending)} scenes on {workers} workers...")
+
+        # Threads only wait on manim subprocesses, so the pool size bounds
+        # the number of concurrent render processes.
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self._render_segment, name, scenes_by_name[name], module_file): name
+                       for name in pending}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    segment = future.result()
+                    if name in cache_keys:
+                        segment = self._cache_put(cache_keys[name], segment)
+                    segments[name] = segment
+                    print(f"Rendered {name}")
+                except Exception as e:
+                    # Only this scene is lost, whatever went wrong (manim, templates, ffmpeg)
+                    print(f"Rendering {name} failed: {e}")
+                    continue
+                if on_segment:
+                    on_segment(class_names.index(name), segment)
+
+        return {index: segments[name] for index, name in enumerate(class_names) if name in segments}
+
+    def assemble(self, blueprint: dict, segments: dict, output_path: str = None) -> str:
+        """
+        Joins segments ({scene_index: segment_path}, as returned by
+        render_segments()) in scene order and muxes the narration.
+        Returns the narrated video path, or None if nothing rendered.
+        """
+        blueprint = as_blueprint_dict(blueprint)
+        class_names = [self._scene_class_name(i) for i in range(len(blueprint["scenes"]))]
+        return self._assemble(blueprint, class_names, {class_names[index]: segment for index, segment in segments.items()},
+                              output_path)
+
+    def render_preview(self, blueprint: dict, output_path: str = None, columns: int = 4) -> str:
+        """
+        Draft mode for layout review: renders one still per scene, showing
+        the scene as it looks once its FadeIn has finished, and tiles the
+        stills into a contact sheet. Scenes are split across a bounded pool
+        of manim processes, and each process renders its whole share of
+        scenes with -s (last frame only), so no video frames are rendered.
+        Returns the contact sheet path, or None if nothing rendered.
+        """
+        blueprint = as_blueprint_dict(blueprint)
+        stem, ext = os.path.splitext(self.output_file)
+        module_file = f"{stem}_preview{ext}"
+        self.write_manim_code(blueprint, module_file, per_scene=True, preview=True)
+
+        class_names = [self._scene_class_name(i) for i in range(len(blueprint["scenes"]))]
+        workers = min(self.max_workers or os.cpu_count() or 1, len(class_names)) or 1
+        # One manim start-up per worker instead of one per scene
+        chunks = [class_names[i::workers] for i in range(workers)]
+        self.warm_texts(blueprint["scenes"])
+        print(f"Preview code written to {module_file}. Rendering {len(class_names)} stills on {workers} workers...")
+
+        stills = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self._render_stills, chunk, module_file): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    stills.update(future.result())
+                except (subprocess.CalledProcessError, FileNotFoundError, OSError) as e:
+                    print(f"Preview of {', '.join(futures[future])} failed: {e}")
+
+        return self._contact_sheet(class_names, stills, module_file, output_path, columns)
+
+    def _render_stills(self, class_names: list, module_file: str) -> dict:
+        """
+        Saves the last frame of each Scene class in one manim run.
+        Returns {class_name: png_path} for the stills that were written.
+        """
+        cmd = self._manim_cmd(module_file, class_names, "-s")
+        with get_tracer().span("preview.stills", scenes=len(class_names)):
+            result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(result.stderr[-2000:])
+            raise subprocess.CalledProcessError(result.returncode, cmd)
+
+        stills = {}
+        for name in class_names:
+            # manim appends its version to still names, e.g. Scene0001_ManimCE_v0.18.1.png
+            pattern = os.path.join(self._image_dir(module_file), f"{name}[._]*png")
+            matches = sorted(glob.glob(pattern), key=os.path.getmtime)
+            if matches:
+                stills[name] = matches[-1]
+        return stills
+
+    def _contact_sheet(self, class_names: list, stills: dict, module_file: str,
+                       output_path: str = None, columns: int = 4) -> str:
+        ordered = [stills[name] for name in class_names if name in stills]
+        missing = [name for name in class_names if name not in stills]
+        if missing:
+            print(f"{len(missing)} still(s) missing: {', '.join(missing)}")
+        if not ordered:
+            print("No stills rendered. Preview code is saved.")
+            return None
+
+        module_name = os.path.splitext(os.path.basename(module_file))[0]
+        output_path = output_path or os.path.join("media", "previews", f"{module_name}_contact_sheet.png")
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        try:
+            contact_sheet(ordered, output_path, columns=columns)
+        except (subprocess.CalledProcessError, FileNotFoundError, OSError) as e:
+            print(f"Building the contact sheet failed (ffmpeg might not be installed): {e}")
+            print(f"Stills are in {os.path.dirname(ordered[0])}")
+            return None
+
+        print(f"Contact sheet written to {output_path}")
+        return output_path
+
+    def _lookup_cached_segments(self, blueprint: dict, class_names: list, reuse: dict = None) -> tuple[dict, dict]:
+        """
+        Splits scenes into cache hits and misses. Segments in reuse
+        ({scene_index: segment}) count as hits without a lookup.
+        Returns ({class_name: cached_segment}, {class_name: cache_key_for_miss}).
+        """
+        segments = {class_names[index]: segment for index, segment in (reuse or {}).items()}
+        cache_keys = {}
+        if self.cache is None:
+            return segments, cache_keys
+
+        style_settings = blueprint.get("style_settings", {})
+        for name, scene in zip(class_names, blueprint["scenes"]):
+            if name in segments:
+                continue
+            key = self._cache_key(scene, style_settings)
+            cached = self._cache_get(key)
+            if cached:
+                segments[name] = cached
+            else:
+                cache_keys[name] = key
+        print(f"Render cache: {len(segments)} hit(s), {len(cache_keys)} miss(es)")
+        return segments, cache_keys
+
+    def _cache_key(self, scene: dict, style_settings: dict) -> str:
+        render_view = {k: v for k, v in scene.items() if k not in CACHE_IGNORED_KEYS}
+        # Composited text looks slightly different, so keep those segments apart
+        version = RENDERER_VERSION + ("+templates" if self.templates is not None else "")
+        return self.cache.key(render_view, style_settings, self.quality, version)
+
+    def _cache_get(self, key: str) -> str:
+        # Cached segments are the files assembly reads, so they are pinned
+        # against eviction by other inserts until _release_cached()
+        self.cache.pin([key])
+        cached = self.cache.get(key)
+        if cached:
+            self._held.append(key)
+        else:
+            self.cache.unpin([key])
+        return cached
+
+    def _cache_put(self, key: str, segment: str) -> str:
+        self.cache.pin([key])
+        self._held.append(key)
+        return self.cache.put(key, segment)
+
+    def _release_cached(self):
+        held, self._held = self._held, []
+        if held:
+            self.cache.unpin(held)
+
+    def render_scene(self, index: int, scene: dict, style_settings: dict = None) -> str:
+        """
+        Renders one scene to a segment as soon as it is available, reusing
+        the render cache. Used by the streaming pipeline, which never holds
+        the whole blueprint. Returns the segment path.
+        """
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(scene, style_settings or {})
+            cached = self._cache_get(key)
+            if cached:
+                return cached
+
+        self.warm_texts([scene])
+        segment = self._render_single_scene(index, scene)
+        if key is not None:
+            segment = self._cache_put(key, segment)
+        return segment
+
+    def _render_single_scene(self, index: int, scene: dict) -> str:
+        # A standalone module per scene, so scenes can render independently
+        name = self._scene_class_name(index)
+        stem, ext = os.path.splitext(self.output_file)
+        module_file = f"{stem}_{name.lower()}{ext}"
+        def emit(emitter):
+            emitter.header()
+            emitter.class_header(name)
+            emitter.scene(index, scene, elide_hold=self.elide_holds)
+        write_code(module_file, emit)
+        return self._render_segment(name, scene, module_file)
+
+    def _render_segment(self, class_name: str, scene: dict, module_file: str) -> str:
+        if self.templates is not None and self.templates.supports(scene):
+            # Pre-rendered clip plus ffmpeg text overlays; manim only runs
+            # the first time a set of static visuals is seen
+            return self.templates.compose(self, class_name, scene, module_file)
+        segment = self._render_scene_class(class_name, module_file)
+        if self.elide_holds:
+            self._restore_holds(segment, [scene])
+        return segment
+
+    def _render_module(self) -> str:
+        """
+        The module manim renders. output_file always keeps the complete,
+        editable code; with hold elision manim renders a sibling module
+        that leaves the holds out.
+        """
+        if not self.elide_holds:
+            return self.output_file
+        stem, ext = os.path.splitext(self.output_file)
+        return f"{stem}_elided{ext}"
+
+    def _restore_holds(self, path: str, scenes: list):
+        """
+        Puts the narration holds back into a video rendered with elided
+        holds, in place and without re-encoding. Each elided scene is
+        FadeIn then FadeOut, and the first FadeOut frame is the fully
+        visible scene, so that frame is kept on screen for the scene's
+        duration. A hold is then one frame in the file instead of
+        duration x fps identical frames, and plays back the same.
+        """
+        # Half a frame past the held frame, so float rounding never moves it
+        offset = 0.5 / self._frame_rate()
+        holds = []
+        for k, scene in enumerate(scenes):
+            if scene.get("duration", 2) > 0:
+                holds.append(((2 * k + 1) * FADE_RUN_TIME + offset, scene.get("duration", 2)))
+        if not holds:
+            return
+
+        stem, ext = os.path.splitext(path)
+        tmp_path = f"{stem}.holds{ext}"
+        with get_tracer().span("holds", holds=len(holds)):
+            extend_holds(path, holds, tmp_path)
+        os.replace(tmp_path, path)
+
+    def _frame_rate(self) -> int:
+        # QUALITY_DIRS names end in the frame rate, e.g. "480p15"
+        return int(QUALITY_DIRS.get(self.quality, "480p15").split("p")[1])
+
+    def _frame_height(self) -> int:
+        # ...and start with the frame height
+        return int(QUALITY_DIRS.get(self.quality, "480p15").split("p")[0])
+
+    def _assemble(self, blueprint: dict, class_names: list, segments: dict, output_path: str = None) -> str:
+        """
+        Joins the rendered segments in scene order and muxes the narration.
+        Cached segments pinned for this render are released afterwards.
+        """
+        try:
+            return self._join_and_mux(blueprint, class_names, segments, output_path)
+        finally:
+            self._release_cached()
+
+    def _join_and_mux(self, blueprint: dict, class_names: list, segments: dict, output_path: str = None) -> str:
+        ordered = [segments[name] for name in class_names if name in segments]
+        rendered_scenes = [scene for name, scene in zip(class_names, blueprint["scenes"]) if name in segments]
+        failed = [name for name in class_names if name not in segments]
+        if failed:
+            print(f"{len(failed)} scene(s) failed: {', '.join(failed)}")
+        if not ordered:
+            print("No scenes rendered. Python scene file is saved.")
+            return None
+
+        output_path = output_path or os.path.join(self._video_dir(), "GeneratedScene.mp4")
+        silent_path = os.path.splitext(output_path)[0] + "_silent.mp4"
+        tracer = get_tracer()
+        try:
+            with tracer.span("concat", segments=len(ordered)) as span:
+                concat_segments(ordered, silent_path)
+                tracer.wrote(silent_path, span)
+            # Real segment lengths keep narration aligned with what was rendered
+            scene_lengths = [probe_duration(segment) for segment in ordered]
+        except (subprocess.CalledProcessError, FileNotFoundError, OSError) as e:
+            print(f"Concatenating segments failed (ffmpeg might not be installed): {e}")
+            return None
+
+        print(f"Rendering complete! Silent video written to {silent_path}")
+        return self.add_narration(rendered_scenes, silent_path, output_path, scene_lengths)
+
+    def add_narration(self, scenes: list, silent_path: str, output_path: str, scene_lengths: list = None) -> str:
+        """
+        Builds a single narration track from the scenes' TTS clips at their
+        scene offsets and muxes it with the silent video in one ffmpeg pass.
+        Can be re-run on its own to rebuild audio without re-rendering frames.
+        Returns the narrated video path, or the silent one if muxing fails.
+        """
+        if scene_lengths is None:
+            scene_lengths = [self.scene_length(scene) for scene in scenes]
+
+        slots = []
+        for scene, length in zip(scenes, scene_lengths):
+            clip = None
+            if scene.get("narration"):
+                try:
+                    # Prefetched clips resolve from the TTS cache index
+                    clip, _ = tts.generate_voice(scene["narration"])
+                except Exception as e:
+                    print(f"TTS Error: {e}")
+            slots.append((clip, length))
+
+        print("Muxing narration track...")
+        tracer = get_tracer()
+        try:
+            with tracer.span("mux") as span:
+                mux_narration(silent_path, slots, output_path)
+                tracer.wrote(output_path, span)
+        except (subprocess.CalledProcessError, FileNotFoundError, OSError) as e:
+            print(f"Muxing narration failed (ffmpeg might not be installed): {e}")
+            return silent_path
+
+        print(f"Video written to {output_path}")
+        return output_path
+
+    @staticmethod
+    def scene_length(scene: dict) -> float:
+        """
+        Length of a rendered scene: fade in, hold, fade out.
+        """
+        return 2 * FADE_RUN_TIME + scene.get("duration", 2)
+
+    def _render_scene_class(self, class_name: str, module_file: str = None) -> str:
+        """
+        Renders a single Scene class from the generated file and returns
+        the path of the resulting segment. The manim process's own peak
+        RSS is recorded on the span. With a memory budget, processes only
+        run side by side while their observed peaks fit it, and a process
+        whose RSS goes over the budget while it runs is killed, failing
+        its scene.
+        """
+        module_file = module_file or self.output_file
+        cmd = self._manim_cmd(module_file, [class_name])
+        tracer = get_tracer()
+        with tracer.span("render.scene", scene=class_name) as span:
+            with self._memory.admit() if self._memory else nullcontext():
+                start = time.perf_counter()
+                returncode, stderr, span["child_peak_rss_mb"], killed = run_with_peak_rss(
+                    cmd, limit_mb=self.memory_budget_mb)
+                span["subprocess_s"] = round(time.perf_counter() - start, 6)
+            tracer.count("manim_subprocess_seconds", span["subprocess_s"])
+            if self._memory and not self._memory.record(span["child_peak_rss_mb"]):
+                span["over_budget"] = True
+                tracer.count("memory_budget_exceeded")
+                if not killed: # The budget is only enforced where /proc can be sampled
+                    print(f"{class_name} peaked at {span['child_peak_rss_mb']} MB in manim "
+                          f"(budget {self.memory_budget_mb} MB)")
+            if killed:
+                span["killed"] = True
+                raise RuntimeError(f"{class_name} went over the {self.memory_budget_mb} MB memory budget "
+                                  f"in manim and was stopped")
+            if returncode != 0:
+                # Surface the tail of manim's traceback for the failing scene only
+                print(stderr[-2000:])
+                raise subprocess.CalledProcessError(returncode, cmd)
+            segment = os.path.join(self._video_dir(module_file), f"{class_name}.mp4")
+            tracer.wrote(segment, span)
+        return segment
+
+    def _manim_cmd(self, module_file: str, class_names: list, *options) -> list:
+        # python -m manim, so the manim installed for this interpreter runs
+        cmd = [sys.executable, "-m", "manim", self.quality] + list(options)
+        if self.text_cache is not None:
+            # Points manim's text_dir at the shared cache
+            cmd += ["--config_file", self.text_cache.config_file()]
+        return cmd + [module_file] + list(class_names)
+
+    def warm_texts(self, scenes: list):
+        """
+        Rasterizes the scenes' texts into the shared text cache before
+        manim starts, so concurrent renders never write the same SVG.
+        A failed warm-up only costs speed; manim rasterizes what is missing.
+        """
+        if self.text_cache is None:
+            return
+        try:
+            self.text_cache.warm(text_specs(scenes))
+        except Exception as e:
+            print(f"Text prewarm failed: {e}")
+
+    def _video_dir(self, module_file: str = None) -> str:
+        module_name = os.path.splitext(os.path.basename(module_file or self.output_file))[0]
+        return os.path.join("media", "videos", module_name, QUALITY_DIRS.get(self.quality, "480p15"))
+
+    def _image_dir(self, module_file: str = None) -> str:
+        module_name = os.path.splitext(os.path.basename(module_file or self.output_file))[0]
+        return os.path.join("media", "images", module_name)
+
+    @staticmethod
+    def _scene_class_name(index: int) -> str:
+        return f"Scene{index + 1:04d}"
+
+    def write_manim_code(self, blueprint: dict, path: str = None, per_scene: bool = False,
+                         preview: bool = False, elide_holds: bool = False):
+        """
+        Streams the generated module for a blueprint straight to disk.
+        """
+        path = path or self.output_file
+        tracer = get_tracer()
+        with tracer.span("codegen", scenes=len(blueprint["scenes"])) as span:
+            write_code(path, lambda emitter: emitter.blueprint(
+                blueprint, per_scene, self._scene_class_name, preview=preview, elide_holds=elide_holds))
+            tracer.wrote(path, span)
 
-    def _generate_manim_code(self, blueprint: dict) -> str:
-        code = "from manim import *\n\n"
-        code += "class GeneratedScene(Scene):\n"
-        code += "    def construct(self):\n"
-        
-        # Add title
-        title = blueprint.get("title", "Video")
-        
-        for i, scene in enumerate(blueprint["scenes"]):
-            code += f"        # Scene {i+1}\n"
-            
-            # Group for this scene to clean up later
-            code += f"        scene_group_{i} = VGroup()\n"
-            
-            for visual in scene["visuals"]:
-                v_type = visual["type"]
-                name = f"elem_{i}_{visual.get('type')}_{id(visual)}"
-                
-                if v_type == "text":
-                    content = visual["content"].replace('"', '\\"')
-                    code += f"        {name} = Text(\"{content}\", font_size=24)\n"
-                    if visual.get("position") == "center":
-                        code += f"        {name}.move_to(ORIGIN)\n"
-                    elif visual.get("position") == "bottom":
-                        code += f"        {name}.to_edge(DOWN)\n"
-                    code += f"        scene_group_{i}.add({name})\n"
-                    
-                elif v_type == "rectangle":
-                    code += f"        {name} = Rectangle(color={visual.get('color', 'WHITE')})\n"
-                    if visual.get("position") == "left":
-                        code += f"        {name}.shift(LEFT * 2)\n"
-                    elif visual.get("position") == "right":
-                        code += f"        {name}.shift(RIGHT * 2)\n"
-                    code += f"        scene_group_{i}.add({name})\n"
-                    
-                elif v_type == "circle":
-                    code += f"        {name} = Circle(color={visual.get('color', 'WHITE')})\n"
-                    code += f"        scene_group_{i}.add({name})\n"
-                
-                elif v_type == "arrow":
-                    code += f"        {name} = Arrow(start=LEFT, end=RIGHT)\n"
-                    code += f"        scene_group_{i}.add({name})\n"
-
-                elif v_type == "grid":
-                     code += f"        {name} = NumberPlane()\n"
-                     code += f"        scene_group_{i}.add({name})\n"
-
-            # Animation
-            code += f"        # Narration: {scene.get('narration')}\n"
-            code += f"        # self.add_sound('tts_{i}.mp3') # Placeholder for AI TTS\n"
-            code += f"        self.play(FadeIn(scene_group_{i}))\n"
-            code += f"        self.wait({scene.get('duration', 2)})\n"
-            code += f"        self.play(FadeOut(scene_group_{i}))\n\n"
-            
-        return code
+    def _generate_manim_code(self, blueprint: dict, per_scene: bool = False) -> str:
+        return code_to_string(lambda emitter: emitter.blueprint(blueprint, per_scene, self._scene_class_name))
 
 if __name__ == "__main__":
     # Test stub
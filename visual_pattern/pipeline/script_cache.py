@@ -0,0 +1,49 @@
+import hashlib
+import json
+import os
+import threading
+
+SCRIPTS_DIR = "media/scripts"
+
+class ScriptCache:
+    """
+    On-disk store of generated scripts, one JSON file per response.
+    Keys are hashes of (topic, prompt version, backend, model), so a topic
+    that was already generated with the same prompt and model is answered
+    from disk, while a prompt or model change regenerates it. Files are
+    written atomically, so concurrent runs can share one directory.
+    """
+
+    def __init__(self, cache_dir=SCRIPTS_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(topic: str, prompt_version: str, backend: str, model: str) -> str:
+        payload = json.dumps([topic, prompt_version, backend, model], separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> dict:
+        """
+        Returns the cached script for key, or None on a miss.
+        """
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)["script"]
+        except (FileNotFoundError, ValueError, KeyError):
+            # A missing or unreadable entry is simply regenerated
+            return None
+
+    def put(self, key: str, script: dict, **meta):
+        """
+        Stores a script. meta (topic, model, ...) is kept alongside it so
+        entries can be inspected by hand.
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({**meta, "script": script}, f, indent=2)
+        os.replace(tmp_path, path)
@@ -1,50 +1,255 @@
+import asyncio
 import json
+import os
 import random
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline.script_cache import ScriptCache
+from pipeline.tracing import get_tracer
+
+# Bump when the prompt or the expected response changes; scripts cached
+# under an older version are then generated again
+PROMPT_VERSION = "1"
+PROMPT_TEMPLATE = (
+    "Write a four scene explainer video script about {topic}. "
+    "Reply with JSON only: {{\"title\": str, \"scenes\": [{{\"id\": int, "
+    "\"type\": \"intro\" | \"concept\" | \"explanation\" | \"outro\", "
+    "\"text\": narration, \"visual_concept\": short visual description}}]}}."
+)
+
+DEFAULT_SCRIPT_URL = "http://127.0.0.1:8765/generate"
+
+def build_prompt(topic: str) -> str:
+    return PROMPT_TEMPLATE.format(topic=topic)
+
+def mock_script(topic: str) -> dict:
+    """
+    The canned four-scene script used offline and by the stand-in server.
+    """
+    return {
+        "title": f"The Fundamentals of {topic}",
+        "scenes": [
+            {
+                "id": 1,
+                "type": "intro",
+                "text": f"Welcome to our quick guide on {topic}.",
+                "visual_concept": "Title card with smooth fade in"
+            },
+            {
+                "id": 2,
+                "type": "concept",
+                "text": f"At its core, {topic} is about connecting the dots.",
+                "visual_concept": "Flowchart nodes connecting"
+            },
+            {
+                "id": 3,
+                "type": "explanation",
+                "text": "It simplifies complex workflows into manageable steps.",
+                "visual_concept": "Complex mesh simplifying into a straight line"
+            },
+            {
+                "id": 4,
+                "type": "outro",
+                "text": f"And that's the basic idea behind {topic}. Thanks for watching.",
+                "visual_concept": "End screen with logo"
+            }
+        ]
+    }
+
+def validate_script(script) -> dict:
+    """
+    Checks a backend response has the shape the blueprint stage expects,
+    so a malformed response fails here instead of being cached.
+    """
+    if not isinstance(script, dict) or not isinstance(script.get("scenes"), list) or not script["scenes"]:
+        raise ValueError("script response has no scenes")
+    if not isinstance(script.get("title"), str):
+        raise ValueError("script response has no title")
+    for k, scene in enumerate(script["scenes"]):
+        if not isinstance(scene, dict) or not scene.get("text"):
+            raise ValueError(f"script scene {k + 1} has no narration text")
+        if scene.get("id") is None:
+            raise ValueError(f"script scene {k + 1} has no id")
+        # A diagram replaces the rule-table visuals, and with them the concept
+        if not scene.get("diagram") and not isinstance(scene.get("visual_concept"), str):
+            raise ValueError(f"script scene {k + 1} has no visual_concept")
+    return script
+
+class ScriptBackend:
+    """
+    Base class for script generators. Subclasses implement complete(),
+    a blocking call that returns the script for one topic. Batched
+    requests run it on worker threads, at most max_concurrency at once.
+    """
+    name = "base"
+    model = "none"
+
+    def __init__(self, max_concurrency=4):
+        self.max_concurrency = max_concurrency
+
+    def complete(self, topic: str, prompt: str) -> dict:
+        raise NotImplementedError
+
+class MockBackend(ScriptBackend):
+    """
+    Canned scripts with no network, after an optional simulated latency.
+    """
+    name = "mock"
+    model = "mock-1"
+
+    def __init__(self, latency=0.0, max_concurrency=8):
+        super().__init__(max_concurrency)
+        self.latency = latency
+
+    def complete(self, topic: str, prompt: str) -> dict:
+        time.sleep(self.latency)
+        return mock_script(topic)
+
+class HTTPBackend(ScriptBackend):
+    """
+    A script service over HTTP. Each topic is a JSON POST of
+    {"model", "prompt_version", "topic", "prompt"} answered with the
+    script JSON. pipeline.script_server is a local stand-in for tests.
+    """
+    name = "http"
+
+    def __init__(self, url=None, model="default", timeout=120, max_concurrency=4, api_key=None):
+        super().__init__(max_concurrency)
+        self.url = url or os.environ.get("SCRIPT_BACKEND_URL", DEFAULT_SCRIPT_URL)
+        self.model = model
+        self.timeout = timeout
+        self.api_key = api_key or os.environ.get("SCRIPT_BACKEND_KEY")
+
+    def complete(self, topic: str, prompt: str) -> dict:
+        body = json.dumps({"model": self.model, "prompt_version": PROMPT_VERSION,
+                           "topic": topic, "prompt": prompt}).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+        # Non-2xx replies raise HTTPError, which the caller retries
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.load(response)
+
+BACKENDS = {
+    "mock": MockBackend,
+    "http": HTTPBackend,
+}
 
 class ScriptGenerator:
-    def __init__(self):
-        # In a real system, this would be an LLM client
-        pass
+    """
+    Turns topics into scripts through a pluggable backend.
+    Responses are memoized in an optional ScriptCache, so a topic is only
+    sent to the backend once per prompt version and model. Uncached topics
+    are requested concurrently, up to the backend's limit, and failed
+    requests are retried with exponential backoff.
+    """
+
+    def __init__(self, backend: ScriptBackend = None, cache: ScriptCache = None, retries=3, backoff=0.5):
+        self.backend = backend or MockBackend()
+        self.cache = cache
+        self.retries = retries
+        self.backoff = backoff
 
     def generate_script(self, topic: str) -> dict:
         """
         Generates a script for a video based on the given topic.
-        Returns a dictionary with 'title', 'narration', and 'scenes'.
+        Returns a dictionary with 'title' and 'scenes'.
         """
         print(f"Generating script for topic: {topic}...")
-        
-        # Mock AI generation logic
-        script = {
-            "title": f"The Fundamentals of {topic}",
-            "scenes": [
-                {
-                    "id": 1,
-                    "type": "intro",
-                    "text": f"Welcome to our quick guide on {topic}.",
-                    "visual_concept": "Title card with smooth fade in"
-                },
-                {
-                    "id": 2,
-                    "type": "concept",
-                    "text": f"At its core, {topic} is about connecting the dots.",
-                    "visual_concept": "Flowchart nodes connecting"
-                },
-                {
-                    "id": 3,
-                    "type": "explanation",
-                    "text": "It simplifies complex workflows into manageable steps.",
-                    "visual_concept": "Complex mesh simplifying into a straight line"
-                },
-                {
-                    "id": 4,
-                    "type": "outro",
-                    "text": f"And that's the basic idea behind {topic}. Thanks for watching.",
-                    "visual_concept": "End screen with logo"
-                }
-            ]
-        }
-        
-        return script
+        result = self._generate([topic])[topic]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def generate_scripts(self, topics: list) -> dict:
+        """
+        Generates scripts for many topics in one batch. Wall time is
+        bounded by the concurrency limit rather than the sum of latencies.
+        Returns: {topic: script} for the topics that succeeded.
+        """
+        unique_topics = list(dict.fromkeys(topics))
+        print(f"Generating {len(unique_topics)} scripts with {self.backend.name} "
+              f"({self.backend.max_concurrency} concurrent)...")
+        scripts = {}
+        for topic, result in self._generate(unique_topics).items():
+            if isinstance(result, Exception):
+                print(f"Script failed for '{topic[:30]}': {result}")
+            else:
+                scripts[topic] = result
+        return scripts
+
+    def _cache_key(self, topic: str) -> str:
+        return ScriptCache.key(topic, PROMPT_VERSION, self.backend.name, self.backend.model)
+
+    def _generate(self, topics: list) -> dict:
+        """
+        Returns {topic: script or the exception that ended its retries}.
+        """
+        results = {}
+        misses = []
+        for topic in topics:
+            cached = self.cache.get(self._cache_key(topic)) if self.cache else None
+            if cached is not None:
+                try:
+                    # Entries cached before a check existed are requested again
+                    validate_script(cached)
+                except ValueError:
+                    cached = None
+            if cached is not None:
+                get_tracer().count("script_cache_hits")
+                results[topic] = cached
+            else:
+                misses.append(topic)
+        if misses:
+            get_tracer().count("script_cache_misses", len(misses))
+            results.update(zip(misses, asyncio.run(self._fetch_all(misses))))
+        return results
+
+    async def _fetch_all(self, topics: list) -> list:
+        workers = max(self.backend.max_concurrency, 1)
+        slots = asyncio.Semaphore(workers)
+        loop = asyncio.get_running_loop()
+
+        async def fetch(topic):
+            for attempt in range(self.retries + 1):
+                try:
+                    # The slot is only held for the request, not the backoff
+                    async with slots:
+                        script = await loop.run_in_executor(pool, self._request, topic, attempt)
+                    if self.cache:
+                        self.cache.put(self._cache_key(topic), script, topic=topic,
+                                       backend=self.backend.name, model=self.backend.model,
+                                       prompt_version=PROMPT_VERSION)
+                    return script
+                except Exception as e:
+                    if attempt == self.retries:
+                        return e
+                    # Jitter keeps a batch of failed requests from retrying in lockstep
+                    delay = self.backoff * (2 ** attempt) * random.uniform(0.8, 1.2)
+                    get_tracer().count("script_retries")
+                    print(f"Script attempt {attempt + 1} failed for '{topic[:30]}': {e}. Retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return await asyncio.gather(*(fetch(topic) for topic in topics))
+
+    def _request(self, topic: str, attempt: int) -> dict:
+        # Runs on a pool thread, so the span nests correctly under the tracer
+        with get_tracer().span("script.request", backend=self.backend.name, attempt=attempt + 1):
+            return validate_script(self.backend.complete(topic, build_prompt(topic)))
+
+    def stream_script(self, topic: str):
+        """
+        Yields the script's scenes one at a time so downstream stages can
+        start on scene 1 before the rest of the script exists.
+        """
+        # Backends return whole scripts; a streaming backend would yield
+        # scenes as they are parsed from its response.
+        for scene in self.generate_script(topic)["scenes"]:
+            yield scene
 
 if __name__ == "__main__":
     gen = ScriptGenerator()
@@ -0,0 +1,84 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pipeline.script_gen import mock_script
+
+class ScriptRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answers HTTPBackend requests with the canned mock script after the
+    server's latency, failing a share of them with 503 to exercise retries.
+    """
+
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                topic = json.loads(self.rfile.read(length))["topic"]
+            except (ValueError, KeyError, TypeError):
+                self._reply(400, {"error": "expected a JSON body with a topic"})
+                return
+
+            time.sleep(server.latency)
+            if random.random() < server.failure_rate:
+                self._reply(503, {"error": "simulated overload"})
+                return
+            self._reply(200, mock_script(topic))
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _reply(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # One line per request drowns out the pipeline's own output
+
+def serve(host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0) -> ThreadingHTTPServer:
+    """
+    Starts the stand-in server on a background thread and returns it.
+    Port 0 picks a free port; the URL is f"http://{host}:{server.server_port}/generate".
+    The server counts requests and the peak number served at once.
+    """
+    server = ThreadingHTTPServer((host, port), ScriptRequestHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.failure_rate = failure_rate
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.in_flight = 0
+    server.peak_in_flight = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the script generation service")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds each request takes")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.latency, args.failure_rate)
+    print(f"Script server listening on http://{args.host}:{server.server_port}/generate")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
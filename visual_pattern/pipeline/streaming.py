@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+
+from pipeline import tts
+from pipeline.blueprint_gen import BlueprintGenerator
+from pipeline.blueprint_model import SceneSpec
+from pipeline.script_gen import ScriptGenerator
+from pipeline.tracing import get_tracer
+
+_DONE = object() # End-of-stream marker passed between stages
+
+class StreamingPipeline:
+    """
+    Moves scenes through script -> tts -> blueprint -> render one at a
+    time instead of running each stage over the whole video. Stages are
+    connected by bounded queues, so a slow stage applies backpressure
+    upstream and only a handful of scenes are in flight at once. Scene 1
+    can be rendering while scene 5's narration is still being synthesized.
+    """
+
+    def __init__(self, renderer, script_gen=None, blueprint_gen=None,
+                 queue_size=4, tts_workers=4, render_workers=2, packager=None):
+        self.renderer = renderer
+        self.script_gen = script_gen or ScriptGenerator()
+        self.blueprint_gen = blueprint_gen or BlueprintGenerator()
+        self.queue_size = queue_size
+        self.tts_workers = tts_workers
+        self.render_workers = render_workers
+        self.packager = packager # Optional HLSPackager fed each segment as it finishes
+
+    def run(self, topic: str, style_profile: dict = None, output_path: str = None, on_segment=None) -> str:
+        """
+        Streams a topic to a finished video. on_segment(index, path) is
+        called as each scene's segment becomes ready.
+        Returns the final video path, or None if nothing rendered.
+        """
+        start = time.time()
+        style = self.blueprint_gen.resolve_style(style_profile)
+        scripts = queue.Queue(self.queue_size)
+        voiced = queue.Queue(self.queue_size)
+        planned = queue.Queue(self.queue_size)
+        rendered = queue.Queue(self.queue_size)
+
+        def voice(index, scene):
+            # Warms the TTS cache so blueprinting picks up the real duration
+            try:
+                tts.generate_voice_with_retry(scene["text"])
+            except Exception as e:
+                # Keep the scene; blueprinting falls back to the estimated duration
+                print(f"TTS Error for scene {index + 1}, using the estimated duration: {e}")
+            return scene
+
+        def plan(index, scene):
+            bp_scene = self.blueprint_gen.create_scene(scene, style)
+            # Scenes never form a whole Blueprint here, so each is validated on its own
+            SceneSpec.from_dict(bp_scene, f"scenes[{index}]")
+            if self.packager:
+                self.packager.plan(index, bp_scene)
+            return bp_scene
+
+        def render(index, bp_scene):
+            return bp_scene, self.renderer.render_scene(index, bp_scene, style)
+
+        threads = [threading.Thread(target=self._produce, args=(topic, scripts), daemon=True)]
+        threads += self._stage("tts", voice, scripts, voiced, self.tts_workers)
+        threads += self._stage("blueprint", plan, voiced, planned, 1)
+        threads += self._stage("render", render, planned, rendered, self.render_workers)
+        for thread in threads:
+            thread.start()
+
+        # Only the finished scene dicts and segment paths are kept
+        finished = {}
+        while True:
+            item = rendered.get()
+            if item is _DONE:
+                break
+            index, (bp_scene, segment) = item
+            if not finished:
+                print(f"First segment ready after {time.time() - start:.2f}s")
+                get_tracer().attrs["first_segment_s"] = round(time.time() - start, 3)
+            finished[index] = (bp_scene, segment)
+            if self.packager:
+                self.packager.add(index, segment, bp_scene)
+            if on_segment:
+                on_segment(index, segment)
+
+        if self.packager:
+            self.packager.finish()
+        order = sorted(finished)
+        blueprint = {
+            "title": topic,
+            "style_settings": style,
+            "scenes": [finished[i][0] for i in order],
+        }
+        class_names = [self.renderer._scene_class_name(i) for i in order]
+        segments = {name: finished[i][1] for name, i in zip(class_names, order)}
+        print(f"Streamed {len(order)} scenes in {time.time() - start:.2f}s")
+        return self.renderer._assemble(blueprint, class_names, segments, output_path)
+
+    def _produce(self, topic: str, outbox: queue.Queue):
+        try:
+            for index, scene in enumerate(self.script_gen.stream_script(topic)):
+                outbox.put((index, scene))
+        except Exception as e:
+            print(f"Script stage failed: {e}")
+        finally:
+            outbox.put(_DONE)
+
+    def _stage(self, name: str, fn, inbox: queue.Queue, outbox: queue.Queue, workers: int) -> list:
+        """
+        Starts worker threads applying fn(index, item) from inbox to outbox.
+        A failing scene is reported and dropped; the stream keeps going.
+        The last worker to finish forwards the end-of-stream marker.
+        """
+        remaining = [max(workers, 1)]
+        lock = threading.Lock()
+
+        def loop():
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    # Let sibling workers see the marker too
+                    inbox.put(_DONE)
+                    break
+                index, payload = item
+                try:
+                    # Span excludes the wait on a full outbox
+                    with get_tracer().span(f"stream.{name}", scene=index + 1):
+                        result = fn(index, payload)
+                    outbox.put((index, result))
+                except Exception as e:
+                    print(f"{name} stage failed for scene {index + 1}: {e}")
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    outbox.put(_DONE)
+
+        return [threading.Thread(target=loop, daemon=True) for _ in range(max(workers, 1))]
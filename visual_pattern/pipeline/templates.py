@@ -0,0 +1,134 @@
+import hashlib
+import os
+import threading
+
+from pipeline.codegen import FADE_RUN_TIME, write_code
+from pipeline.ffmpeg import compose_template
+from pipeline.render_cache import RenderCache
+from pipeline.renderer import RENDERER_VERSION
+from pipeline.tracing import get_tracer
+
+TEMPLATES_DIR = "media/templates"
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2 # 512 MB
+
+# Visual types a template clip can hold; anything else goes to manim
+STATIC_TYPES = {"rectangle", "circle", "arrow", "grid", "graph"}
+
+# Approximates manim's Text(font_size=24) as a fraction of frame height
+TEXT_HEIGHT_RATIO = 1 / 16
+# to_edge(DOWN) leaves a 0.5 unit margin on an 8 unit tall frame
+BOTTOM_MARGIN_RATIO = 0.5 / 8
+
+class TemplateLibrary:
+    """
+    Pre-rendered template clips for the visuals that recur in nearly
+    every video (grids, the two-box flowchart, title and end cards).
+    A clip holds a scene's static visuals fading in and back out, and is
+    keyed by those visuals, the quality and the renderer version only.
+    The same clip therefore serves every scene that shows them, whatever
+    the narration or duration. Per-scene text is drawn on top with ffmpeg
+    and the hold is cloned from the clip's fully visible frame, so once a
+    template is rendered, scenes that use it never start manim.
+    """
+
+    def __init__(self, templates_dir=TEMPLATES_DIR, max_bytes=DEFAULT_MAX_BYTES, fontfile=None):
+        self.templates_dir = templates_dir
+        self.store = RenderCache(os.path.join(templates_dir, "clips"), max_bytes)
+        self.fontfile = fontfile # drawtext falls back to fontconfig's default font
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    @staticmethod
+    def split(scene: dict) -> tuple[list, list]:
+        """
+        Splits a scene's visuals into (static visuals, text overlays).
+        """
+        static = [v for v in scene["visuals"] if v["type"] != "text"]
+        texts = [v for v in scene["visuals"] if v["type"] == "text"]
+        return static, texts
+
+    def supports(self, scene: dict) -> bool:
+        return all(v["type"] in STATIC_TYPES or v["type"] == "text" for v in scene["visuals"])
+
+    def compose(self, renderer, class_name: str, scene: dict, module_file: str) -> str:
+        """
+        Renders a scene segment from its template clip plus text overlays.
+        Returns the segment path, in the same place manim would write it.
+        """
+        static, texts = self.split(scene)
+        clip = self.clip(renderer, static)
+        fps = renderer._frame_rate()
+        height = renderer._frame_height()
+
+        output_path = os.path.join(renderer._video_dir(module_file), f"{class_name}.mp4")
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        overlays = [self._overlay(text, height) for text in texts]
+        with get_tracer().span("template.compose", scene=class_name, overlays=len(overlays)) as span:
+            compose_template(clip, overlays, FADE_RUN_TIME, scene.get("duration", 2), fps, output_path)
+            get_tracer().wrote(output_path, span)
+        return output_path
+
+    def clip(self, renderer, static: list) -> str:
+        """
+        Returns the template clip for a set of static visuals, rendering
+        it with manim on first use. Concurrent requests for the same clip
+        wait for a single render.
+        """
+        key = self.store.key({"visuals": static}, {}, renderer.quality, RENDERER_VERSION)
+        with self._lock_for(key):
+            cached = self.store.get(key)
+            if cached:
+                get_tracer().count("template_hits")
+                return cached
+
+            get_tracer().count("template_misses")
+            print(f"Rendering template clip {key[:12]}...")
+            module_file = os.path.join(self.templates_dir, "src", f"template_{key[:16]}.py")
+            os.makedirs(os.path.dirname(module_file), exist_ok=True)
+            template_scene = {"visuals": static, "duration": 0, "narration": None}
+
+            def emit(emitter):
+                emitter.header()
+                emitter.class_header("TemplateClip")
+                emitter.scene(0, template_scene, elide_hold=True)
+            write_code(module_file, emit)
+            return self.store.put(key, renderer._render_scene_class("TemplateClip", module_file))
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _overlay(self, text: dict, height: int) -> dict:
+        """
+        drawtext options for one text visual. The text goes through a file
+        so narration never needs filter-graph escaping.
+        """
+        options = {}
+        if self.fontfile:
+            options["fontfile"] = _filter_value(self.fontfile)
+        options["textfile"] = _filter_value(self._text_file(text["content"]))
+        options["fontsize"] = round(height * TEXT_HEIGHT_RATIO)
+        options["fontcolor"] = "white"
+        options["x"] = "(w-text_w)/2"
+        if text.get("position") == "bottom":
+            options["y"] = f"h-text_h-{round(height * BOTTOM_MARGIN_RATIO)}"
+        else:
+            # manim's Text starts at ORIGIN, so anything else is centred
+            options["y"] = "(h-text_h)/2"
+        return options
+
+    def _text_file(self, content: str) -> str:
+        # Content-addressed, so repeated lines share one file
+        text_dir = os.path.join(self.templates_dir, "text")
+        os.makedirs(text_dir, exist_ok=True)
+        path = os.path.join(text_dir, hashlib.sha256(content.encode()).hexdigest() + ".txt")
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return path
+
+def _filter_value(path: str) -> str:
+    # Quoted filter-graph value; forward slashes keep Windows paths parseable
+    return "'" + path.replace("\\", "/").replace("'", "'\\''") + "'"
@@ -0,0 +1,192 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from importlib import metadata
+
+from pipeline.blueprint_model import Blueprint
+from pipeline.codegen import TEXT_FONT_SIZE
+from pipeline.tracing import get_tracer
+
+# manim's own default text_dir ({media_dir}/texts with media_dir "./media")
+TEXTS_DIR = "media/texts"
+CONFIG_NAME = "manim.cfg"
+
+# manim's config is process-global, so warming is serialized per process
+_warm_lock = threading.Lock()
+
+def text_specs(scenes: list) -> list:
+    """
+    The (text, font_size) pairs manim rasterizes for these blueprint
+    scenes, in the same form CodeEmitter and the interpreter create them.
+    """
+    specs = []
+    for scene in scenes:
+        for visual in scene["visuals"]:
+            if visual["type"] == "text":
+                specs.append((visual["content"], TEXT_FONT_SIZE))
+            elif visual["type"] == "graph":
+                specs += [(node["label"], visual.get("font_size", TEXT_FONT_SIZE))
+                          for node in visual["nodes"] if node.get("label")]
+    return list(dict.fromkeys(specs))
+
+def manim_version() -> str:
+    # Read from package metadata so a warm cache is checked without importing manim
+    try:
+        return metadata.version("manim")
+    except metadata.PackageNotFoundError:
+        return None
+
+class TextCache:
+    """
+    Shared directory of manim's rasterized Text SVGs for every renderer,
+    worker process and template clip. manim writes an SVG in place the
+    first time it meets a text, so concurrent renders can read each
+    other's half-written files. Here texts are rasterized ahead of the
+    render instead: each warm() call writes into a private staging
+    directory and publishes finished SVGs with an atomic rename. Readers
+    therefore only ever see complete files.
+    A SQLite index (WAL, like AudioCache) maps each text, size and manim
+    version to its SVGs, so a warm cache is confirmed without importing
+    manim at all.
+    """
+
+    def __init__(self, text_dir=TEXTS_DIR):
+        self.text_dir = os.path.abspath(text_dir)
+        self.index_path = os.path.join(self.text_dir, "index.sqlite")
+        self._local = threading.local()
+        os.makedirs(self.text_dir, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS texts ("
+                " key TEXT PRIMARY KEY,"
+                " files TEXT NOT NULL,"
+                " created REAL NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite connections must not cross threads or forked processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.index_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def key(text: str, font_size, version: str) -> str:
+        payload = json.dumps([text, font_size, version], separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def missing(self, specs: list) -> list:
+        """
+        The specs whose SVGs are not all in the shared directory yet.
+        """
+        version = manim_version()
+        keys = {self.key(text, size, version): (text, size) for text, size in specs}
+        found = {}
+        key_list = list(keys)
+        with self._conn() as conn:
+            # Chunked to stay under sqlite's bound-parameter limit
+            for start in range(0, len(key_list), 500):
+                chunk = key_list[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, files FROM texts WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update(rows)
+        return [spec for key, spec in keys.items()
+                if key not in found or not all(os.path.exists(os.path.join(self.text_dir, name))
+                                               for name in json.loads(found[key]))]
+
+    def warm(self, specs: list) -> int:
+        """
+        Rasterizes the specs that are not cached yet and publishes them.
+        Returns how many were rasterized. Does nothing, and never imports
+        manim, when every spec is already cached.
+        """
+        pending = self.missing(specs)
+        get_tracer().count("text_cache_hits", len(specs) - len(pending))
+        if not pending:
+            return 0
+        try:
+            from pipeline.interpreter import load_manim
+            m = load_manim()
+        except ImportError as e:
+            print(f"Text prewarm skipped (Manim might not be installed): {e}")
+            return 0
+
+        warmed = 0
+        version = manim_version()
+        with _warm_lock, get_tracer().span("text.warm", texts=len(pending)) as span:
+            staging = tempfile.mkdtemp(prefix=".staging-", dir=self.text_dir)
+            try:
+                with m.tempconfig({"text_dir": staging}):
+                    for text, size in pending:
+                        try:
+                            m.Text(text, font_size=size)
+                        except Exception as e:
+                            print(f"Rasterizing '{text[:20]}' failed: {e}")
+                            continue
+                        names = sorted(os.listdir(staging))
+                        for name in names:
+                            # Same name means same content, so a concurrent publish is harmless
+                            os.replace(os.path.join(staging, name), os.path.join(self.text_dir, name))
+                        with self._conn() as conn:
+                            conn.execute("INSERT OR REPLACE INTO texts VALUES (?, ?, ?)",
+                                         (self.key(text, size, version), json.dumps(names), time.time()))
+                        warmed += 1
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+            span["warmed"] = warmed
+        get_tracer().count("text_cache_misses", warmed)
+        return warmed
+
+    def config_file(self) -> str:
+        """
+        A manim.cfg pointing text_dir at this cache, for manim subprocesses
+        (manim --config_file). Rewritten only when it changes.
+        """
+        path = os.path.join(self.text_dir, CONFIG_NAME)
+        content = f"[CLI]\ntext_dir = {self.text_dir}\n"
+        try:
+            with open(path) as f:
+                if f.read() == content:
+                    return path
+        except FileNotFoundError:
+            pass
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-rasterize the texts of saved blueprints into the shared text cache")
+    parser.add_argument("blueprints", nargs="+", help="Blueprint files (.json or binary, as written by --save-blueprint)")
+    parser.add_argument("--text-dir", type=str, default=TEXTS_DIR)
+    args = parser.parse_args()
+
+    specs = []
+    for path in args.blueprints:
+        if path.endswith(".json"):
+            with open(path) as f:
+                blueprint = Blueprint.from_dict(json.load(f))
+        else:
+            blueprint = Blueprint.load(path)
+        specs += text_specs(blueprint.to_dict()["scenes"])
+    specs = list(dict.fromkeys(specs))
+
+    cache = TextCache(args.text_dir)
+    warmed = cache.warm(specs)
+    print(f"{len(specs)} texts: {warmed} rasterized, {len(specs) - warmed} already cached")
+    print(f"Render hand-written scenes against it with: manim --config_file {cache.config_file()} ...")
+
+if __name__ == "__main__":
+    main()
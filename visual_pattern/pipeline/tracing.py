@@ -0,0 +1,255 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError: # Not available on Windows; peak RSS is then omitted
+    resource = None
+
+METRICS_DIR = "media/metrics"
+METRIC_PREFIX = "visual_pattern"
+
+def peak_rss_mb(children: bool = False) -> float:
+    """
+    Peak resident set size of this process (or of its finished child
+    processes, e.g. manim) in MB, or None where it cannot be read.
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss * scale / (1024 * 1024), 1)
+
+class Tracer:
+    """
+    Records timed spans and counters for one pipeline run.
+    Each span stores wall time, CPU time of the thread that ran it, peak
+    RSS at its end and any attributes set on it while it was open. Spans
+    opened inside another span on the same thread record it as parent.
+    A disabled tracer keeps the same API but records nothing, so library
+    code can trace unconditionally.
+    """
+
+    def __init__(self, enabled: bool = True, profile_dir: str = None):
+        self.enabled = enabled
+        self.profile_dir = profile_dir # Set to wrap stages in cProfile
+        self.spans = []
+        self.counters = {}
+        self.attrs = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._next_id = 0
+        self._profiling = False
+        self._started = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """
+        Times the enclosed block. Yields the span record; keys set on it
+        are stored as attributes, and its timings can be read after the block.
+        """
+        if not self.enabled:
+            yield {}
+            return
+
+        stack = self._stack()
+        with self._lock:
+            span_id = self._next_id
+            self._next_id += 1
+        record = {
+            "name": name,
+            "id": span_id,
+            "parent": stack[-1] if stack else None,
+            "thread": threading.current_thread().name,
+            **attrs,
+        }
+        stack.append(span_id)
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        try:
+            yield record
+        except BaseException as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            record["start_s"] = round(wall0 - self._t0, 6)
+            record["wall_s"] = round(time.perf_counter() - wall0, 6)
+            record["cpu_s"] = round(time.thread_time() - cpu0, 6)
+            record["peak_rss_mb"] = peak_rss_mb()
+            with self._lock:
+                self.spans.append(record)
+
+    @contextmanager
+    def stage(self, name: str, **attrs):
+        """
+        A top-level pipeline stage: a span that is also profiled with
+        cProfile when profile_dir is set. Only the calling thread is
+        profiled, and nested stages fold into the outer profile.
+        """
+        with self.span(name, **attrs) as span:
+            if not self.enabled or self.profile_dir is None or self._profiling:
+                yield span
+                return
+
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError: # Another profiler (e.g. a debugger) is active
+                yield span
+                return
+            self._profiling = True
+            try:
+                yield span
+            finally:
+                profiler.disable()
+                self._profiling = False
+                span["profile"] = self._dump_profile(name, profiler)
+
+    def _dump_profile(self, name: str, profiler) -> str:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"{_metric_name(name)}.prof")
+        profiler.dump_stats(path)
+        # A readable summary next to the binary stats (open those with snakeviz/pstats)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(25)
+        with open(os.path.splitext(path)[0] + ".txt", "w") as f:
+            f.write(out.getvalue())
+        return path
+
+    def count(self, name: str, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def wrote(self, path: str, span: dict = None) -> int:
+        """
+        Counts a file this run wrote toward bytes_written and, if given,
+        the span's own "bytes" attribute. Returns the file size.
+        """
+        if not self.enabled or not path or not os.path.exists(path):
+            return 0
+        size = os.path.getsize(path)
+        self.count("bytes_written", size)
+        if span is not None:
+            span["bytes"] = span.get("bytes", 0) + size
+        return size
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def report(self) -> dict:
+        """
+        The run summary: totals, per-name aggregates, counters and spans.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start_s"])
+            counters = dict(self.counters)
+
+        stages = {}
+        for span in spans:
+            agg = stages.setdefault(span["name"], {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_wall_s": 0.0})
+            agg["count"] += 1
+            agg["wall_s"] = round(agg["wall_s"] + span["wall_s"], 6)
+            agg["cpu_s"] = round(agg["cpu_s"] + span["cpu_s"], 6)
+            agg["max_wall_s"] = max(agg["max_wall_s"], span["wall_s"])
+
+        return {
+            "run": {
+                "started": self._started.isoformat(),
+                "wall_s": round(time.perf_counter() - self._t0, 6),
+                "cpu_s": round(time.process_time() - self._cpu0, 6),
+                "peak_rss_mb": peak_rss_mb(),
+                "children_peak_rss_mb": peak_rss_mb(children=True),
+                **self.attrs,
+            },
+            "stages": stages,
+            "counters": counters,
+            "spans": spans,
+        }
+
+    def write(self, path: str) -> str:
+        """
+        Writes the report as JSON, or as OpenMetrics text when path ends
+        in .prom or .txt. Written atomically; returns path.
+        """
+        report = self.report()
+        if path.endswith((".prom", ".txt")):
+            text = to_openmetrics(report)
+        else:
+            text = json.dumps(report, indent=2)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        print(f"Metrics written to {path}")
+        return path
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def to_openmetrics(report: dict) -> str:
+    """
+    Renders a report in the OpenMetrics text format: span time as
+    summaries labelled by span name, counters as counters and run totals
+    as gauges. Individual spans are only kept in the JSON form.
+    """
+    p = METRIC_PREFIX
+    lines = []
+    for metric, field, help_text in (
+        ("span_seconds", "wall_s", "Wall time spent in spans"),
+        ("span_cpu_seconds", "cpu_s", "CPU time spent in spans"),
+    ):
+        lines.append(f"# TYPE {p}_{metric} summary")
+        lines.append(f"# HELP {p}_{metric} {help_text}.")
+        for name, agg in report["stages"].items():
+            lines.append(f'{p}_{metric}_sum{{span="{_label(name)}"}} {agg[field]}')
+            lines.append(f'{p}_{metric}_count{{span="{_label(name)}"}} {agg["count"]}')
+
+    for name, value in report["counters"].items():
+        metric = f"{p}_{_metric_name(name)}"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}_total {value}")
+
+    run = report["run"]
+    for metric, value in (
+        ("run_wall_seconds", run["wall_s"]),
+        ("run_cpu_seconds", run["cpu_s"]),
+        ("peak_rss_megabytes", run["peak_rss_mb"]),
+        ("children_peak_rss_megabytes", run["children_peak_rss_mb"]),
+    ):
+        if value is not None:
+            lines.append(f"# TYPE {p}_{metric} gauge")
+            lines.append(f"{p}_{metric} {value}")
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+_tracer = Tracer(enabled=False)
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+def set_tracer(tracer: Tracer) -> Tracer:
+    global _tracer
+    _tracer = tracer
+    return tracer
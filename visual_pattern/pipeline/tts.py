@@ -1,41 +1,244 @@
 import os
-from gtts import gTTS
-from mutagen.mp3 import MP3
-import hashlib
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pipeline.audio_cache import AudioCache
+from pipeline.tracing import get_tracer
 
-TEXTS_DIR = "media/texts"
 AUDIO_DIR = "media/audio"
 
+# Typical narration pace used when no real audio is available yet
+WORDS_PER_MINUTE = 150
+
 def ensure_dirs():
-    os.makedirs(TEXTS_DIR, exist_ok=True)
     os.makedirs(AUDIO_DIR, exist_ok=True)
 
-def generate_voice(text: str, filename_prefix="tts") -> tuple[str, float]:
+def estimate_duration(text: str, words_per_minute=WORDS_PER_MINUTE) -> float:
+    """
+    Fast text-based estimate of how long a line takes to speak.
+    Adds short pauses for sentence breaks and commas.
+    """
+    words = len(text.split())
+    sentence_breaks = sum(text.count(c) for c in ".!?")
+    commas = text.count(",") + text.count(";")
+    seconds = words * 60.0 / words_per_minute + 0.3 * sentence_breaks + 0.15 * commas
+    return round(max(seconds, 0.5), 2)
+
+class TTSBackend:
+    """
+    Base class for speech engines. Subclasses implement synthesize().
+    Each backend owns a semaphore so every caller sharing it respects the
+    same concurrency limit (e.g. to stay under a service's rate limit).
+    """
+    name = "base"
+    extension = "mp3"
+    voice = "default"
+
+    def __init__(self, max_concurrency=4):
+        self.max_concurrency = max_concurrency
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+
+    def synthesize(self, text: str, path: str, lang: str = "en"):
+        raise NotImplementedError
+
+class GTTSBackend(TTSBackend):
+    """Google Text-to-Speech over the network."""
+    name = "gtts"
+    extension = "mp3"
+
+    def __init__(self, tld="com", max_concurrency=4):
+        super().__init__(max_concurrency)
+        # gTTS picks the accent from the Google domain it talks to
+        self.tld = tld
+        self.voice = tld
+
+    def synthesize(self, text: str, path: str, lang: str = "en"):
+        from gtts import gTTS
+        tts = gTTS(text=text, lang=lang, tld=self.tld)
+        tts.save(path)
+
+class OfflineBackend(TTSBackend):
+    """
+    Local stand-in engine for tests and benchmarks. Writes a silent WAV
+    whose length follows a typical speaking rate, after sleeping for a
+    configurable latency to mimic a network round-trip.
+    """
+    name = "offline"
+    extension = "wav"
+    voice = "silent"
+
+    def __init__(self, latency=0.0, words_per_minute=WORDS_PER_MINUTE, max_concurrency=8, sample_rate=16000):
+        super().__init__(max_concurrency)
+        self.latency = latency
+        self.words_per_minute = words_per_minute
+        self.sample_rate = sample_rate
+
+    def synthesize(self, text: str, path: str, lang: str = "en"):
+        time.sleep(self.latency)
+        seconds = estimate_duration(text, self.words_per_minute)
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            f.writeframes(b"\0\0" * int(seconds * self.sample_rate))
+
+BACKENDS = {
+    "gtts": GTTSBackend,
+    "offline": OfflineBackend,
+}
+
+_default_backend = None
+_audio_cache = None
+
+def get_default_backend() -> TTSBackend:
+    global _default_backend
+    if _default_backend is None:
+        # Render subprocesses inherit the parent's choice through the environment
+        _default_backend = BACKENDS[os.environ.get("TTS_BACKEND", "gtts")]()
+    return _default_backend
+
+def set_default_backend(backend: TTSBackend):
+    global _default_backend
+    _default_backend = backend
+    os.environ["TTS_BACKEND"] = backend.name
+
+def get_audio_cache() -> AudioCache:
+    global _audio_cache
+    if _audio_cache is None:
+        _audio_cache = AudioCache(AUDIO_DIR)
+    return _audio_cache
+
+def set_audio_cache(cache: AudioCache):
+    global _audio_cache
+    _audio_cache = cache
+
+def audio_duration(file_path: str) -> float:
     """
-    Generates an MP3 file from text.
+    Reads the length of an MP3 or WAV file in seconds.
+    """
+    if file_path.endswith(".wav"):
+        with wave.open(file_path, "rb") as f:
+            return f.getnframes() / float(f.getframerate())
+    from mutagen.mp3 import MP3
+    return MP3(file_path).info.length
+
+def lookup_voice(text: str, lang="en", backend: TTSBackend = None) -> tuple[str, float]:
+    """
+    Returns (file_path, duration) if the line is already synthesized,
+    otherwise None. Never calls the backend.
+    """
+    backend = backend or get_default_backend()
+    cache = get_audio_cache()
+    return cache.lookup(cache.key(text, backend.name, lang, backend.voice))
+
+def lookup_voices(texts: list, lang="en", backend: TTSBackend = None) -> dict:
+    """
+    Batch form of lookup_voice(). Returns {text: (file_path, duration)}
+    for the lines already synthesized.
+    """
+    backend = backend or get_default_backend()
+    cache = get_audio_cache()
+    keys = {cache.key(text, backend.name, lang, backend.voice): text for text in texts}
+    return {keys[key]: hit for key, hit in cache.lookup_many(list(keys)).items()}
+
+def generate_voice(text: str, filename_prefix="tts", lang="en", backend: TTSBackend = None) -> tuple[str, float]:
+    """
+    Generates an audio file from text.
     Returns: (file_path, duration_in_seconds)
     """
     ensure_dirs()
-    
-    # Create a unique filename based on text hash to avoid regeneration
-    text_hash = hashlib.md5(text.encode()).hexdigest()[:8]
-    filename = f"{filename_prefix}_{text_hash}.mp3"
-    file_path = os.path.join(AUDIO_DIR, filename)
-    
-    # Check if exists
-    if not os.path.exists(file_path):
-        print(f"Generating TTS for: '{text[:20]}...'")
-        tts = gTTS(text=text, lang='en')
-        tts.save(file_path)
-    else:
+    backend = backend or get_default_backend()
+    cache = get_audio_cache()
+    tracer = get_tracer()
+
+    # The key covers everything that changes the audio, not just the text
+    key = cache.key(text, backend.name, lang, backend.voice)
+    cached = cache.lookup(key)
+    if cached is not None:
+        # Duration comes from the index; the audio file is never opened
+        tracer.count("tts_cache_hits")
         print(f"Using cached TTS for: '{text[:20]}...'")
+        return cached
+
+    tracer.count("tts_cache_misses")
+    print(f"Generating TTS for: '{text[:20]}...'")
+    file_path = cache.path_for(key, filename_prefix, backend.extension)
+    # Write to a temp file first so a concurrent reader never sees a partial file
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with tracer.span("tts.synthesize", backend=backend.name) as span:
+        try:
+            with backend.slots:
+                backend.synthesize(text, tmp_path, lang=lang)
+            os.replace(tmp_path, file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        tracer.wrote(file_path, span)
 
-    # Get duration
+    # Get duration once, at insert time
     try:
-        audio = MP3(file_path)
-        duration = audio.info.length
+        duration = audio_duration(file_path)
     except Exception as e:
         print(f"Error reading audio length: {e}")
         duration = 2.0 # Fallback
 
+    cache.store(key, file_path, duration)
     return file_path, duration
+
+def narration_texts(blueprint: dict) -> list:
+    """
+    Collects the distinct narration strings of a blueprint in scene order.
+    """
+    texts = []
+    for scene in blueprint["scenes"]:
+        text = scene.get("narration")
+        if text and text not in texts:
+            texts.append(text)
+    return texts
+
+def generate_voice_with_retry(text: str, filename_prefix="tts", lang="en", backend: TTSBackend = None,
+                              retries=3, backoff=0.5) -> tuple[str, float]:
+    """
+    generate_voice() retried with exponential backoff. Raises the last
+    error once every attempt has failed.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return generate_voice(text, filename_prefix, lang=lang, backend=backend)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt)
+            get_tracer().count("tts_retries")
+            print(f"TTS attempt {attempt + 1} failed for '{text[:20]}...': {e}. Retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def prefetch_voices(texts: list, filename_prefix="tts", lang="en", backend: TTSBackend = None,
+                    max_workers=None, retries=3, backoff=0.5) -> dict:
+    """
+    Synthesizes all texts concurrently so the audio cache is warm before
+    rendering starts. Concurrency is capped by the backend's own limit.
+    Failed lines are retried with exponential backoff and then skipped.
+    Returns: {text: (file_path, duration_in_seconds)} for successful lines.
+    """
+    backend = backend or get_default_backend()
+    unique_texts = list(dict.fromkeys(texts))
+    workers = min(max_workers or backend.max_concurrency, backend.max_concurrency)
+
+    def fetch(text):
+        return generate_voice_with_retry(text, filename_prefix, lang, backend, retries, backoff)
+
+    print(f"Prefetching TTS for {len(unique_texts)} lines with {backend.name} ({workers} concurrent)...")
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        futures = {pool.submit(fetch, text): text for text in unique_texts}
+        for future in as_completed(futures):
+            text = futures[future]
+            try:
+                results[text] = future.result()
+            except Exception as e:
+                print(f"TTS failed for '{text[:20]}...': {e}")
+
+    return results
@@ -0,0 +1,103 @@
+import json
+import os
+import re
+from functools import lru_cache
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "visual_rules.json")
+
+class VisualRuleEngine:
+    """
+    Maps a scene's visual_concept to visuals using a declarative rule table.
+    Every rule's keywords are compiled once into a single lookahead regex
+    with one named group per rule, so a concept is scanned once no matter
+    how many rules exist. The lookahead is zero-width, so matches may
+    overlap and a keyword inside a longer one ("chart" in "flowchart")
+    is still seen. When several rules match, the lowest priority number
+    wins. Templates may use {text} and {style[key]} placeholders,
+    or {"by_style": key, "cases": {...}, "default": ...} for values that
+    depend on the style profile.
+    """
+
+    def __init__(self, table: dict):
+        self.rules = sorted(table["rules"], key=lambda rule: rule.get("priority", 100))
+        self.fallback = table["fallback"]
+        for rule in self.rules + [self.fallback]:
+            rule["_builders"] = [_compile_template(visual) for visual in rule["visuals"]]
+
+        alternatives = []
+        for i, rule in enumerate(self.rules):
+            # Longest keywords first so a keyword never shadows a longer one
+            keywords = sorted(rule["keywords"], key=len, reverse=True)
+            alternatives.append(f"(?P<r{i}>{'|'.join(re.escape(k.lower()) for k in keywords)})")
+        # Tried at every offset; at each one the first (best) rule that matches is captured
+        self._pattern = re.compile(f"(?={'|'.join(alternatives)})") if alternatives else None
+
+        # Concepts repeat heavily across scripts, so memoize the match
+        self.match = lru_cache(maxsize=4096)(self._match)
+
+    @classmethod
+    def load(cls, path: str = RULES_PATH) -> "VisualRuleEngine":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def _match(self, concept: str) -> dict:
+        """
+        Returns the winning rule for a lowercased concept, or the fallback.
+        """
+        if self._pattern is None:
+            return self.fallback
+        best = None
+        for m in self._pattern.finditer(concept):
+            index = int(m.lastgroup[1:])
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return self.rules[best] if best is not None else self.fallback
+
+    def build_visuals(self, concept: str, text: str, style: dict) -> list:
+        rule = self.match(concept.lower())
+        return [build(text, style) for build in rule["_builders"]]
+
+def _compile_template(visual: dict):
+    """
+    Splits a visual template into static fields, copied as-is, and
+    placeholder fields, expanded per scene. Returns build(text, style).
+    """
+    fields = []
+    for key, value in visual.items():
+        if value == "{text}":
+            fields.append((key, lambda text, style: text, None))
+        elif isinstance(value, (dict, list)) or (isinstance(value, str) and "{" in value):
+            # Containers are rebuilt per scene so visuals never share state
+            fields.append((key, lambda text, style, value=value: _fill(value, text, style), None))
+        else:
+            fields.append((key, None, value))
+
+    def build(text: str, style: dict) -> dict:
+        return {key: expand(text, style) if expand else value for key, expand, value in fields}
+
+    return build
+
+def _fill(value, text: str, style: dict):
+    # Expands one template value; narration text is inserted, never parsed
+    if isinstance(value, str):
+        return value.format(text=text, style=style) if "{" in value else value
+    if isinstance(value, dict):
+        if "by_style" in value:
+            return value["cases"].get(style.get(value["by_style"]), value.get("default"))
+        return {k: _fill(v, text, style) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, text, style) for v in value]
+    return value
+
+_default_engine = None
+
+def default_engine() -> VisualRuleEngine:
+    """
+    The bundled rule table, loaded and compiled once per process.
+    """
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = VisualRuleEngine.load()
+    return _default_engine
@@ -0,0 +1,256 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+
+JOBS_DIR = "media/jobs"
+QUEUE_PATH = os.path.join(JOBS_DIR, "queue.sqlite")
+
+# Render options a job may carry; anything else is rejected at submit time
+JOB_OPTIONS = {"quality": "-ql", "elide_holds": True, "cache": True, "hls": None, "memory_budget_mb": None}
+
+class JobQueue:
+    """
+    Local render job queue backed by SQLite.
+    Clients submit blueprints with their render options; warm workers
+    claim them atomically and report status and artifact paths back
+    through the same table.
+    """
+
+    def __init__(self, path=QUEUE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " status TEXT NOT NULL,"
+                " blueprint TEXT NOT NULL,"
+                " options TEXT NOT NULL,"
+                " output TEXT,"
+                " error TEXT,"
+                " worker TEXT,"
+                " submitted REAL NOT NULL,"
+                " started REAL,"
+                " finished REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    def _conn(self) -> "_Transaction":
+        # One short-lived connection per call keeps the queue fork-safe
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return _Transaction(conn)
+
+    def submit(self, blueprint: dict, options: dict = None) -> int:
+        """
+        Queues a blueprint with render options (keys of JOB_OPTIONS; the
+        rest keep their defaults). Returns the job id.
+        """
+        unknown = set(options or {}) - set(JOB_OPTIONS)
+        if unknown:
+            raise ValueError(f"unknown job option(s): {', '.join(sorted(unknown))}")
+        with self._conn() as conn:
+            cur = conn.execute(
+                "INSERT INTO jobs (status, blueprint, options, submitted) VALUES ('queued', ?, ?, ?)",
+                (json.dumps(blueprint), json.dumps(options or {}), time.time())
+            )
+            return cur.lastrowid
+
+    def claim(self, worker: str) -> tuple[int, dict, dict]:
+        """
+        Atomically takes the oldest queued job. Returns (job_id, blueprint,
+        options) with every option filled in, or None when the queue is empty.
+        """
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT id, blueprint, options FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started = ? WHERE id = ?",
+                (worker, time.time(), row[0])
+            )
+        return row[0], json.loads(row[1]), {**JOB_OPTIONS, **json.loads(row[2])}
+
+    def complete(self, job_id: int, output: str):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', output = ?, finished = ? WHERE id = ?",
+                (output, time.time(), job_id)
+            )
+
+    def fail(self, job_id: int, error: str):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+
+    def requeue_running(self) -> int:
+        """
+        Returns jobs left 'running' by a crashed daemon to the queue.
+        """
+        with self._conn() as conn:
+            cur = conn.execute("UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running'")
+            return cur.rowcount
+
+    def status(self, job_id: int) -> dict:
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT status, output, error, worker, submitted, started, finished FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("status", "output", "error", "worker", "submitted", "started", "finished")
+        return dict(zip(keys, row))
+
+    def stats(self, window: float = 300.0) -> dict:
+        """
+        Job counts by status plus throughput over the last window seconds.
+        """
+        since = time.time() - window
+        with self._conn() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            recent = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'done' AND finished >= ?", (since,)
+            ).fetchone()[0]
+        counts["jobs_per_minute"] = round(recent * 60.0 / window, 2)
+        return counts
+
+class _Transaction:
+    """
+    Context manager that runs a block in an IMMEDIATE transaction, so two
+    workers can never claim the same job, and closes the connection after.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.conn.close()
+
+def warm_up():
+    """
+    Pays the manim/Cairo/Pango import and font loading once per worker,
+    before any job arrives.
+    """
+    from pipeline.interpreter import load_manim
+    m = load_manim()
+    m.Text("warm up", font_size=24)
+
+def worker_loop(name: str, queue_path: str = QUEUE_PATH, poll_interval: float = 0.5, memory_budget_mb: int = None):
+    """
+    Claims and renders jobs forever inside one pre-warmed process, with
+    each job's own render options. With memory_budget_mb (or a job's own
+    budget), scene state is released between scenes and scenes over the
+    budget move to their own manim processes.
+    """
+    from pipeline.hls import HLSPackager
+    from pipeline.interpreter import InProcessRenderer
+    from pipeline.render_cache import RenderCache
+    from pipeline.text_cache import TextCache
+
+    warm_up()
+    queue = JobQueue(queue_path)
+    cache = RenderCache()
+    # One SVG directory for all workers; each publishes with atomic renames
+    text_cache = TextCache()
+    print(f"[{name}] ready")
+
+    while True:
+        job = queue.claim(name)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+
+        job_id, blueprint, options = job
+        job_dir = os.path.join(JOBS_DIR, str(job_id))
+        os.makedirs(job_dir, exist_ok=True)
+        # A per-job module name keeps concurrent workers out of each other's video dirs
+        renderer = InProcessRenderer(output_file=f"job_{job_id}.py", quality=options["quality"],
+                                     cache=cache if options["cache"] else None,
+                                     elide_holds=options["elide_holds"], text_cache=text_cache,
+                                     memory_budget_mb=options["memory_budget_mb"] or memory_budget_mb)
+        try:
+            packager = None
+            if options["hls"]:
+                packager = HLSPackager(options["hls"], source_height=renderer._frame_height(),
+                                       fps=renderer._frame_rate())
+                for index, scene in enumerate(blueprint["scenes"]):
+                    packager.plan(index, scene)
+            segments = renderer.render_segments(blueprint, on_segment=packager.add if packager else None)
+            # Packaging still reads the segments, and assembly releases their cache pins
+            if packager:
+                packager.finish(len(blueprint["scenes"]))
+            output = renderer.assemble(blueprint, segments, output_path=os.path.join(job_dir, "video.mp4"))
+        except Exception as e:
+            queue.fail(job_id, str(e))
+            print(f"[{name}] job {job_id} failed: {e}")
+            continue
+
+        if output:
+            queue.complete(job_id, output)
+            print(f"[{name}] job {job_id} done: {output}")
+        else:
+            queue.fail(job_id, "no scenes rendered")
+            print(f"[{name}] job {job_id} failed: no scenes rendered")
+
+def serve(workers: int = None, queue_path: str = QUEUE_PATH, report_interval: float = 60.0, memory_budget_mb: int = None):
+    """
+    Starts a pool of warm worker processes and reports throughput until
+    interrupted.
+    """
+    workers = workers or os.cpu_count() or 1
+    queue = JobQueue(queue_path)
+    requeued = queue.requeue_running()
+    if requeued:
+        print(f"Requeued {requeued} job(s) left running by a previous daemon")
+
+    processes = []
+    for i in range(workers):
+        proc = multiprocessing.Process(target=worker_loop, args=(f"worker-{i}", queue_path, 0.5, memory_budget_mb), daemon=True)
+        proc.start()
+        processes.append(proc)
+    print(f"Render daemon started with {workers} workers on {queue_path}")
+
+    try:
+        while True:
+            time.sleep(report_interval)
+            print(f"Queue stats: {queue.stats()}")
+    except KeyboardInterrupt:
+        print("Shutting down render daemon...")
+    finally:
+        for proc in processes:
+            proc.terminate()
+        for proc in processes:
+            proc.join()
+
+def wait_for_job(queue: JobQueue, job_id: int, poll_interval: float = 1.0) -> dict:
+    """
+    Blocks until a job finishes and returns its final status.
+    """
+    while True:
+        status = queue.status(job_id)
+        if status is None or status["status"] in ("done", "failed"):
+            return status
+        time.sleep(poll_interval)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm render worker daemon")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--queue", type=str, default=QUEUE_PATH, help="Path of the SQLite job queue")
+    parser.add_argument("--memory-budget-mb", type=int, default=None, help="Per-worker RSS budget; scenes over it render in separate processes")
+    args = parser.parse_args()
+    serve(args.workers, args.queue, memory_budget_mb=args.memory_budget_mb)
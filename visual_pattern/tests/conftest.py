@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# Tests import pipeline modules the same way main.py does, from visual_pattern/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import ffmpeg
+
+@pytest.fixture
+def ffmpeg_calls(monkeypatch):
+    """
+    Records ffmpeg invocations instead of running them (ffmpeg need not
+    be installed). Each call is (args, {path: text}) for the list and
+    filter-script files it reads, which are deleted once ffmpeg returns.
+    """
+    calls = []
+
+    def record(args):
+        scripts = {}
+        for arg in args:
+            if isinstance(arg, str) and arg.endswith(".txt") and os.path.exists(arg):
+                with open(arg) as f:
+                    scripts[arg] = f.read()
+        calls.append((list(args), scripts))
+
+    monkeypatch.setattr(ffmpeg, "run_ffmpeg", record)
+    return calls
@@ -0,0 +1,48 @@
+import os
+import time
+
+from pipeline.audio_cache import AudioCache
+
+def clip(cache: AudioCache, key: str, size: int) -> str:
+    path = cache.path_for(key, "tts", "wav")
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    cache.store(key, path, 1.0)
+    return path
+
+def test_inserts_never_evict_clips_a_render_looked_up(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=1500)
+    first = clip(cache, "a", 1000)
+    assert cache.lookup("a") == (first, 1.0)
+    # Over budget, but the render holding "a" has not muxed yet
+    clip(cache, "b", 1000)
+    assert os.path.exists(first)
+
+    cache.evict()
+    assert cache.lookup("a") is None and not os.path.exists(first)
+    assert cache.lookup("b") is not None
+
+def test_unbounded_cache_never_evicts(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    path = clip(cache, "a", 1000)
+    cache.evict()
+    assert cache.lookup("a") == (path, 1.0)
+
+def test_keys_cover_voice_and_stay_filename_safe(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    key = cache.key("../etc/passwd? 'quoted'", "gtts", "en", "default")
+    assert key != cache.key("../etc/passwd? 'quoted'", "gtts", "en", "co.uk")
+    assert os.path.dirname(cache.path_for(key, "tts", "mp3")) == str(tmp_path)
+
+def test_lookups_answer_durations_from_the_index(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=2500)
+    a, b = clip(cache, "a", 1000), clip(cache, "b", 1000)
+    os.remove(a) # Durations come from the index, not the file
+    assert cache.lookup_many(["a", "b", "a", "missing"]) == {"a": (a, 1.0), "b": (b, 1.0)}
+
+    # A lookup refreshes a clip, so the least recently used one goes first
+    time.sleep(0.01)
+    cache.lookup("a")
+    clip(cache, "c", 1000)
+    cache.evict()
+    assert cache.lookup("b") is None and cache.lookup("a") is not None
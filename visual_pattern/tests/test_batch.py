@@ -0,0 +1,81 @@
+import json
+
+from pipeline.batch import STAGES, BatchRunner, read_topics
+from pipeline.interpreter import InProcessRenderer
+from pipeline.render_cache import RenderCache
+
+def test_no_cache_reaches_the_job_renderer(tmp_path):
+    runner = BatchRunner(out_dir=str(tmp_path), render_cache=None)
+    assert runner.renderer_for(str(tmp_path / "job")).cache is None
+
+    cache = RenderCache(str(tmp_path / "cache"))
+    runner = BatchRunner(out_dir=str(tmp_path), render_cache=cache)
+    assert runner.renderer_for(str(tmp_path / "job")).cache is cache
+
+def test_no_elide_holds_reaches_the_job_renderer(tmp_path):
+    # ffmpeg before 4.4 cannot restore holds, so the flag must not be dropped
+    renderer = BatchRunner(out_dir=str(tmp_path), elide_holds=False).renderer_for(str(tmp_path / "job"))
+    assert renderer.elide_holds is False
+    assert renderer._render_module() == renderer.output_file
+    assert BatchRunner(out_dir=str(tmp_path)).renderer_for(str(tmp_path / "job")).elide_holds is True
+
+def test_quality_and_renderer_reach_the_job_renderer(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    low = BatchRunner(out_dir=str(tmp_path), render_cache=cache).renderer_for(str(tmp_path / "job"))
+    high = BatchRunner(out_dir=str(tmp_path), render_cache=cache, quality="-qh").renderer_for(str(tmp_path / "job"))
+    assert high.quality == "-qh"
+    # Segments cached at one quality are never served for another
+    scene = {"duration": 2, "visuals": []}
+    assert low._cache_key(scene, {}) != high._cache_key(scene, {})
+
+    runner = BatchRunner(out_dir=str(tmp_path), quality="-qm", renderer="inprocess")
+    renderer = runner.renderer_for(str(tmp_path / "job"))
+    assert isinstance(renderer, InProcessRenderer)
+    assert renderer.quality == "-qm"
+
+def test_memory_budget_is_shared_by_every_job(tmp_path):
+    runner = BatchRunner(out_dir=str(tmp_path), memory_budget_mb=512)
+    first = runner.renderer_for(str(tmp_path / "job1"))
+    second = runner.renderer_for(str(tmp_path / "job2"))
+    assert first.memory_budget_mb == 512
+    assert first._memory is second._memory
+
+def stub_stages(runner: BatchRunner, calls: list, failing: set):
+    def stage(name):
+        def run(record, job_dir):
+            calls.append((record["topic"], name))
+            if (record["topic"], name) in failing:
+                raise RuntimeError("render crashed")
+        return run
+
+    for name in STAGES:
+        setattr(runner, f"_stage_{name}", stage(name))
+    runner.prefetch_scripts = lambda records: None
+
+def test_rerun_resumes_each_job_from_its_checkpoint(tmp_path):
+    records = [{"topic": "Graphs"}, {"topic": "Queues", "id": "q"}]
+    calls = []
+    runner = BatchRunner(out_dir=str(tmp_path), jobs=2)
+    stub_stages(runner, calls, failing={("Queues", "render")})
+    summary = runner.run(records)
+    assert summary["done"] == 1 and summary["failed"][0]["stage"] == "render"
+    state = json.loads((tmp_path / "q" / "state.json").read_text())
+    assert state["completed"] == ["script", "blueprint", "tts"] and state["error"].startswith("render:")
+
+    calls.clear()
+    runner = BatchRunner(out_dir=str(tmp_path), jobs=2)
+    stub_stages(runner, calls, failing=set())
+    summary = runner.run(records)
+    # Only the failed stage runs again; the finished job is left alone
+    assert calls == [("Queues", "render")]
+    assert summary["done"] == 2 and summary["resumed"] == 2
+    assert "error" not in json.loads((tmp_path / "q" / "state.json").read_text())
+
+def test_topics_file_accepts_records_and_bare_strings(tmp_path):
+    path = tmp_path / "topics.jsonl"
+    path.write_text('{"topic": "Graphs", "id": "g"}\n\n"Binary Search Trees"\n')
+    records = read_topics(str(path))
+    assert records == [{"topic": "Graphs", "id": "g"}, {"topic": "Binary Search Trees"}]
+    runner = BatchRunner(out_dir=str(tmp_path))
+    assert runner.job_dir(1, records[1]).endswith("00001_binary_search_trees")
+    assert runner.job_dir(0, records[0]).endswith("g")
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from pipeline import blueprint_model, tts
+from pipeline.blueprint_gen import NARRATION_PADDING, BlueprintGenerator
+from pipeline.blueprint_model import Blueprint, BlueprintError, SceneSpec
+
+def blueprint_dict() -> dict:
+    return {
+        "title": "Test",
+        "style_settings": {},
+        "scenes": [
+            {"id": 1, "narration": "Short line", "duration": 2.0, "duration_source": "estimate", "visuals": []},
+            {"id": 2, "narration": "Close line", "duration": 2.0, "duration_source": "estimate", "visuals": []},
+        ],
+    }
+
+@pytest.fixture
+def real_lengths(monkeypatch):
+    # Scene 1's real narration drifts far from its estimate; scene 2's stays within tolerance
+    seconds = {"Short line": 9.0 - NARRATION_PADDING, "Close line": 2.1 - NARRATION_PADDING}
+    monkeypatch.setattr(tts, "lookup_voices", lambda texts, **kwargs: {t: ("clip.mp3", seconds[t]) for t in texts})
+    return BlueprintGenerator()
+
+def test_reconcile_updates_typed_blueprint_in_place(real_lengths):
+    model = Blueprint.from_dict(blueprint_dict())
+    assert real_lengths.reconcile_durations(model) == [0]
+    assert model.scenes[0].duration == 9.0
+    assert [s.duration_source for s in model.scenes] == ["audio", "audio"]
+
+def test_reconcile_matches_for_dicts(real_lengths):
+    data = blueprint_dict()
+    assert real_lengths.reconcile_durations(data) == [0]
+    assert data["scenes"][0]["duration"] == 9.0
+
+def test_scene_validation_reports_path():
+    with pytest.raises(BlueprintError, match=r"scenes\[3\]\.duration"):
+        SceneSpec.from_dict({"id": 1, "duration": -1, "visuals": []}, "scenes[3]")
+
+@pytest.mark.parametrize("packer", ["msgpack", "json"])
+def test_binary_round_trip_keeps_unknown_keys(packer, tmp_path, monkeypatch):
+    if packer == "msgpack":
+        pytest.importorskip("msgpack")
+    else:
+        monkeypatch.setattr(blueprint_model, "msgpack", None)
+    data = blueprint_dict()
+    data["scenes"][0]["visuals"] = [{"type": "text", "content": "Hi", "position": "center", "glow": 0.5}]
+    model = Blueprint.from_dict(data)
+    path = str(tmp_path / "blueprint.bin")
+    model.save(path)
+
+    assert Blueprint.load(path) == model
+    assert Blueprint.load(path).to_dict()["scenes"][0]["visuals"][0]["glow"] == 0.5
+    assert len(model.to_bytes()) < len(json.dumps(data))
+
+def test_binary_load_rejects_other_files():
+    with pytest.raises(BlueprintError, match="not a binary blueprint"):
+        Blueprint.from_bytes(b'{"title": "Test"}')
@@ -0,0 +1,40 @@
+import ast
+
+from pipeline.codegen import code_to_string, color_literal
+
+TRICKY = 'She said "it\'s fine"\\n\nC:\\temp'
+
+BLUEPRINT = {
+    "scenes": [
+        {"id": 1, "narration": TRICKY, "duration": 2.5,
+         "visuals": [{"type": "text", "content": TRICKY, "position": "center"},
+                     {"type": "rectangle", "color": "#1e1e1e", "position": "left"}]},
+        {"id": 2, "narration": "Second", "duration": 3,
+         "visuals": [{"type": "circle", "color": "BLUE"}, {"type": "sparkles"}]},
+    ],
+}
+
+def emit(**kwargs):
+    return code_to_string(lambda e: e.blueprint(BLUEPRINT, **kwargs))
+
+def test_quotes_and_newlines_in_text_stay_literals():
+    tree = ast.parse(emit())
+    strings = [node.value for node in ast.walk(tree) if isinstance(node, ast.Constant)]
+    assert TRICKY in strings and "#1e1e1e" in strings
+
+def test_output_is_deterministic():
+    assert emit() == emit()
+    per_scene = emit(per_scene=True, class_name_for=lambda i: f"Scene{i + 1:04d}")
+    classes = [node.name for node in ast.parse(per_scene).body if isinstance(node, ast.ClassDef)]
+    assert classes == ["Scene0001", "Scene0002"]
+
+def test_elided_holds_leave_out_the_wait():
+    assert "self.wait(2.5)" in emit()
+    code = emit(elide_holds=True)
+    assert "self.wait(" not in code
+    assert code.count("FadeOut(") == 2
+
+def test_colors_are_constants_or_strings():
+    assert color_literal("GREY_B") == "GREY_B"
+    assert color_literal("#1e1e1e") == "'#1e1e1e'"
+    assert color_literal("blue; import os") == "'blue; import os'"
@@ -0,0 +1,40 @@
+import os
+
+from pipeline.ffmpeg import concat_segments, extend_holds, mux_narration
+
+def test_concat_copies_segments_in_order(ffmpeg_calls, tmp_path):
+    segments = [str(tmp_path / "b.mp4"), str(tmp_path / "it's.mp4")]
+    output = str(tmp_path / "out.mp4")
+    assert concat_segments(segments, output) == output
+
+    (args, scripts), = ffmpeg_calls
+    assert args[args.index("-c") + 1] == "copy" and args[-1] == output
+    listing, = scripts.values()
+    assert listing.splitlines() == [f"file '{tmp_path}/b.mp4'", f"file '{tmp_path}/it'\\''s.mp4'"]
+    # The concat list is a temporary file
+    assert not os.path.exists(output + ".concat.txt")
+
+def test_narration_pads_each_clip_to_its_scene(ffmpeg_calls, tmp_path):
+    output = str(tmp_path / "final.mp4")
+    slots = [("a.mp3", 2.5), (None, 1.0), ("b.wav", 3.0)]
+    assert mux_narration("silent.mp4", slots, output) == output
+
+    (args, scripts), = ffmpeg_calls
+    # Clips are inputs 1 and 2; the silent scene needs no input
+    assert [args[i + 1] for i, arg in enumerate(args) if arg == "-i"] == ["silent.mp4", "a.mp3", "b.wav"]
+    assert args[args.index("-c:v") + 1] == "copy"
+    chains = next(iter(scripts.values())).split(";\n")
+    assert chains[0].startswith("[1:a]") and "apad=whole_dur=2.500,atrim=0:2.500" in chains[0]
+    assert chains[1].startswith("anullsrc") and "atrim=0:1.000" in chains[1]
+    assert chains[2].startswith("[2:a]") and "atrim=0:3.000" in chains[2]
+    assert chains[3] == "[s0][s1][s2]concat=n=3:v=0:a=1[narration]"
+    assert not os.path.exists(output + ".filter.txt")
+
+def test_holds_shift_later_frames_without_reencoding(ffmpeg_calls):
+    extend_holds("in.mp4", [(1.0, 2.0), (5.0, 3.0)], "out.mp4")
+
+    (args, _), = ffmpeg_calls
+    assert args[args.index("-c") + 1] == "copy"
+    setts = args[args.index("-bsf:v") + 1]
+    assert setts == ("setts=pts=PTS+(gte(PTS*TB\\,1.000000)*2.000000+gte(PTS*TB\\,5.000000)*3.000000)/TB"
+                     ":dts=DTS+(gte(DTS*TB\\,1.000000)*2.000000+gte(DTS*TB\\,5.000000)*3.000000)/TB")
@@ -0,0 +1,63 @@
+import os
+
+from pipeline import hls
+from pipeline.hls import LADDER, HLSPackager, ladder_for
+
+def test_ladder_never_upscales():
+    assert [name for name, _, _ in ladder_for(720)] == ["720p", "480p", "360p"]
+    assert [name for name, _, _ in ladder_for(240)] == ["360p"]
+
+def fake_encoder(offsets: dict):
+    def encode(video, clip, length, fps, renditions, segment_time, offset, outputs):
+        if video == "broken.mp4":
+            raise OSError("ffmpeg failed")
+        offsets[video] = offset
+        for pattern, list_path in outputs:
+            with open(list_path, "w") as f:
+                f.write(f"{os.path.basename(pattern) % 0},0.0,{length}\n")
+        return [list_path for _, list_path in outputs]
+    return encode
+
+def playlist(packager: HLSPackager, name: str) -> list:
+    # Entries after the five header lines
+    with open(os.path.join(packager.out_dir, name, "index.m3u8")) as f:
+        return f.read().splitlines()[5:]
+
+def test_scenes_publish_in_order_with_continuous_timestamps(monkeypatch, tmp_path):
+    offsets = {}
+    monkeypatch.setattr(hls, "encode_hls_scene", fake_encoder(offsets))
+    packager = HLSPackager(str(tmp_path), source_height=480, fps=15)
+    scenes = [{"duration": 2}, {"duration": 3}, {"duration": 1}, {"duration": 4}]
+    for index, scene in enumerate(scenes):
+        packager.plan(index, scene)
+
+    # Scene 2 finishes first, scene 3 fails to package
+    packager.add(1, "b.mp4")
+    packager.add(0, "a.mp4")
+    packager.add(2, "broken.mp4")
+    packager.add(3, "d.mp4")
+    master = packager.finish(len(scenes))
+
+    assert offsets == {"a.mp4": 0.0, "b.mp4": 4.0, "d.mp4": 12.0}
+    assert playlist(packager, "480p") == [
+        "#EXTINF:4.000,", "s0001_000.ts",
+        "#EXTINF:5.000,", "s0002_000.ts",
+        "#EXT-X-DISCONTINUITY", "#EXTINF:6.000,", "s0004_000.ts",
+        "#EXT-X-ENDLIST",
+    ]
+    with open(master) as f:
+        streams = [line for line in f.read().splitlines() if line.endswith("index.m3u8")]
+    assert streams == ["480p/index.m3u8", "360p/index.m3u8"]
+
+def test_unplanned_scenes_restart_their_timestamps(monkeypatch, tmp_path):
+    offsets = {}
+    monkeypatch.setattr(hls, "encode_hls_scene", fake_encoder(offsets))
+    packager = HLSPackager(str(tmp_path), source_height=360, fps=15, ladder=LADDER)
+    # Streaming adds scenes as they render, before earlier ones are known
+    packager.add(1, "b.mp4", {"duration": 3})
+    packager.add(0, "a.mp4", {"duration": 2})
+    packager.finish()
+
+    assert offsets == {"a.mp4": 0.0, "b.mp4": 0.0}
+    assert playlist(packager, "360p")[:5] == ["#EXTINF:4.000,", "s0001_000.ts",
+                                              "#EXT-X-DISCONTINUITY", "#EXTINF:5.000,", "s0002_000.ts"]
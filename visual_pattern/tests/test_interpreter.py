@@ -0,0 +1,53 @@
+import pytest
+
+from pipeline.interpreter import QUALITY_NAMES, InProcessRenderer
+from pipeline.renderer import QUALITY_DIRS, Renderer
+
+BLUEPRINT = {
+    "style_settings": {},
+    "scenes": [{"id": i + 1, "duration": 2, "visuals": [{"type": "text", "content": f"Scene {i}"}]}
+               for i in range(3)],
+}
+
+def test_every_quality_flag_has_a_manim_config_name():
+    assert set(QUALITY_NAMES) == set(QUALITY_DIRS)
+
+def test_scenes_render_in_order_and_failures_are_skipped(tmp_path):
+    rendered = []
+    renderer = InProcessRenderer(output_file=str(tmp_path / "gen.py"), elide_holds=False)
+
+    def render_single_scene(index, scene):
+        rendered.append(index)
+        if index == 1:
+            raise RuntimeError("bad visual")
+        return f"seg{index}.mp4"
+
+    renderer._render_single_scene = render_single_scene
+    ready = []
+    segments = renderer.render_segments(BLUEPRINT, on_segment=lambda i, path: ready.append(i), reuse={2: "old2.mp4"})
+    assert rendered == [0, 1]
+    assert segments == {0: "seg0.mp4", 2: "old2.mp4"}
+    assert ready == [0, 2]
+
+def test_scene_over_the_budget_moves_the_rest_to_subprocesses(tmp_path, monkeypatch):
+    in_process, isolated = [], []
+    renderer = InProcessRenderer(output_file=str(tmp_path / "gen.py"), memory_budget_mb=10 ** 6)
+
+    def render_in_process(index, scene):
+        in_process.append(index)
+        raise MemoryError
+
+    renderer._render_in_process = render_in_process
+    monkeypatch.setattr(Renderer, "_render_single_scene",
+                        lambda self, index, scene: isolated.append(index) or f"seg{index}.mp4")
+
+    assert renderer._render_single_scene(0, BLUEPRINT["scenes"][0]) == "seg0.mp4"
+    assert renderer._render_single_scene(1, BLUEPRINT["scenes"][1]) == "seg1.mp4"
+    assert in_process == [0] and isolated == [0, 1]
+
+def test_in_process_render_writes_a_segment(tmp_path, monkeypatch):
+    pytest.importorskip("manim")
+    monkeypatch.chdir(tmp_path)
+    renderer = InProcessRenderer(elide_holds=False)
+    segment = renderer._render_in_process(0, dict(BLUEPRINT["scenes"][0], duration=0.1))
+    assert segment.endswith("Scene0001.mp4") and (tmp_path / segment).exists()
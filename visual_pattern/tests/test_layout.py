@@ -0,0 +1,31 @@
+import numpy as np
+
+from pipeline.layout import FORCE_MAX_NODES, _near_pairs, layout_graph
+
+def chain(n: int, layout: str) -> dict:
+    return {"type": "graph", "layout": layout, "nodes": list(range(n)),
+            "edges": [[i, i + 1] for i in range(n - 1)] + [[n - 1, 0]]}
+
+def test_near_pairs_finds_every_close_pair():
+    pos = np.random.default_rng(1).uniform(-10, 10, (300, 2))
+    i, j = _near_pairs(pos, 1.5)
+    found = set(zip(i.tolist(), j.tolist()))
+    assert len(found) == len(i) and all(a < b for a, b in found)
+    distance = np.sqrt(((pos[:, None] - pos[None]) ** 2).sum(axis=-1))
+    close = {(a, b) for a in range(300) for b in range(a + 1, 300) if distance[a, b] < 1.5}
+    assert close <= found
+
+def test_layouts_leave_no_overlapping_boxes():
+    for layout in ("layered", "force"):
+        graph = layout_graph(chain(60, layout))
+        xy = np.array([[node["x"], node["y"]] for node in graph["nodes"]])
+        apart = np.abs(xy[:, None] - xy[None]) >= np.array([graph["node_width"], graph["node_height"]]) - 1e-3
+        assert (apart.any(axis=-1) | np.eye(len(xy), dtype=bool)).all(), layout
+
+def test_force_layout_is_deterministic():
+    assert layout_graph(chain(40, "force")) == layout_graph(chain(40, "force"))
+
+def test_large_force_graph_falls_back_to_layers():
+    graph = layout_graph(chain(FORCE_MAX_NODES + 1, "force"))
+    assert graph["layout"] == "layered"
+    assert layout_graph(chain(FORCE_MAX_NODES, "force"))["layout"] == "force"
@@ -0,0 +1,49 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from pipeline.memory import MemoryBudget, run_with_peak_rss
+
+def test_run_with_peak_rss_measures_the_child():
+    returncode, stderr, peak, killed = run_with_peak_rss(
+        [sys.executable, "-c", "import sys; data = bytearray(64 * 1024 * 1024); sys.stderr.write('done'); sys.exit(3)"])
+    assert returncode == 3 and stderr == "done" and not killed
+    assert peak is None or peak >= 64
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="the limit is sampled from /proc")
+def test_child_over_the_limit_is_killed():
+    start = time.perf_counter()
+    returncode, _, _, killed = run_with_peak_rss(
+        [sys.executable, "-c", "import time; data = b'x' * (256 * 1024 * 1024); time.sleep(30)"], limit_mb=128)
+    assert killed and returncode != 0
+    assert time.perf_counter() - start < 10
+
+def test_budget_limits_concurrency_to_observed_peaks():
+    budget = MemoryBudget(250)
+    running, most = [0], [0]
+    lock = threading.Lock()
+
+    def job():
+        with budget.admit():
+            with lock:
+                running[0] += 1
+                most[0] = max(most[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+        budget.record(100)
+
+    threads = [threading.Thread(target=job) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 100 MB each under a 250 MB budget: never more than two at once
+    assert most[0] <= 2
+
+def test_over_budget_peak_is_reported():
+    budget = MemoryBudget(100)
+    assert budget.record(80)
+    assert not budget.record(120)
@@ -0,0 +1,22 @@
+from benchmarks.pipeline_bench import compare
+
+META = {"platform": "Linux-x86_64", "cpus": 8}
+
+def results(**stages) -> dict:
+    return {"meta": META, "sizes": {"small": {"stages": {k: {"median_s": v} for k, v in stages.items()}}}}
+
+def test_only_real_slowdowns_are_regressions(capsys):
+    baseline = results(script=0.100, blueprint=0.001, tts=0.200)
+    current = results(script=0.150, blueprint=0.003, tts=0.210, render=4.0)
+    regressions = compare(current, baseline, threshold=0.10, min_delta=0.005)
+
+    # blueprint tripled, but by less than min_delta; render has no baseline
+    assert regressions == ["small/script: +50.0%"]
+    out = capsys.readouterr().out
+    assert "new" in out and "another machine" not in out
+
+def test_other_hardware_is_flagged(capsys):
+    baseline = results(script=0.1)
+    baseline["meta"] = {"platform": "macOS-arm64", "cpus": 10}
+    assert compare(results(script=0.1), baseline, threshold=0.10, min_delta=0.005) == []
+    assert "another machine" in capsys.readouterr().out
@@ -0,0 +1,58 @@
+import os
+
+from pipeline.render_cache import RenderCache
+from pipeline.renderer import Renderer
+
+def write(path, size: int) -> str:
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return str(path)
+
+def test_pinned_segments_survive_eviction(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=2500)
+    first = cache.put("a", write(tmp_path / "a.mp4", 1000))
+    cache.pin(["a"])
+    cache.put("b", write(tmp_path / "b.mp4", 1000))
+    cache.put("c", write(tmp_path / "c.mp4", 1000))
+    # "a" is least recently used, but a render still has to read it
+    assert os.path.exists(first)
+    assert cache.get("b") is None
+
+    cache.unpin(["a"])
+    cache.put("d", write(tmp_path / "d.mp4", 1000))
+    assert cache.get("a") is None
+
+def test_puts_under_the_cap_do_not_rescan(tmp_path, monkeypatch):
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=10 ** 6)
+    cache.put("first", write(tmp_path / "seg.mp4", 100))
+    scans = []
+    listdir = os.listdir
+    monkeypatch.setattr(os, "listdir", lambda path: scans.append(path) or listdir(path))
+    for i in range(20):
+        cache.put(f"k{i}", str(tmp_path / "seg.mp4"))
+    assert scans == []
+
+def test_key_covers_everything_that_changes_pixels():
+    scene = {"duration": 2, "visuals": [{"type": "circle"}]}
+    key = RenderCache.key(scene, {"primary_color": "BLUE"}, "-ql", "6")
+    assert key == RenderCache.key(dict(reversed(scene.items())), {"primary_color": "BLUE"}, "-ql", "6")
+    assert key != RenderCache.key(dict(scene, duration=3), {"primary_color": "BLUE"}, "-ql", "6")
+    assert key != RenderCache.key(scene, {"primary_color": "RED"}, "-ql", "6")
+    assert key != RenderCache.key(scene, {"primary_color": "BLUE"}, "-qh", "6")
+    assert key != RenderCache.key(scene, {"primary_color": "BLUE"}, "-ql", "7")
+
+def test_unchanged_scenes_are_not_rendered_again(tmp_path):
+    source = write(tmp_path / "seg.mp4", 10)
+    rendered = []
+    renderer = Renderer(output_file=str(tmp_path / "gen.py"), max_workers=1, elide_holds=False,
+                        cache=RenderCache(str(tmp_path / "cache")))
+    renderer._render_segment = lambda name, scene, module: rendered.append(name) or source
+    renderer._assemble = lambda blueprint, class_names, segments, output_path=None: segments
+    scenes = [{"id": i, "duration": 2, "visuals": [{"type": "text", "content": f"S{i}"}]} for i in range(3)]
+    renderer.render_parallel({"style_settings": {}, "scenes": scenes})
+    assert len(rendered) == 3
+
+    scenes[1] = dict(scenes[1], duration=5)
+    segments = renderer.render_parallel({"style_settings": {}, "scenes": scenes})
+    assert rendered[3:] == ["Scene0002"]
+    assert all(path.startswith(str(tmp_path / "cache")) for path in segments.values())
@@ -0,0 +1,148 @@
+from pipeline import renderer as renderer_module
+from pipeline import tts
+from pipeline.render_cache import RenderCache
+from pipeline.renderer import Renderer
+
+BLUEPRINT = {
+    "title": "Test",
+    "style_settings": {},
+    "scenes": [
+        {"id": i + 1, "duration": 2, "narration": f"Line {i}",
+         "visuals": [{"type": "text", "content": f"Scene {i}", "position": "center"}]}
+        for i in range(3)
+    ],
+}
+
+def stub_renderer(tmp_path, rendered: list) -> Renderer:
+    renderer = Renderer(output_file=str(tmp_path / "gen.py"), max_workers=2, elide_holds=False)
+
+    def render_segment(class_name, scene, module_file):
+        rendered.append(class_name)
+        return f"{class_name}.mp4"
+
+    renderer._render_segment = render_segment
+    renderer._assemble = lambda blueprint, class_names, segments, output_path=None: segments
+    return renderer
+
+def test_reuse_renders_only_missing_scenes(tmp_path):
+    rendered = []
+    renderer = stub_renderer(tmp_path, rendered)
+    segments = renderer.render_parallel(BLUEPRINT, reuse={0: "old0.mp4", 2: "old2.mp4"})
+    assert rendered == ["Scene0002"]
+    assert segments == {"Scene0001": "old0.mp4", "Scene0002": "Scene0002.mp4", "Scene0003": "old2.mp4"}
+
+def test_on_segment_reports_every_scene(tmp_path):
+    ready = {}
+    renderer = stub_renderer(tmp_path, [])
+    renderer.render_parallel(BLUEPRINT, on_segment=ready.__setitem__, reuse={1: "old1.mp4"})
+    assert ready == {0: "Scene0001.mp4", 1: "old1.mp4", 2: "Scene0003.mp4"}
+
+def test_cache_key_ignores_scene_id():
+    class Keys:
+        @staticmethod
+        def key(scene, style_settings, quality, version):
+            return repr(sorted(scene.items()))
+
+    renderer = Renderer()
+    renderer.cache = Keys()
+    scene = BLUEPRINT["scenes"][0]
+    assert renderer._cache_key(scene, {}) == renderer._cache_key(dict(scene, id=42), {})
+    assert renderer._cache_key(scene, {}) != renderer._cache_key(dict(scene, duration=3), {})
+
+def test_one_failing_scene_does_not_abort_the_render(tmp_path):
+    rendered = []
+    renderer = stub_renderer(tmp_path, rendered)
+    render_segment = renderer._render_segment
+
+    def flaky(class_name, scene, module_file):
+        if class_name == "Scene0002":
+            raise ValueError("bad template")
+        return render_segment(class_name, scene, module_file)
+
+    renderer._render_segment = flaky
+    segments = renderer.render_parallel(BLUEPRINT)
+    assert sorted(segments) == ["Scene0001", "Scene0003"]
+
+def test_segments_render_without_assembling(tmp_path):
+    rendered = []
+    renderer = stub_renderer(tmp_path, rendered)
+    assembled = []
+    renderer._assemble = lambda blueprint, class_names, segments, output_path=None: assembled.append(segments)
+    segments = renderer.render_segments(BLUEPRINT)
+    assert segments == {0: "Scene0001.mp4", 1: "Scene0002.mp4", 2: "Scene0003.mp4"}
+    assert assembled == []
+
+    # A reconcile pass re-renders one scene, then everything is joined once
+    segments = renderer.render_segments(BLUEPRINT, reuse={0: segments[0], 2: segments[2]})
+    renderer.assemble(BLUEPRINT, segments)
+    assert rendered == ["Scene0001", "Scene0002", "Scene0003", "Scene0002"]
+    assert assembled == [{"Scene0001": "Scene0001.mp4", "Scene0002": "Scene0002.mp4", "Scene0003": "Scene0003.mp4"}]
+
+def test_cached_segments_stay_pinned_until_assembly(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    renderer = stub_renderer(tmp_path, [])
+    renderer.cache = cache
+    del renderer._assemble # Real assembly; ffmpeg is not needed to release the pins
+    renderer._join_and_mux = lambda *args: None
+    source = tmp_path / "seg.mp4"
+    source.write_bytes(b"\0")
+    render_segment = renderer._render_segment
+    renderer._render_segment = lambda name, scene, module: render_segment(name, scene, module) and str(source)
+
+    segments = renderer.render_segments(BLUEPRINT)
+    assert sum(cache._pinned.values()) == 3
+    renderer.assemble(BLUEPRINT, segments)
+    assert not cache._pinned
+
+def test_assembly_skips_failed_scenes_and_keeps_narration_aligned(ffmpeg_calls, monkeypatch, tmp_path):
+    monkeypatch.setattr(renderer_module, "probe_duration", lambda path: {"a.mp4": 3.5, "c.mp4": 4.0}[path])
+    monkeypatch.setattr(tts, "generate_voice", lambda text: (f"{text}.mp3", 1.0))
+    renderer = Renderer(output_file=str(tmp_path / "gen.py"))
+    output = str(tmp_path / "video.mp4")
+    assert renderer.assemble(BLUEPRINT, {0: "a.mp4", 2: "c.mp4"}, output) == output
+
+    (concat, _), (mux, scripts) = ffmpeg_calls
+    assert concat[-1] == str(tmp_path / "video_silent.mp4")
+    # Scene 2 failed, so its narration is left out and scene 3's starts at 3.5s
+    assert [mux[k + 1] for k, arg in enumerate(mux) if arg == "-i"] == [str(tmp_path / "video_silent.mp4"),
+                                                                       "Line 0.mp3", "Line 2.mp3"]
+    graph, = scripts.values()
+    assert "apad=whole_dur=3.500" in graph and "apad=whole_dur=4.000" in graph
+
+def test_preview_renders_stills_in_chunks_and_tiles_them_in_order(ffmpeg_calls, tmp_path):
+    renderer = Renderer(output_file=str(tmp_path / "gen.py"), max_workers=2)
+    chunks = []
+
+    def render_stills(class_names, module_file):
+        chunks.append(class_names)
+        # Scene 2's still is missing
+        return {name: str(tmp_path / f"{name}.png") for name in class_names if name != "Scene0002"}
+
+    renderer._render_stills = render_stills
+    output = str(tmp_path / "sheet.png")
+    assert renderer.render_preview(BLUEPRINT, output) == output
+
+    assert sorted(chunks) == [["Scene0001", "Scene0003"], ["Scene0002"]]
+    code = open(tmp_path / "gen_preview.py").read()
+    assert "self.add(scene_group_0)" in code and "self.play(" not in code
+    (args, scripts), = ffmpeg_calls
+    listing, = scripts.values()
+    assert listing.splitlines() == [f"file '{tmp_path}/Scene0001.png'", f"file '{tmp_path}/Scene0003.png'"]
+    assert "tile=2x1" in args[args.index("-vf") + 1]
+
+def test_holds_are_restored_on_each_scenes_first_fadeout_frame(monkeypatch, tmp_path):
+    calls = []
+
+    def extend_holds(path, holds, output_path):
+        calls.append(holds)
+        open(output_path, "wb").close()
+
+    monkeypatch.setattr(renderer_module, "extend_holds", extend_holds)
+    video = tmp_path / "Scene0001.mp4"
+    video.write_bytes(b"\0")
+    renderer = Renderer(quality="-ql") # 15 fps
+    renderer._restore_holds(str(video), [{"duration": 2}, {"duration": 0}, {"duration": 3.5}])
+
+    # Scene k is fade in, fade out; its hold starts at (2k + 1) fades, plus half a frame
+    assert calls == [[(1 + 1 / 30, 2), (5 + 1 / 30, 3.5)]]
+    assert video.exists() and not (tmp_path / "Scene0001.holds.mp4").exists()
@@ -0,0 +1,81 @@
+import os
+import threading
+
+import pytest
+
+from pipeline.script_cache import ScriptCache
+from pipeline.script_gen import MockBackend, ScriptGenerator, mock_script, validate_script
+
+class CannedBackend(MockBackend):
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+        self.calls = 0
+
+    def complete(self, topic, prompt):
+        self.calls += 1
+        return self.response
+
+def test_mock_script_is_valid():
+    validate_script(mock_script("Graphs"))
+
+@pytest.mark.parametrize("field", ["id", "visual_concept"])
+def test_scene_missing_a_blueprint_field_is_rejected(field):
+    script = mock_script("Graphs")
+    del script["scenes"][1][field]
+    with pytest.raises(ValueError, match=field):
+        validate_script(script)
+
+def test_title_must_be_a_string():
+    with pytest.raises(ValueError, match="title"):
+        validate_script(dict(mock_script("Graphs"), title=None))
+
+def test_malformed_response_is_not_cached(tmp_path):
+    script = mock_script("Graphs")
+    del script["scenes"][0]["visual_concept"]
+    cache = ScriptCache(str(tmp_path))
+    backend = CannedBackend(script)
+    generator = ScriptGenerator(backend, cache=cache, retries=0)
+    with pytest.raises(ValueError):
+        generator.generate_script("Graphs")
+    assert os.listdir(tmp_path) == []
+
+    # Fixed upstream: the next run asks again and caches the good response
+    backend.response = mock_script("Graphs")
+    assert generator.generate_script("Graphs") == mock_script("Graphs")
+    assert backend.calls == 2 and len(os.listdir(tmp_path)) == 1
+
+class CountingBackend(MockBackend):
+    def __init__(self, max_concurrency):
+        super().__init__(latency=0.05, max_concurrency=max_concurrency)
+        self.topics = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def complete(self, topic, prompt):
+        with self.lock:
+            self.topics.append(topic)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            return super().complete(topic, prompt)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+def test_batch_requests_each_uncached_topic_once_within_the_limit(tmp_path):
+    backend = CountingBackend(max_concurrency=2)
+    generator = ScriptGenerator(backend, cache=ScriptCache(str(tmp_path)))
+    generator.generate_script("Graphs")
+
+    topics = ["Graphs", "Queues", "Heaps", "Queues", "Tries", "Stacks"]
+    scripts = generator.generate_scripts(topics)
+    assert set(scripts) == set(topics)
+    assert sorted(backend.topics) == ["Graphs", "Heaps", "Queues", "Stacks", "Tries"]
+    assert backend.peak == 2
+
+    # A different model is a different cache entry
+    backend.model = "mock-2"
+    generator.generate_scripts(["Graphs"])
+    assert backend.topics.count("Graphs") == 2
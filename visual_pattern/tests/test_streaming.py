@@ -0,0 +1,72 @@
+import threading
+import time
+
+from pipeline import tts
+from pipeline.audio_cache import AudioCache
+from pipeline.render_cache import RenderCache
+from pipeline.streaming import StreamingPipeline
+
+class StubRenderer:
+    def __init__(self):
+        self.rendered = []
+
+    def render_scene(self, index, scene, style_settings=None):
+        self.rendered.append(index)
+        return f"scene{index}.mp4"
+
+    @staticmethod
+    def _scene_class_name(index):
+        return f"Scene{index + 1:04d}"
+
+    def _assemble(self, blueprint, class_names, segments, output_path=None):
+        return segments
+
+def test_tts_failure_keeps_the_scene(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path) # The blueprint stage reads the audio cache under media/
+    def fail(*args, **kwargs):
+        raise RuntimeError("TTS service down")
+
+    monkeypatch.setattr(tts, "generate_voice_with_retry", fail)
+    renderer = StubRenderer()
+    segments = StreamingPipeline(renderer).run("Caching")
+    assert segments and len(segments) == len(renderer.rendered)
+
+def test_concurrent_puts_of_the_same_segment(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    segment = tmp_path / "segment.mp4"
+    segment.write_bytes(b"x" * 4096)
+    errors = []
+
+    def put():
+        try:
+            for _ in range(50):
+                cache.put("same-key", str(segment))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=put) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+class SlowFirstRenderer(StubRenderer):
+    def render_scene(self, index, scene, style_settings=None):
+        # Scene 1 finishes last, and scene 3 never renders
+        time.sleep(0.2 if index == 0 else 0)
+        if index == 2:
+            raise RuntimeError("render failed")
+        return super().render_scene(index, scene, style_settings)
+
+def test_segments_are_assembled_in_scene_order(monkeypatch, tmp_path):
+    monkeypatch.setattr(tts, "_audio_cache", AudioCache(str(tmp_path)))
+    monkeypatch.setattr(tts, "generate_voice_with_retry", lambda text: None)
+    ready = []
+    renderer = SlowFirstRenderer()
+    segments = StreamingPipeline(renderer, render_workers=3).run("Caching", on_segment=lambda i, path: ready.append(i))
+
+    assert ready[-1] == 0
+    assert sorted(ready) == [0, 1, 3]
+    assert list(segments.items()) == [("Scene0001", "scene0.mp4"), ("Scene0002", "scene1.mp4"),
+                                      ("Scene0004", "scene3.mp4")]
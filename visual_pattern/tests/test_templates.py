@@ -0,0 +1,38 @@
+from pipeline.renderer import Renderer
+from pipeline.templates import TemplateLibrary
+
+GRID = {"type": "grid"}
+
+def scene(text: str, duration: float, position: str = "center") -> dict:
+    return {"duration": duration, "visuals": [GRID, {"type": "text", "content": text, "position": position}]}
+
+def test_split_and_supports(tmp_path):
+    library = TemplateLibrary(str(tmp_path / "templates"))
+    static, texts = library.split(scene("Hi", 2))
+    assert static == [GRID] and [t["content"] for t in texts] == ["Hi"]
+    assert library.supports(scene("Hi", 2))
+    assert not library.supports({"visuals": [GRID, {"type": "sparkles"}]})
+
+def test_one_clip_serves_every_scene_with_the_same_visuals(ffmpeg_calls, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    renderer = Renderer(quality="-ql")
+    clip = tmp_path / "TemplateClip.mp4"
+    clip.write_bytes(b"\0" * 64)
+    rendered = []
+    renderer._render_scene_class = lambda name, module: rendered.append(module) or str(clip)
+    library = TemplateLibrary(str(tmp_path / "templates"))
+
+    first = library.compose(renderer, "Scene0001", scene("It's here", 2), "gen.py")
+    library.compose(renderer, "Scene0002", scene("Bye", 4.5, "bottom"), "gen.py")
+    assert len(rendered) == 1
+    assert first.endswith("Scene0001.mp4")
+    assert "self.wait(" not in open(rendered[0]).read()
+
+    (args, scripts), (_, second_scripts) = ffmpeg_calls
+    assert args[args.index("-i") + 1] == library.clip(renderer, [GRID])
+    graph, = scripts.values()
+    assert "tpad=stop_mode=clone:stop_duration=2.000000" in graph
+    assert "y=(h-text_h)/2" in graph
+    textfile = graph.split("textfile='")[1].split("'")[0]
+    assert open(textfile).read() == "It's here"
+    assert "y=h-text_h-30" in next(iter(second_scripts.values()))
@@ -0,0 +1,62 @@
+import contextlib
+import hashlib
+import os
+
+from pipeline import interpreter
+from pipeline.codegen import TEXT_FONT_SIZE
+from pipeline.text_cache import TextCache, text_specs
+
+class FakeManim:
+    """
+    Stands in for manim's Text, which writes one SVG per text into the
+    configured text_dir.
+    """
+
+    def __init__(self):
+        self.text_dir = None
+        self.rasterized = []
+
+    @contextlib.contextmanager
+    def tempconfig(self, options):
+        self.text_dir = options["text_dir"]
+        yield
+
+    def Text(self, text, font_size):
+        self.rasterized.append(text)
+        name = hashlib.sha256(f"{text}{font_size}".encode()).hexdigest()[:16] + ".svg"
+        with open(os.path.join(self.text_dir, name), "w") as f:
+            f.write("<svg/>")
+
+def test_specs_cover_text_and_graph_labels_once():
+    scenes = [
+        {"visuals": [{"type": "text", "content": "Intro"}, {"type": "circle"}]},
+        {"visuals": [{"type": "text", "content": "Intro"},
+                     {"type": "graph", "font_size": 18, "nodes": [{"label": "A"}, {"label": ""}, {"label": "B"}]}]},
+    ]
+    assert text_specs(scenes) == [("Intro", TEXT_FONT_SIZE), ("A", 18), ("B", 18)]
+
+def test_warm_publishes_each_text_once(monkeypatch, tmp_path):
+    fake = FakeManim()
+    monkeypatch.setattr(interpreter, "_manim", fake)
+    cache = TextCache(str(tmp_path / "texts"))
+    specs = [("Intro", 24), ("Outro", 24)]
+
+    assert cache.warm(specs) == 2
+    assert cache.missing(specs) == []
+    svgs = [name for name in os.listdir(cache.text_dir) if name.endswith(".svg")]
+    assert len(svgs) == 2
+    # Staging directories never outlive a warm-up
+    assert not [name for name in os.listdir(cache.text_dir) if name.startswith(".staging-")]
+
+    assert cache.warm(specs) == 0
+    assert fake.rasterized == ["Intro", "Outro"]
+
+    # An index entry whose SVG is gone is rasterized again
+    os.remove(os.path.join(cache.text_dir, svgs[0]))
+    assert len(cache.missing(specs)) == 1
+
+def test_config_file_points_manim_at_the_cache(tmp_path):
+    cache = TextCache(str(tmp_path / "texts"))
+    path = cache.config_file()
+    assert open(path).read() == f"[CLI]\ntext_dir = {cache.text_dir}\n"
+    assert cache.config_file() == path
@@ -0,0 +1,61 @@
+import json
+import threading
+
+import pytest
+
+from pipeline.tracing import Tracer, to_openmetrics
+
+def test_spans_nest_per_thread_and_aggregate():
+    tracer = Tracer()
+    with tracer.span("render", scenes=2) as outer:
+        with tracer.span("render.scene", scene="Scene0001"):
+            pass
+        # Spans opened on another thread do not inherit this thread's parent
+        def synthesize():
+            with tracer.span("tts.synthesize"):
+                pass
+
+        thread = threading.Thread(target=synthesize)
+        thread.start()
+        thread.join()
+        outer["cached"] = 1
+
+    spans = {span["name"]: span for span in tracer.spans}
+    assert spans["render.scene"]["parent"] == spans["render"]["id"]
+    assert spans["render"]["parent"] is None and spans["render"]["cached"] == 1
+    assert spans["tts.synthesize"]["parent"] is None
+    assert spans["render"]["wall_s"] >= spans["render.scene"]["wall_s"]
+    assert tracer.report()["stages"]["render.scene"]["count"] == 1
+
+def test_failed_span_records_the_error():
+    tracer = Tracer()
+    with pytest.raises(ValueError):
+        with tracer.span("blueprint"):
+            raise ValueError("bad scene")
+    assert tracer.spans[0]["error"] == "ValueError: bad scene"
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    with tracer.span("render") as span:
+        span["scenes"] = 3
+    tracer.count("tts_cache_hits")
+    assert tracer.spans == [] and tracer.counters == {}
+
+def test_openmetrics_output(tmp_path):
+    tracer = Tracer()
+    with tracer.span('script "gen"'):
+        pass
+    tracer.count("tts_cache_hits", 3)
+    text = to_openmetrics(tracer.report())
+
+    assert text.endswith("# EOF\n")
+    assert 'visual_pattern_span_seconds_count{span="script \\"gen\\""} 1' in text
+    assert "# TYPE visual_pattern_tts_cache_hits counter" in text
+    assert "visual_pattern_tts_cache_hits_total 3" in text
+    types = [line.split()[2] for line in text.splitlines() if line.startswith("# TYPE")]
+    assert len(types) == len(set(types))
+
+    prom = tracer.write(str(tmp_path / "run.prom"))
+    assert open(prom).read().startswith("# TYPE")
+    report = json.load(open(tracer.write(str(tmp_path / "run.json"))))
+    assert report["counters"] == {"tts_cache_hits": 3}
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from pipeline import tts
+from pipeline.audio_cache import AudioCache
+
+class FlakyBackend(tts.OfflineBackend):
+    """
+    Offline engine that fails the first attempts at every line and
+    records how many lines it was synthesizing at once.
+    """
+    name = "flaky"
+
+    def __init__(self, failures=1, max_concurrency=2):
+        super().__init__(latency=0.01, max_concurrency=max_concurrency)
+        self.failures = failures
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def synthesize(self, text, path, lang="en"):
+        with self.lock:
+            self.calls.append(text)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            attempt = self.calls.count(text)
+        try:
+            if attempt <= self.failures:
+                raise ConnectionError("rate limited")
+            super().synthesize(text, path, lang)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+@pytest.fixture(autouse=True)
+def audio_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts, "AUDIO_DIR", str(tmp_path))
+    monkeypatch.setattr(tts, "_audio_cache", AudioCache(str(tmp_path)))
+
+def test_prefetch_synthesizes_each_line_once_and_retries_failures():
+    backend = FlakyBackend(failures=1)
+    texts = ["One line.", "Two lines, here.", "One line.", "Three."]
+    results = tts.prefetch_voices(texts, backend=backend, max_workers=8, backoff=0)
+
+    assert set(results) == {"One line.", "Two lines, here.", "Three."}
+    # One failure plus one success per distinct line
+    assert sorted(backend.calls) == sorted(list(dict.fromkeys(texts)) * 2)
+    assert backend.peak <= backend.max_concurrency
+    for text, (path, duration) in results.items():
+        assert path.endswith(".wav")
+        assert duration == pytest.approx(tts.estimate_duration(text), abs=0.01)
+
+    # A warm cache answers without calling the backend
+    assert tts.prefetch_voices(texts, backend=backend, backoff=0) == results
+    assert len(backend.calls) == 6
+
+def test_prefetch_skips_lines_that_keep_failing():
+    backend = FlakyBackend(failures=10)
+    assert tts.prefetch_voices(["Never works."], backend=backend, retries=2, backoff=0) == {}
+    assert len(backend.calls) == 3
+    assert tts.lookup_voice("Never works.", backend=backend) is None
@@ -0,0 +1,42 @@
+from pipeline.visual_rules import VisualRuleEngine, default_engine
+
+def engine(rules: list) -> VisualRuleEngine:
+    return VisualRuleEngine({"rules": rules, "fallback": {"name": "fallback", "visuals": []}})
+
+def test_keyword_inside_longer_keyword_keeps_priority():
+    rules = engine([
+        {"name": "flowchart", "priority": 20, "keywords": ["flowchart"], "visuals": []},
+        {"name": "chart", "priority": 10, "keywords": ["chart"], "visuals": []},
+    ])
+    assert rules.match("flowchart")["name"] == "chart"
+
+def test_lowest_priority_number_wins_anywhere_in_concept():
+    rules = engine([
+        {"name": "grid", "priority": 50, "keywords": ["grid"], "visuals": []},
+        {"name": "title", "priority": 5, "keywords": ["title"], "visuals": []},
+    ])
+    assert rules.match("grid behind the title")["name"] == "title"
+    assert rules.match("a grid")["name"] == "grid"
+    assert rules.match("nothing relevant")["name"] == "fallback"
+
+def test_bundled_table_builds_visuals():
+    rules = default_engine()
+    style = {"primary_color": "BLUE", "shape_style": "geometric"}
+    assert rules.build_visuals("Intro title card", "Hello", style) == [
+        {"type": "text", "content": "Hello", "position": "center", "scale": 0.8},
+    ]
+    # Style placeholders are filled in from the style settings
+    assert rules.build_visuals("connect the steps", "Flow", style) == [
+        {"type": "rectangle", "position": "left", "color": "BLUE"},
+        {"type": "rectangle", "position": "right", "color": "GREEN"},
+        {"type": "arrow", "start": "left", "end": "right"},
+    ]
+
+def test_bundled_fallback_picks_colour_by_style():
+    rules = default_engine()
+    geometric = rules.build_visuals("nothing relevant", "Hi", {"shape_style": "geometric"})
+    assert geometric == [
+        {"type": "text", "content": "Hi", "position": "bottom", "scale": 0.6},
+        {"type": "circle", "color": "RED"},
+    ]
+    assert rules.build_visuals("nothing relevant", "Hi", {"shape_style": "organic"})[1]["color"] == "ORANGE"
@@ -0,0 +1,47 @@
+import pytest
+
+from pipeline.worker import JOB_OPTIONS, JobQueue
+
+def test_job_options_round_trip(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite"))
+    job_id = queue.submit({"scenes": []}, {"quality": "-qh", "cache": False})
+    claimed_id, blueprint, options = queue.claim("w0")
+    assert claimed_id == job_id and blueprint == {"scenes": []}
+    assert options == {**JOB_OPTIONS, "quality": "-qh", "cache": False}
+
+def test_unknown_job_option_is_rejected(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite"))
+    with pytest.raises(ValueError):
+        queue.submit({"scenes": []}, {"templates": True})
+
+def test_jobs_are_claimed_once_in_submit_order(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite"))
+    first, second = queue.submit({"scenes": []}), queue.submit({"scenes": []})
+    assert queue.claim("w0")[0] == first
+    assert queue.claim("w1")[0] == second
+    assert queue.claim("w0") is None
+    assert queue.status(first)["worker"] == "w0"
+
+def test_status_and_stats_follow_completion(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite"))
+    done, failed, waiting = (queue.submit({"scenes": []}) for _ in range(3))
+    queue.claim("w0")
+    queue.claim("w0")
+    queue.complete(done, "media/jobs/1/video.mp4")
+    queue.fail(failed, "no scenes rendered")
+
+    assert queue.status(done)["output"] == "media/jobs/1/video.mp4"
+    assert queue.status(failed)["error"] == "no scenes rendered"
+    assert queue.status(waiting)["status"] == "queued"
+    assert queue.status(999) is None
+    stats = queue.stats(window=60)
+    assert (stats["done"], stats["failed"], stats["queued"]) == (1, 1, 1)
+    assert stats["jobs_per_minute"] == 1.0
+
+def test_jobs_left_running_are_requeued(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite"))
+    job_id = queue.submit({"scenes": []})
+    queue.claim("crashed")
+    assert queue.requeue_running() == 1
+    assert queue.status(job_id)["status"] == "queued" and queue.status(job_id)["worker"] is None
+    assert queue.claim("w0")[0] == job_id